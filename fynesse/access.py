@@ -1,16 +1,28 @@
 from .config import *
 
+from . import backends
+from . import profiling
+
 import pymysql
 
 import pandas as pd # used to download and save csvs
 import urllib.request
 import zipfile
+import csv
+import io
+import itertools
+import os
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
 
 # This file accesses the data
 
 """Place commands in this file to access the data electronically. Don't remove any missing values, or deal with outliers. Make sure you have legalities correct, both intellectual property and personal data privacy rights. Beyond the legal side also think about the ethical issues around this data. """
 
-def create_connection(user, password, host, database, port=3306):
+def create_connection(user, password, host, database, port=3306, raise_errors=False):
     """ Create a database connection to the MariaDB database
         specified by the host url and database name.
     :param user: username
@@ -18,6 +30,7 @@ def create_connection(user, password, host, database, port=3306):
     :param host: host url
     :param database: database
     :param port: port number
+    :param raise_errors: raise the error if the connection fails, rather than printing it and returning None
     :return: Connection object or None
     """
     conn = None
@@ -31,13 +44,89 @@ def create_connection(user, password, host, database, port=3306):
                                autocommit=True
                                )
     except Exception as e:
+        if raise_errors:
+            raise
         print(f"Error connecting to the MariaDB Server: {e}")
     return conn
 
-def create_pp_data_table(conn):
+#secondary indexes of each table under each index scheme, added by build_indexes. Hash indexes can only serve
+#equality lookups, so the btree scheme uses composite indexes which can also serve the range conditions of the
+#bounding box join, and the spatial scheme puts an R-tree over a POINT column holding each postcode's location
+index_schemes = {
+    "hash": {"pp_data": ["INDEX `pp.postcode` USING HASH (postcode)",
+                         "INDEX `pp.date` USING HASH (date_of_transfer)"],
+             "postcode_data": ["INDEX `po.postcode` USING HASH (postcode)",
+                               "INDEX `po.lattitude` USING HASH (lattitude)",
+                               "INDEX `po.longitude` USING HASH (longitude)"]},
+    "btree": {"pp_data": ["INDEX `pp.postcode_date` USING BTREE (postcode, date_of_transfer)",
+                          "INDEX `pp.date` USING BTREE (date_of_transfer)"],
+              "postcode_data": ["INDEX `po.postcode` USING BTREE (postcode)",
+                                "INDEX `po.lattitude_longitude` USING BTREE (lattitude, longitude)"]},
+    "spatial": {"pp_data": ["INDEX `pp.postcode_date` USING BTREE (postcode, date_of_transfer)",
+                            "INDEX `pp.date` USING BTREE (date_of_transfer)"],
+                "postcode_data": ["INDEX `po.postcode` USING BTREE (postcode)",
+                                  "SPATIAL INDEX `po.location` (location)"]},
+}
+
+def get_index_scheme(index_scheme=None):
+    return index_scheme if index_scheme is not None else config.get("index_scheme", "btree")
+
+def build_indexes(conn, table, index_scheme=None):
+    """
+    Add all of the secondary indexes of table with a single ALTER TABLE, so they are built in one pass over its rows
+    :param index_scheme: one of the keys of index_schemes, defaults to the index_scheme config value
+    """
+    backend = backends.backend_for(conn)
+    if backend.embedded:
+        backend.build_indexes(conn, table, get_index_scheme(index_scheme))
+        return
+
+    indexes = index_schemes[get_index_scheme(index_scheme)][table]
+    cur = conn.cursor()
+    cur.execute("ALTER TABLE `" + table + "` " + ", ".join("ADD " + index for index in indexes))
+    conn.commit()
+
+@contextmanager
+def relaxed_checks(conn):
+    """
+    Turn off unique and foreign key checks for the session while bulk loading, turning them back on afterwards
+    """
+    backend = backends.backend_for(conn)
+    cur = conn.cursor()
+    backend.relax_checks(cur)
+    try:
+        yield
+    finally:
+        backend.restore_checks(cur)
+
+def clear_cleaning_progress(conn, table):
+    """
+    Forget the progress recorded by assess.clean_data for the rules deleting from table, as once the table is
+    recreated its db_ids start again and the rules need to check every row
+    """
+    if not has_table(conn, "cleaning_progress"):
+        return
+    cur = conn.cursor()
+    #the definition of each rule is recorded as a json list starting with its table
+    cur.execute("DELETE FROM cleaning_progress WHERE rule_definition LIKE %s", (json.dumps([table])[:-1] + ",%",))
+    conn.commit()
+
+def create_pp_data_table(conn, defer_indexes=False, index_scheme=None):
     """
     Create pp_data table
+    :param defer_indexes: leave out the secondary indexes, to be added with build_indexes once the data is loaded
+    :param index_scheme: one of the keys of index_schemes, defaults to the index_scheme config value
     """
+    backend = backends.backend_for(conn)
+    if backend.embedded:
+        backend.create_table(conn, "pp_data")
+        if not defer_indexes:
+            build_indexes(conn, "pp_data", index_scheme)
+        create_pp_data_summary_tables(conn)
+        clear_cleaning_progress(conn, "pp_data")
+        mark_changed(conn, "pp_data")
+        return
+
     cur = conn.cursor()
     cur.execute("DROP TABLE IF EXISTS `pp_data`")
     
@@ -66,19 +155,32 @@ def create_pp_data_table(conn):
     cur.execute("""ALTER TABLE `pp_data`
                     ADD PRIMARY KEY (`db_id`)""")
     cur.execute("""ALTER TABLE `pp_data` MODIFY `db_id` bigint(20) unsigned NOT NULL AUTO_INCREMENT,AUTO_INCREMENT=1""")
-    cur.execute("""CREATE INDEX `pp.postcode` USING HASH
-                      ON `pp_data`
-                        (postcode)""")
-    cur.execute("""CREATE INDEX `pp.date` USING HASH
-                      ON `pp_data` 
-                        (date_of_transfer);""")
-    
     conn.commit()
 
-def create_postcode_data_table(conn):
+    if not defer_indexes:
+        build_indexes(conn, "pp_data", index_scheme)
+
+    #start the summaries off empty, so they are kept up to date as the data is loaded
+    create_pp_data_summary_tables(conn)
+    clear_cleaning_progress(conn, "pp_data")
+    mark_changed(conn, "pp_data")
+
+def create_postcode_data_table(conn, defer_indexes=False, index_scheme=None):
     """
     Create postcode_data table
+    :param defer_indexes: leave out the secondary indexes, to be added with build_indexes once the data is loaded
+    :param index_scheme: one of the keys of index_schemes, defaults to the index_scheme config value. The spatial
+                         scheme adds a location column, filled in from lattitude and longitude on upload
     """
+    backend = backends.backend_for(conn)
+    if backend.embedded:
+        backend.create_table(conn, "postcode_data")
+        if not defer_indexes:
+            build_indexes(conn, "postcode_data", index_scheme)
+        clear_cleaning_progress(conn, "postcode_data")
+        mark_changed(conn, "postcode_data")
+        return
+
     cur = conn.cursor()
     cur.execute("DROP TABLE IF EXISTS `postcode_data`")
     
@@ -103,26 +205,29 @@ def create_postcode_data_table(conn):
                   `db_id` bigint(20) unsigned NOT NULL
                 ) DEFAULT CHARSET=utf8 COLLATE=utf8_bin""")
 
+    if get_index_scheme(index_scheme) == "spatial":
+        cur.execute("""ALTER TABLE `postcode_data` ADD `location` point NOT NULL""")
+
     #also add primary key and index certain columns
     cur.execute("""ALTER TABLE `postcode_data`
                     ADD PRIMARY KEY (`db_id`)""")
     cur.execute("""ALTER TABLE `postcode_data` MODIFY `db_id` bigint(20) unsigned NOT NULL AUTO_INCREMENT,AUTO_INCREMENT=1""")
-    cur.execute("""CREATE INDEX `po.postcode` USING HASH
-                      ON `postcode_data`
-                        (postcode)""")
-    cur.execute("""CREATE INDEX `po.lattitude` USING HASH
-                      ON `postcode_data`
-                        (lattitude)""")
-    cur.execute("""CREATE INDEX `po.longitude` USING HASH
-                      ON `postcode_data`
-                        (longitude);""")
-    
     conn.commit()
+    clear_cleaning_progress(conn, "postcode_data")
+    mark_changed(conn, "postcode_data")
+
+    if not defer_indexes:
+        build_indexes(conn, "postcode_data", index_scheme)
 
 def create_prices_coordinates_data_table(conn):
     """
     Create prices_coordinates_data table
     """
+    backend = backends.backend_for(conn)
+    if backend.embedded:
+        backend.create_table(conn, "prices_coordinates_data")
+        return
+
     cur = conn.cursor()
     cur.execute("DROP TABLE IF EXISTS `prices_coordinates_data`")
     
@@ -154,11 +259,23 @@ def upload_csv_file_to_pp_data_table(conn, filepath):
     Upload the contents of filepath to 'pp_data' table
     """
     cur = conn.cursor()
-    cur.execute("""LOAD DATA LOCAL INFILE %s INTO TABLE pp_data 
-                   FIELDS TERMINATED BY ',' OPTIONALLY ENCLOSED BY '"' 
-                   LINES STARTING BY '' TERMINATED BY '\n'""", (filepath,))
+    cur.execute("SELECT COALESCE(MAX(db_id), 0) FROM pp_data")
+    last_db_id = cur.fetchall()[0][0]
+
+    backend = backends.backend_for(conn)
+    if backend.embedded:
+        backend.load_csv(conn, "pp_data", filepath, ["id"] + pp_data_csv_columns)
+    else:
+        cur.execute("""LOAD DATA LOCAL INFILE %s INTO TABLE pp_data 
+                       FIELDS TERMINATED BY ',' OPTIONALLY ENCLOSED BY '"' 
+                       LINES STARTING BY '' TERMINATED BY '\n'""", (filepath,))
     
     conn.commit()
+    mark_changed(conn, "pp_data")
+
+    #the new rows are the ones after the previous last db_id
+    if has_pp_data_summaries(conn):
+        add_to_pp_data_summaries(conn, "db_id > %s", (last_db_id,))
 
 def download_and_save_csv(url, filepath):
   df = pd.read_csv(url)
@@ -169,52 +286,648 @@ def download_and_unzip_file(url, direc):
   zipped_f = zipfile.ZipFile(f, 'r')
   zipped_f.extractall(direc)
 
+#columns of the postcode csv file, in the order they appear in the file
+postcode_data_csv_columns = ["postcode", "status", "usertype", "easting", "northing", "positional_quality_indicator",
+                             "country", "lattitude", "longitude", "postcode_no_space", "postcode_fixed_width_seven",
+                             "postcode_fixed_width_eight", "postcode_area", "postcode_district", "postcode_sector",
+                             "outcode", "incode"]
+
 def upload_csv_file_to_postcode_data_table(conn, filepath):
     """
     Upload the contents of filepath to 'postcode_data' table
     """
+    backend = backends.backend_for(conn)
+    if backend.embedded:
+        backend.load_csv(conn, "postcode_data", filepath, postcode_data_csv_columns)
+        mark_changed(conn, "postcode_data")
+        return
+
     cur = conn.cursor()
-    cur.execute("""LOAD DATA LOCAL INFILE %s INTO TABLE postcode_data 
-                   FIELDS TERMINATED BY ',' OPTIONALLY ENCLOSED BY '"' 
-                   LINES STARTING BY '' TERMINATED BY '\n'""", (filepath,))
+    cur.execute("SHOW COLUMNS FROM postcode_data LIKE 'location'")
+    if len(cur.fetchall()) == 0:
+        cur.execute("""LOAD DATA LOCAL INFILE %s INTO TABLE postcode_data 
+                       FIELDS TERMINATED BY ',' OPTIONALLY ENCLOSED BY '"' 
+                       LINES STARTING BY '' TERMINATED BY '\n'""", (filepath,))
+    else:
+        #the table was created with the spatial index scheme, so fill in each postcode's location as a point
+        columns = ", ".join("@" + column if column in ("lattitude", "longitude") else column
+                            for column in postcode_data_csv_columns)
+        cur.execute("""LOAD DATA LOCAL INFILE %s INTO TABLE postcode_data 
+                       FIELDS TERMINATED BY ',' OPTIONALLY ENCLOSED BY '"' 
+                       LINES STARTING BY '' TERMINATED BY '\n'
+                       (""" + columns + """)
+                       SET lattitude = @lattitude, longitude = @longitude, location = POINT(@longitude, @lattitude)""",
+                    (filepath,))
 
     conn.commit()
+    mark_changed(conn, "postcode_data")
+
+#columns of the price paid csv files, in the order they appear in the file
+pp_data_csv_columns = ["transaction_unique_identifier", "price", "date_of_transfer", "postcode", "property_type",
+                       "new_build_flag", "tenure_type", "primary_addressable_object_name",
+                       "secondary_addressable_object_name", "street", "locality", "town_city", "district", "county",
+                       "ppd_category_type", "record_status"]
+
+def open_csv_source(source):
+    """
+    Open source, either a local filepath or a url, as a text stream
+    """
+    if os.path.exists(source):
+        return open(source, newline='', encoding='utf-8')
+    return io.TextIOWrapper(urllib.request.urlopen(source), newline='', encoding='utf-8')
+
+def read_csv_in_chunks(source, chunk_size=10000):
+    """
+    Yield the rows of the csv at source in lists of at most chunk_size rows,
+    so only one chunk is held in memory at a time
+    """
+    with open_csv_source(source) as f:
+        reader = csv.reader(f)
+        while True:
+            chunk = list(itertools.islice(reader, chunk_size))
+            if not chunk:
+                return
+            yield chunk
+
+def upload_csv_chunks_to_pp_data_table(conn, chunks, stale_years=None):
+    """
+    Upload chunks of price paid csv rows to 'pp_data' table, returning the number of rows uploaded
+    :param stale_years: set to add the years uploaded to, whose price quantiles need recomputing, instead of
+                        recomputing them straight away, so a bulk load can recompute them once it has built the indexes
+    """
+    backend = backends.backend_for(conn)
+    columns = ["id"] + pp_data_csv_columns
 
-def load_pp_data(conn):
+    #id holds the position of the row in its file, as it did when the files were saved with pandas
+    rows = 0
+    years = set()
+    summarise = has_pp_data_summaries(conn)
+    for chunk in chunks:
+        backend.insert_rows(conn, "pp_data", columns, [[str(rows + i)] + row for i, row in enumerate(chunk)])
+        if summarise:
+            years |= add_rows_to_pp_data_summary(conn, chunk)
+        conn.commit()
+        rows += len(chunk)
+        profiling.record(rows=len(chunk))
+    mark_changed(conn, "pp_data")
+
+    if stale_years is not None:
+        stale_years |= years
+    elif years:
+        refresh_price_quantiles(conn, years)
+    return rows
+
+def stream_csv_to_pp_data_table(conn, source, chunk_size=10000, stale_years=None):
+    """
+    Upload the price paid csv at source (a url or local filepath) to 'pp_data' table in chunks,
+    without writing an intermediate copy to disk
+    """
+    return upload_csv_chunks_to_pp_data_table(conn, read_csv_in_chunks(source, chunk_size), stale_years)
+
+def pp_data_url(year):
+    return "http://prod.publicdata.landregistry.gov.uk.s3-website-eu-west-1.amazonaws.com/pp-" + str(year) + ".csv"
+
+def load_pp_data(conn, chunk_size=10000, stale_years=None):
     for year in range(1995, 2022):
-      url = "http://prod.publicdata.landregistry.gov.uk.s3-website-eu-west-1.amazonaws.com/pp-" + str(year) + ".csv"
-      local_filepath = str(year) + "_price_paid.csv"
-      download_and_save_csv(url, local_filepath)
-      upload_csv_file_to_pp_data_table(conn, local_filepath)
-      print(year,"done")
+      rows = stream_csv_to_pp_data_table(conn, pp_data_url(year), chunk_size, stale_years)
+      print(year, "done,", rows, "rows")
+
+def source_signature(source):
+    """
+    Return a string which changes whenever the file at source (a url or local filepath) changes
+    """
+    if os.path.exists(source):
+        stat = os.stat(source)
+        return str(stat.st_size) + "-" + str(stat.st_mtime_ns)
+    with urllib.request.urlopen(urllib.request.Request(source, method="HEAD")) as response:
+        headers = response.headers
+        return headers.get("ETag") or str(headers.get("Content-Length")) + "-" + str(headers.get("Last-Modified"))
+
+def read_manifest(filepath):
+    if not os.path.exists(filepath):
+        return {}
+    with open(filepath) as f:
+        return json.load(f)
+
+def write_manifest(filepath, manifest):
+    #write to a temporary file first so an interrupted write never leaves a corrupt manifest
+    with open(filepath + ".tmp", "w") as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    os.replace(filepath + ".tmp", filepath)
+
+#changes made by this process to each table, by database and table, so what is cached about a table can be
+#recomputed once it changes, see stats.py
+table_versions = {}
+table_versions_lock = threading.Lock()
+
+def database_key(conn):
+    """
+    Return a key naming the database conn is connected to, the same for every connection to it
+    """
+    if backends.backend_for(conn).embedded:
+        return ("embedded", id(conn.db))
+    return (conn.host, conn.port, conn.db)
+
+def mark_changed(conn, table):
+    """
+    Record that the contents of table have been changed
+    """
+    with table_versions_lock:
+        key = (database_key(conn), table)
+        table_versions[key] = table_versions.get(key, 0) + 1
+
+def table_version(conn, table):
+    return table_versions.get((database_key(conn), table), 0)
+
+def has_table(conn, table):
+    #connections to embedded databases, such as snapshot.SnapshotConnection, know their own tables
+    if hasattr(conn, "has_table"):
+        return conn.has_table(table)
+    cur = conn.cursor()
+    cur.execute("SHOW TABLES LIKE %s", (table,))
+    return len(cur.fetchall()) > 0
+
+#quantiles of price kept in 'pp_data_price_quantiles' table
+price_quantiles = [0.1, 0.25, 0.5, 0.75, 0.9]
+
+#tables summarising pp_data, made by create_pp_data_summary_tables
+pp_data_summary_tables = ["pp_data_summary", "pp_data_year_summary", "pp_data_price_quantiles"]
+
+def has_pp_data_summaries(conn):
+    return all(has_table(conn, table) for table in pp_data_summary_tables)
+
+def create_pp_data_summary_tables(conn):
+    """
+    Create the tables summarising pp_data, and fill them in from its current contents.
+    'pp_data_summary' holds the number of sales and their total price by year, month, postcode district and
+    property type, 'pp_data_year_summary' holds the same totals by year alone, so they are read without adding
+    up the rows of pp_data_summary, and 'pp_data_price_quantiles' holds the quantiles of price by year and
+    property type. They are kept up to date as rows are uploaded to or deleted from pp_data by the functions in
+    this file
+    """
+    backend = backends.backend_for(conn)
+    if backend.embedded:
+        for table in pp_data_summary_tables:
+            backend.create_table(conn, table)
+        add_to_pp_data_summaries(conn, "1 = 1", ())
+        return
+
+    cur = conn.cursor()
+    cur.execute("DROP TABLE IF EXISTS `pp_data_summary`")
+    cur.execute("""CREATE TABLE `pp_data_summary` (
+                  `year` smallint unsigned NOT NULL,
+                  `month` tinyint unsigned NOT NULL,
+                  `postcode_district` varchar(4) COLLATE utf8_bin NOT NULL,
+                  `property_type` varchar(1) COLLATE utf8_bin NOT NULL,
+                  `sales` bigint(20) NOT NULL,
+                  `total_price` bigint(20) NOT NULL,
+                  PRIMARY KEY (`year`, `month`, `postcode_district`, `property_type`)
+                ) DEFAULT CHARSET=utf8 COLLATE=utf8_bin""")
+
+    cur.execute("DROP TABLE IF EXISTS `pp_data_year_summary`")
+    cur.execute("""CREATE TABLE `pp_data_year_summary` (
+                  `year` smallint unsigned NOT NULL,
+                  `sales` bigint(20) NOT NULL,
+                  `total_price` bigint(20) NOT NULL,
+                  PRIMARY KEY (`year`)
+                ) DEFAULT CHARSET=utf8 COLLATE=utf8_bin""")
+
+    cur.execute("DROP TABLE IF EXISTS `pp_data_price_quantiles`")
+    cur.execute("""CREATE TABLE `pp_data_price_quantiles` (
+                  `year` smallint unsigned NOT NULL,
+                  `property_type` varchar(1) COLLATE utf8_bin NOT NULL,
+                  `quantile` decimal(3,2) NOT NULL,
+                  `price` decimal(12,2) NOT NULL,
+                  PRIMARY KEY (`year`, `property_type`, `quantile`)
+                ) DEFAULT CHARSET=utf8 COLLATE=utf8_bin""")
+    conn.commit()
+
+    add_to_pp_data_summaries(conn, "1 = 1", ())
+
+def add_to_pp_data_summaries(conn, condition, params, sign=1):
+    """
+    Add the rows of pp_data matching the sql condition to the summaries, or take them away if sign is -1.
+    When adding, the price quantiles of the years they are from are then recomputed, while after taking rows away
+    refresh_pp_data_summaries should be called once they have been deleted from pp_data
+    :return: the set of years affected
+    """
+    backend = backends.backend_for(conn)
+    cur = conn.cursor()
+    cur.execute("""INSERT INTO pp_data_summary
+                   SELECT """ + backend.year("date_of_transfer") + """ AS year, """ + backend.month("date_of_transfer") + """ AS month,
+                          """ + backend.outcode("postcode") + """ AS postcode_district, property_type,
+                          %s * COUNT(*), %s * SUM(price)
+                   FROM pp_data WHERE """ + condition + """
+                   GROUP BY year, month, postcode_district, property_type""" +
+                backend.upsert("pp_data_summary", ["year", "month", "postcode_district", "property_type"],
+                               ["sales", "total_price"]),
+                (sign, sign) + tuple(params))
+    cur.execute("""INSERT INTO pp_data_year_summary
+                   SELECT """ + backend.year("date_of_transfer") + """ AS year, %s * COUNT(*), %s * SUM(price)
+                   FROM pp_data WHERE """ + condition + """ GROUP BY year""" +
+                backend.upsert("pp_data_year_summary", ["year"], ["sales", "total_price"]),
+                (sign, sign) + tuple(params))
+    conn.commit()
+
+    cur.execute("SELECT DISTINCT " + backend.year("date_of_transfer") + " FROM pp_data WHERE " + condition, params)
+    years = set(row[0] for row in cur.fetchall())
+    if sign == 1:
+        refresh_price_quantiles(conn, years)
+    return years
+
+def add_rows_to_pp_data_summary(conn, rows):
+    """
+    Add rows, as read from a price paid csv, to the summary tables, leaving the price quantiles to be
+    refreshed by the caller once it has uploaded all of its rows
+    :return: the set of years of the rows
+    """
+    totals = {}
+    for row in rows:
+        date, postcode, property_type = row[2], row[3], row[4]
+        key = (int(date[:4]), int(date[5:7]), postcode.split(" ")[0], property_type)
+        sales, total_price = totals.get(key, (0, 0))
+        totals[key] = (sales + 1, total_price + int(row[1]))
+
+    year_totals = {}
+    for key, (sales, total_price) in totals.items():
+        year_sales, year_total_price = year_totals.get(key[0], (0, 0))
+        year_totals[key[0]] = (year_sales + sales, year_total_price + total_price)
+
+    backend = backends.backend_for(conn)
+    backend.upsert_rows(conn, "pp_data_summary", ["year", "month", "postcode_district", "property_type"],
+                        ["sales", "total_price"], [key + value for key, value in totals.items()])
+    backend.upsert_rows(conn, "pp_data_year_summary", ["year"], ["sales", "total_price"],
+                        [(year,) + value for year, value in year_totals.items()])
+    return set(year_totals)
+
+def refresh_price_quantiles(conn, years):
+    """
+    Recompute the price quantiles of the given years from pp_data, as quantiles cannot be updated incrementally
+    """
+    backend = backends.backend_for(conn)
+    cur = conn.cursor()
+    for year in years:
+        rows = [(year, property_type, q, prices[i])
+                for property_type, prices in backend.price_quantiles(conn, price_quantiles, str(year) + "-01-01",
+                                                                     str(year + 1) + "-01-01")
+                for i, q in enumerate(price_quantiles)]
+
+        cur.execute("DELETE FROM pp_data_price_quantiles WHERE year = %s", (year,))
+        if rows:
+            backend.insert_rows(conn, "pp_data_price_quantiles", ["year", "property_type", "quantile", "price"], rows)
+    conn.commit()
+
+def refresh_pp_data_summaries(conn, years):
+    """
+    Drop the rows of the summaries of the given years left with no sales once rows of pp_data have been deleted,
+    and recompute the price quantiles of those years
+    """
+    if not years:
+        return
+    cur = conn.cursor()
+    #year leads the primary key, so only the rows of these years are read
+    for table in ("pp_data_summary", "pp_data_year_summary"):
+        cur.execute("DELETE FROM " + table + " WHERE year IN (" + ", ".join(["%s"] * len(years)) + ") AND sales = 0",
+                    tuple(years))
+    conn.commit()
+    refresh_price_quantiles(conn, years)
+
+def delete_from_pp_data(conn, condition, params=(), stale_years=None):
+    """
+    Delete the rows of pp_data matching the sql condition, keeping the summaries up to date
+    :param stale_years: set to add the years whose summaries need refreshing to, instead of refreshing them straight
+                        away with refresh_pp_data_summaries, so a run of deletes can refresh them once at the end
+    :return: number of rows deleted
+    """
+    summarise = has_pp_data_summaries(conn)
+    years = set()
+    if summarise:
+        years = add_to_pp_data_summaries(conn, condition, params, sign=-1)
+
+    cur = conn.cursor()
+    deleted = cur.execute("DELETE FROM pp_data WHERE " + condition, params)
+    conn.commit()
+    mark_changed(conn, "pp_data")
+
+    if stale_years is not None:
+        stale_years |= years
+    elif summarise:
+        refresh_pp_data_summaries(conn, years)
+    return deleted
+
+def delete_pp_data_year(conn, year):
+    """
+    Delete the sales in 'pp_data' which took place in the given year
+    """
+    delete_from_pp_data(conn, "date_of_transfer >= %s AND date_of_transfer < %s",
+                        (str(year) + "-01-01", str(year + 1) + "-01-01"))
+
+def years_in_pp_data(conn):
+    """
+    Return the set of years with sales in 'pp_data', read from pp_data_year_summary if it is there
+    """
+    cur = conn.cursor()
+    if has_pp_data_summaries(conn):
+        cur.execute("SELECT year FROM pp_data_year_summary WHERE sales > 0")
+    else:
+        cur.execute("SELECT DISTINCT " + backends.backend_for(conn).year("date_of_transfer") + " FROM pp_data")
+    return set(int(row[0]) for row in cur.fetchall())
+
+def load_pp_data_parallel(connect, years=range(1995, 2022), workers=4, manifest_filepath="pp_data_manifest.json",
+                          source=pp_data_url, chunk_size=10000):
+    """
+    Load several years of price paid data into 'pp_data' at once
+    :param connect: function taking no arguments which returns a new connection, called once per worker
+    :param years: years to load
+    :param workers: number of years to fetch and upload concurrently. Only MariaDB takes writes from several
+                    connections at once, so years are loaded one at a time into embedded databases
+    :param manifest_filepath: json file recording the years already loaded, their row counts and source signatures
+    :param source: function mapping a year to the url or local filepath of its csv
+    :param chunk_size: number of rows sent to the database at a time
+    :return: the manifest, mapping each loaded year to its entry
+    """
+    manifest = read_manifest(manifest_filepath)
+    lock = threading.Lock()
+    local = threading.local()
+    connections = [connect()]
+    spare = list(connections)
+
+    #only load years which are missing from the manifest, whose source has changed since they were loaded, or
+    #which have no sales left in pp_data, as when it has been recreated since the manifest was written
+    present = years_in_pp_data(connections[0])
+    pending = []
+    for year in years:
+        signature = source_signature(source(year))
+        entry = manifest.get(str(year))
+        if entry is None or entry["signature"] != signature or (entry["rows"] and year not in present):
+            pending.append((year, signature))
+        else:
+            print(year, "already loaded,", entry["rows"], "rows")
+
+    if backends.backend_for(connections[0]).embedded:
+        #writers to sqlite and duckdb take turns on one lock, so loading years at once is no faster, and slower on duckdb
+        workers = 1
+
+    def load_year(year, signature):
+        if not hasattr(local, "conn"):
+            with lock:
+                local.conn = spare.pop() if spare else None
+            if local.conn is None:
+                local.conn = connect()
+                with lock:
+                    connections.append(local.conn)
+
+        #clear out any rows left by an earlier, changed or interrupted, load of this year
+        delete_pp_data_year(local.conn, year)
+        rows = stream_csv_to_pp_data_table(local.conn, source(year), chunk_size)
+
+        with lock:
+            manifest[str(year)] = {"rows": rows, "signature": signature}
+            write_manifest(manifest_filepath, manifest)
+        print(year, "done,", rows, "rows")
+
+    try:
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            for future in [executor.submit(load_year, year, signature) for year, signature in pending]:
+                future.result()
+    finally:
+        for conn in connections:
+            conn.close()
+
+    return manifest
 
 def load_postcode_data(conn):
     download_and_unzip_file("https://www.getthedata.com/downloads/open_postcode_geo.csv.zip", "./postcode_data")
     upload_csv_file_to_postcode_data_table(conn, "postcode_data/open_postcode_geo.csv")
 
+#compact types of the columns read by read_typed, by name. The one letter flags and other columns with a known
+#set of values are categories with those values fixed, so chunks read separately can be put together as they are
+typed_columns = {
+    "price": "uint32", "date_of_transfer": "datetime64[ns]",
+    "property_type": pd.CategoricalDtype(["D", "S", "T", "F", "O"]), "new_build_flag": pd.CategoricalDtype(["Y", "N"]),
+    "tenure_type": pd.CategoricalDtype(["F", "L", "U"]), "ppd_category_type": pd.CategoricalDtype(["A", "B"]),
+    "record_status": pd.CategoricalDtype(["A", "C", "D"]),
+    "lattitude": "float32", "longitude": "float32", "easting": "UInt32", "northing": "UInt32",
+    "positional_quality_indicator": "uint8", "status": pd.CategoricalDtype(["live", "terminated"]),
+    "usertype": pd.CategoricalDtype(["small", "large"]),
+    "country": pd.CategoricalDtype(["England", "Wales", "Scotland", "Northern Ireland", "Channel Islands", "Isle of Man"]),
+    "db_id": "uint64",
+}
+
+def typed_frame(df, dtypes):
+    """
+    Convert the columns of df named in dtypes to their types, leaving those given as "category" for read_typed
+    """
+    for column in df.columns:
+        dtype = dtypes.get(column)
+        if dtype is None or (isinstance(dtype, str) and dtype == "category"):
+            continue
+        if isinstance(dtype, str) and dtype.startswith("datetime64"):
+            #MariaDB gives dates, embedded databases give strings
+            df[column] = pd.to_datetime(df[column])
+        else:
+            df[column] = df[column].astype(dtype)
+    return df
+
+def iter_typed(conn, sql, params=(), dtypes=None, chunk_size=100000):
+    """
+    Run sql and yield its rows in DataFrames of at most chunk_size rows, with the columns converted to compact
+    types as each chunk arrives. Rows are streamed with an unbuffered cursor, so only one chunk is held at a time.
+    Yields a single empty DataFrame if there are no rows
+    :param dtypes: types of columns by name, added to or overriding typed_columns
+    """
+    dtypes = dict(typed_columns, **(dtypes or {}))
+    cur = conn.cursor(pymysql.cursors.SSCursor)
+    try:
+        cur.execute(sql, params)
+        columns = [column[0] for column in cur.description]
+        empty = True
+        while True:
+            chunk = cur.fetchmany(chunk_size)
+            if not chunk:
+                break
+            empty = False
+            yield typed_frame(pd.DataFrame(list(chunk), columns=columns), dtypes)
+        if empty:
+            yield typed_frame(pd.DataFrame(columns=columns), dtypes)
+    finally:
+        cur.close()
+
+def read_typed(conn, sql, params=(), dtypes=None, chunk_size=100000):
+    """
+    Return the rows of sql as a DataFrame of compact types, in place of pd.read_sql_query: float32 coordinates,
+    categories for the one letter flags and datetime64 dates, read chunk_size rows at a time. Columns given as
+    "category" in dtypes are converted once every chunk is read, so their categories cover all of them
+    :param dtypes: types of columns by name, added to or overriding typed_columns
+    """
+    chunks = list(iter_typed(conn, sql, params, dtypes, chunk_size))
+    df = chunks[0] if len(chunks) == 1 else pd.concat(chunks, ignore_index=True)
+    for column, dtype in (dtypes or {}).items():
+        if isinstance(dtype, str) and dtype == "category" and column in df:
+            df[column] = df[column].astype("category")
+    return df
+
+def bytes_per_row(df):
+    return int(df.memory_usage(deep=True).sum()) / len(df) if len(df) else 0
+
+def postcode_in_range_condition(lat, lon, box_size, index_scheme=None, inner_box_size=0):
+    """
+    Return the sql condition, and its parameters, selecting the rows of postcode_data (aliased po) within the
+    box of width box_size centred on lat, lon
+    :param inner_box_size: width of a smaller box, also centred on lat, lon, whose rows are left out, so only the
+                           ring between the two boxes is selected
+    """
+    if get_index_scheme(index_scheme) == "spatial":
+        def box_condition(size):
+            south, north, west, east = lat-size/2, lat+size/2, lon-size/2, lon+size/2
+            box = "POLYGON(({0} {1}, {2} {1}, {2} {3}, {0} {3}, {0} {1}))".format(west, south, east, north)
+            #MBRContains includes the edge of the box, whereas the other schemes exclude it
+            return "MBRContains(ST_GeomFromText(%s), po.location)", (box,)
+    else:
+        def box_condition(size):
+            return ("po.lattitude > %s AND po.lattitude < %s AND po.longitude > %s AND po.longitude < %s",
+                    (lat-size/2, lat+size/2, lon-size/2, lon+size/2))
+
+    condition, params = box_condition(box_size)
+    if inner_box_size > 0:
+        inner_condition, inner_params = box_condition(inner_box_size)
+        condition, params = condition + " AND NOT (" + inner_condition + ")", params + inner_params
+    return condition, params
+
+#columns of the bounding box join, mapped to the pp_data (pp) or postcode_data (po) column they come from
+box_join_columns = {"price": "pp.price", "date_of_transfer": "pp.date_of_transfer", "postcode": "pp.postcode",
+                    "property_type": "pp.property_type", "new_build_flag": "pp.new_build_flag",
+                    "tenure_type": "pp.tenure_type", "locality": "pp.locality", "town_city": "pp.town_city",
+                    "district": "pp.district", "county": "pp.county", "country": "po.country",
+                    "lattitude": "po.lattitude", "longitude": "po.longitude", "db_id": "pp.db_id"}
+
+def box_join_query(lat, lon, box_size, start_date, end_date, columns=None, limit=None, index_scheme=None,
+                   inner_box_size=0):
+    """
+    Return the sql query, and its parameters, joining the pp_data and postcode_data rows within the bounding box
+    and date range
+    :param columns: names of the columns to select from box_join_columns, defaults to all of them in the same
+                    order as prices_coordinates_data
+    :param limit: maximum number of rows to return, or None for all of them
+    :param inner_box_size: leave out the rows within this smaller box, selecting only the ring around it
+    """
+    columns = list(box_join_columns) if columns is None else columns
+    unknown = [column for column in columns if column not in box_join_columns]
+    if unknown:
+        raise ValueError("Unknown bounding box join columns: " + ", ".join(unknown))
+
+    condition, params = postcode_in_range_condition(lat, lon, box_size, index_scheme, inner_box_size)
+    sql = """SELECT """ + ", ".join(box_join_columns[column] for column in columns) + """
+             FROM postcode_data po
+             INNER JOIN pp_data pp ON (pp.postcode = po.postcode)
+             WHERE """ + condition + """ AND pp.date_of_transfer > %s AND pp.date_of_transfer < %s"""
+    if limit is not None:
+        sql += " LIMIT " + str(int(limit))
+    return sql, params + (start_date, end_date)
+
+def query_index_scheme(conn):
+    #embedded databases have no location column, so are always queried with the range conditions
+    return "btree" if backends.backend_for(conn).embedded else None
+
 def join_on_postcode_in_range(conn, lat, lon, box_size, start_date, end_date):
   cur = conn.cursor()
 
   #clear joined table
-  cur.execute("TRUNCATE TABLE prices_coordinates_data;")
+  cur.execute(backends.backend_for(conn).truncate("prices_coordinates_data"))
 
   #join
-  cur.execute("""
-              INSERT INTO prices_coordinates_data
-              SELECT pp.price, pp.date_of_transfer, pp.postcode, pp.property_type, pp.new_build_flag, pp.tenure_type, pp.locality, pp.town_city, pp.district, pp.county, po.country, po.lattitude, po.longitude, pp.db_id FROM
-              (SELECT * FROM pp_data WHERE date_of_transfer > %s AND date_of_transfer < %s) pp 
-              INNER JOIN
-              (SELECT * FROM postcode_data WHERE lattitude > %s AND lattitude < %s AND longitude > %s AND longitude < %s) po
-              ON (pp.postcode = po.postcode)
-              """, (start_date, end_date, lat-box_size/2, lat+box_size/2, lon-box_size/2, lon+box_size/2))
+  sql, params = box_join_query(lat, lon, box_size, start_date, end_date, index_scheme=query_index_scheme(conn))
+  cur.execute("INSERT INTO prices_coordinates_data " + sql, params)
+
+def select_on_postcode_in_range(conn, lat, lon, box_size, start_date, end_date, columns=None, limit=None,
+                                inner_box_size=0):
+    """
+    Return the joined pp_data and postcode_data rows within the bounding box and date range as a DataFrame of the
+    compact types of read_typed, without writing to any table, so concurrent callers do not interfere with each other
+    :param columns: names of the columns to select from box_join_columns, defaults to all of them
+    :param limit: maximum number of rows to return, or None for all of them
+    :param inner_box_size: leave out the rows within this smaller box, e.g. one which has already been fetched
+    """
+    sql, params = box_join_query(lat, lon, box_size, start_date, end_date, columns, limit,
+                                 index_scheme=query_index_scheme(conn), inner_box_size=inner_box_size)
+    df = read_typed(conn, sql, params)
+    if profiling.active():
+        profiling.record(rows=len(df), bytes=int(df.memory_usage(deep=True).sum()))
+    return df
+
+def join_on_postcode_in_range_into_temporary_table(conn, lat, lon, box_size, start_date, end_date, columns=None,
+                                                   limit=None, table="session_prices_coordinates_data"):
+    """
+    Store the joined pp_data and postcode_data rows within the bounding box and date range in a temporary table,
+    which is only visible to this connection and is dropped when it closes
+    """
+    backend = backends.backend_for(conn)
+    sql, params = box_join_query(lat, lon, box_size, start_date, end_date, columns, limit,
+                                 index_scheme=query_index_scheme(conn))
+    cur = conn.cursor()
+    cur.execute(backend.drop_temporary_table(table))
+    cur.execute(backend.create_temporary_table(table) + sql, params)
+
+def explain_box_join(conn, lat, lon, box_size, start_date, end_date):
+    """
+    Return the rows of EXPLAIN for the bounding box join as dicts, one per table accessed. Embedded databases
+    give the table, type and key fields of MariaDB's EXPLAIN, with a type of ALL for a scan
+    """
+    sql, params = box_join_query(lat, lon, box_size, start_date, end_date, index_scheme=query_index_scheme(conn))
+    return backends.backend_for(conn).explain(conn, sql, params)
+
+def check_box_join_uses_indexes(conn, lat, lon, box_size, start_date, end_date):
+    """
+    Raise a RuntimeError if EXPLAIN shows the bounding box join scanning the whole of either table
+    """
+    for row in explain_box_join(conn, lat, lon, box_size, start_date, end_date):
+        if row["type"] == "ALL":
+            raise RuntimeError("full scan of " + str(row["table"]) + " in bounding box join: " + str(row))
+        if row["key"] is None:
+            raise RuntimeError("no index used on " + str(row["table"]) + " in bounding box join: " + str(row))
+
+def bulk_load(conn, table, load):
+    """
+    Call load to fill table with its unique and foreign key checks relaxed, then build its secondary indexes.
+    The table should have been created with defer_indexes=True
+    :return: dict of seconds spent loading the data and building the indexes
+    """
+    start = time.perf_counter()
+    with relaxed_checks(conn):
+        load()
+    loaded = time.perf_counter()
+    build_indexes(conn, table)
+    return {"load": loaded - start, "index": time.perf_counter() - loaded}
+
+def bulk_load_pp_data(conn, chunk_size=10000):
+    create_pp_data_table(conn, defer_indexes=True)
+    #the price quantiles of each year are computed once the date index is built, rather than by scanning the
+    #unindexed table after every year
+    stale_years = set()
+    timings = bulk_load(conn, "pp_data", lambda: load_pp_data(conn, chunk_size, stale_years))
+    start = time.perf_counter()
+    refresh_price_quantiles(conn, stale_years)
+    timings["quantiles"] = time.perf_counter() - start
+    return timings
+
+def bulk_load_postcode_data(conn):
+    create_postcode_data_table(conn, defer_indexes=True)
+    return bulk_load(conn, "postcode_data", lambda: load_postcode_data(conn))
 
 #can use this to setup everything at once
-def data(conn):
-    create_pp_data_table(conn)
-    load_pp_data(conn)
+def data(conn, defer_indexes=False):
+    if defer_indexes:
+        print("pp_data timings:", bulk_load_pp_data(conn))
+        print("postcode_data timings:", bulk_load_postcode_data(conn))
+    else:
+        create_pp_data_table(conn)
+        load_pp_data(conn)
 
-    create_postcode_data_table(conn)
-    load_postcode_data(conn)
+        create_postcode_data_table(conn)
+        load_postcode_data(conn)
 
     create_prices_coordinates_data_table(conn)
 
+#time every public function of this file as a stage when profiling, see profiling.py, apart from relaxed_checks,
+#which as a context manager would only be timed making its generator
+profiling.instrument_functions(globals(), exclude=("relaxed_checks",))
@@ -2,6 +2,9 @@
 
 from . import access
 from . import assess
+from . import models
+from . import pois
+from . import profiling
 
 from datetime import datetime
 from dateutil.relativedelta import relativedelta
@@ -12,37 +15,73 @@ import matplotlib.pyplot as plt
 import statsmodels.api as sm
 
 import math
-from shapely.geometry import Point
+import threading
+from contextlib import contextmanager
 
 import warnings
 
 """Address a particular question that arises from the data"""
 
-def get_num_pois_sample(conn, sample_size=35):
-    sql_query = pd.read_sql_query('SELECT sample.price, postcode_data.lattitude, postcode_data.longitude FROM (SELECT * FROM pp_data LIMIT '+str(sample_size)+') sample INNER JOIN postcode_data ON (sample.postcode = postcode_data.postcode)', conn)
-    df = pd.DataFrame(sql_query)
+#progress is printed unless quieted for the calling thread, as it is by the prediction service
+local = threading.local()
+
+def report(*args):
+  if not getattr(local, "quiet", False):
+    print(*args)
+
+@contextmanager
+def quiet():
+  """
+  Leave out the progress printed by predictions made by this thread within the body of a with statement
+  """
+  previous = getattr(local, "quiet", False)
+  local.quiet = True
+  try:
+    yield
+  finally:
+    local.quiet = previous
+
+def get_num_pois_sample(conn, sample_size=35, geocoder=None):
+    if geocoder is None:
+      df = access.read_typed(conn, 'SELECT sample.price, postcode_data.lattitude, postcode_data.longitude FROM (SELECT price, postcode FROM pp_data LIMIT '+str(sample_size)+') sample INNER JOIN postcode_data ON (sample.postcode = postcode_data.postcode)')
+    else:
+      #look the coordinates up in the geocoder instead of joining against postcode_data
+      df = access.read_typed(conn, 'SELECT price, postcode FROM pp_data LIMIT '+str(sample_size))
+      df['lattitude'], df['longitude'] = geocoder.lookup(df.postcode.values)
+      df = df.dropna(subset=['lattitude']).drop(columns='postcode').reset_index(drop=True)
 
     poi_types = ["amenity", "emergency", "healthcare", "highway", "leisure", "man_made", "military", "power", "public_transport", "railway", "sport", "tourism"]
 
+    #every tag type for every row is fetched at once, sharing requests wherever the boxes overlap
+    counts = assess.num_of_pois_by_tag_type_for_points(df['lattitude'].values, df['longitude'].values, 0.05, poi_types)
     for t in poi_types:
-      num = []
-      for _, row in df.iterrows():
-        num.append(assess.num_of_pois_by_tag_type(row['lattitude'], row['longitude'], 0.05, t))
-      df['num_'+t] = num
+      df['num_'+t] = counts['num_'+t].values
 
     return df
 
-def get_date_range(conn, date):
-  sales_data = assess.sales_over_time(conn, use_precomputed_result=True)
+#months either side of the date used when sales_over_time cannot scale the range
+default_date_range = 3
+
+def get_date_range(conn, date, sales_data=None):
+  if sales_data is None:
+    sales_data = assess.sales_over_time(conn, use_precomputed_result=True)
   year = date.split("-")[0]
+  #years without sales loaded, or years which all have as many sales, give no scale to work from
+  if year not in sales_data or max(sales_data.values()) == min(sales_data.values()):
+    return default_date_range
   return round((max(sales_data.values()) - sales_data[year]) / (max(sales_data.values()) - min(sales_data.values())) * 3) + 3
 
 def make_prediction(results, property_type, num_amenities, num_emergencies, num_healthcares):
-  x_pred = [num_amenities, num_emergencies, num_healthcares, property_type=="F", property_type=="S", property_type=="D", property_type=="T", property_type=="O"]
-  return results.get_prediction(x_pred).predicted_mean[0]
+  x_pred = design_matrix(pd.DataFrame({"num_amenities": [num_amenities], "num_emergencies": [num_emergencies],
+                                       "num_healthcares": [num_healthcares], "property_type": [property_type]}))
+  return results.predict(x_pred)[0]
 
-def predict_price(conn, latitude, longitude, date, property_type):
-  date_range = get_date_range(conn, date)
+def date_window(conn, date, sales_data=None):
+  """
+  Return the earliest and latest dates of the sales used to predict a price on date, as strings
+  :param sales_data: sales in each year, as returned by assess.sales_over_time, which is called if not given
+  """
+  date_range = get_date_range(conn, date, sales_data)
 
   datetime_obj = datetime.strptime(date, "%Y-%m-%d")
   earliest_obj = datetime_obj - relativedelta(months=date_range)
@@ -50,84 +89,280 @@ def predict_price(conn, latitude, longitude, date, property_type):
 
   earliest = datetime.strftime(earliest_obj, "%Y-%m-%d")
   latest = datetime.strftime(latest_obj, "%Y-%m-%d")
-
-  #load up table with relevant data
+  return earliest, latest
+
+def month_window(conn, month, sales_data=None):
+  """
+  Return the earliest and latest dates of the sales used to predict prices in month, given as "YYYY-MM",
+  covering the date windows of every day in it
+  """
+  if sales_data is None:
+    sales_data = assess.sales_over_time(conn, use_precomputed_result=True)
+  first = datetime.strptime(month + "-01", "%Y-%m-%d")
+  last = first + relativedelta(months=1) - relativedelta(days=1)
+  return (date_window(conn, datetime.strftime(first, "%Y-%m-%d"), sales_data)[0],
+          date_window(conn, datetime.strftime(last, "%Y-%m-%d"), sales_data)[1])
+
+def fetch_training_set(conn, latitude, longitude, earliest, latest, property_types, min_box_size=0):
+  """
+  Grow a box around latitude, longitude until it holds enough sales between earliest and latest, including
+  at least one of each of property_types
+  :param min_box_size: width of the first box tried
+  :return: DataFrame of the sales, and the width of the box they came from
+  """
   df = pd.DataFrame(columns=["property_type"])
+  rings = []
   box_size = 0
   requirement = 30
-  while len(df) < requirement or property_type not in df.property_type.unique():
-    print("Attempting to construct training set...")
-    box_size += max(0.01, box_size)
+  while len(df) < requirement or any(t not in df.property_type.unique() for t in property_types):
+    report("Attempting to construct training set...")
+    previous_box_size = box_size
+    box_size = max(0.01, min_box_size) if box_size == 0 else 2 * box_size
     requirement = max(10, requirement - 10)
-    access.join_on_postcode_in_range(conn, latitude, longitude, box_size, earliest, latest)
-
-    #load table into dataframe
-    sql_query = pd.read_sql_query('SELECT * FROM prices_coordinates_data', conn)
-    df = pd.DataFrame(sql_query)
-    print(len(df), "sales found on this attempt")
-
-  print("Using this training set")
-
-  warnings.simplefilter(action='ignore', category=UserWarning)
-
-  #nearby amenities from osm
-  amenities = assess.get_pois(latitude, longitude, box_size+0.03, {"amenity": True})
-  warnings.simplefilter(action='ignore', category=UserWarning)
-  num_amenities = []
-  for _, row in df.iterrows():
-    num_amenities.append(len(amenities[amenities.distance(Point(row['longitude'], row['lattitude'])) < 0.02]))
-
-  df['num_amenities'] = num_amenities
-
-  #nearby emergencies from osm
-  emergencies = assess.get_pois(latitude, longitude, box_size+0.03, {"emergency": True})
-  warnings.simplefilter(action='ignore', category=UserWarning)
-  num_emergencies = []
-  for _, row in df.iterrows():
-    num_emergencies.append(len(emergencies[emergencies.distance(Point(row['longitude'], row['lattitude'])) < 0.02]))
-
-  df['num_emergencies'] = num_emergencies
 
-  #nearby healthcares from osm
-  healthcares = assess.get_pois(latitude, longitude, box_size+0.03, {"healthcare": True})
+    #each box contains the last one, so only fetch the sales in the ring added around it
+    rings.append(access.select_on_postcode_in_range(conn, latitude, longitude, box_size, earliest, latest,
+                                                    columns=["price", "property_type", "lattitude", "longitude"],
+                                                    inner_box_size=previous_box_size))
+    df = pd.concat(rings, ignore_index=True)
+    report(len(df), "sales found on this attempt")
+    profiling.record(rows=len(rings[-1]))
+
+  report("Using this training set")
+  return df, box_size
+
+def get_poi_sets(latitude, longitude, box_size):
+  """
+  Return the amenities, emergencies and healthcares from osm around a training set fetched from a box of box_size
+  """
   warnings.simplefilter(action='ignore', category=UserWarning)
-  num_healthcares = []
-  for _, row in df.iterrows():
-    num_healthcares.append(len(healthcares[healthcares.distance(Point(row['longitude'], row['lattitude'])) < 0.02]))
-
-  df['num_healthcares'] = num_healthcares
-
-  #split df into train and test
-  np.random.seed(42)
-  df_test = pd.DataFrame()
+  #the three sets are fetched together, in one request for each area missing from the cache
+  names = {"amenities": "amenity", "emergencies": "emergency", "healthcares": "healthcare"}
+  res = pois.get_default_scheduler().get_pois([(latitude, longitude, box_size+0.03, {tag: True}) for tag in names.values()])
+  return dict(zip(names, res))
+
+def add_poi_counts(df, poi_sets):
+  counts = assess.count_pois_near(df.lattitude, df.longitude, poi_sets)
+  for column in counts.columns:
+    df[column] = counts[column].values
+  return df
+
+def design_matrix(df):
+  """
+  Return the design matrix of the model for the rows of df, which needs num_amenities, num_emergencies,
+  num_healthcares and property_type columns
+  """
+  return np.column_stack((df.num_amenities.values, df.num_emergencies.values, df.num_healthcares.values,
+                          (df.property_type=="F").values, (df.property_type=="S").values, (df.property_type=="D").values,
+                          (df.property_type=="T").values, (df.property_type=="O").values)).astype(float)
+
+def split_train_test(df, property_types):
+  """
+  Randomly split df into training and testing sets, with the training set holding each of property_types
+  """
+  #a generator of its own rather than the global one, which threads predicting at once would share, drawing the
+  #same numbers as np.random.seed(42) did
+  rng = np.random.RandomState(42)
   try_again = True
   while try_again:
-    train_mask = np.random.rand(len(df)) < 0.8
+    train_mask = rng.rand(len(df)) < 0.8
     df_test = df[~train_mask]
     df_train = df[train_mask]
-    try_again = property_type not in df_train.property_type.unique()
+    try_again = any(t not in df_train.property_type.unique() for t in property_types)
+  return df_train, df_test
+
+def fit_model(df_train):
+  m_linear = sm.OLS(df_train.price.values.astype(float), design_matrix(df_train))
+  return m_linear.fit()
+
+def error_metrics(prices, predictions, property_types):
+  """
+  Return the mean absolute percentage error and root mean squared error of predictions of prices,
+  overall and for each property type
+  """
+  prices = np.asarray(prices, dtype=float)
+  predictions = np.asarray(predictions, dtype=float)
+  property_types = np.asarray(property_types)
+
+  def metrics(mask):
+    errors = predictions[mask] - prices[mask]
+    return {"count": int(mask.sum()),
+            "mape": float(np.mean(np.abs(errors) / prices[mask])) if mask.any() else np.nan,
+            "rmse": float(np.sqrt(np.mean(errors ** 2))) if mask.any() else np.nan}
+
+  res = metrics(np.ones(len(prices), dtype=bool))
+  res["by_property_type"] = {t: metrics(property_types == t) for t in np.unique(property_types)}
+  return res
+
+def validate(results, df_test):
+  """
+  Score the whole testing set with one call to the model, returning the error metrics of error_metrics
+  """
+  return error_metrics(df_test.price.values, results.predict(design_matrix(df_test)), df_test.property_type.values)
+
+def validation_error(results, df_test):
+  """
+  Return the mean absolute percentage error of the model on the testing set, as validate and cross_validate report it
+  """
+  return validate(results, df_test)["mape"]
+
+def cross_validate(df, k=5, seed=42):
+  """
+  k-fold cross validation of the model on df, which needs the columns used by design_matrix and a price column.
+  The design matrix is built once and each fold fits on a slice of it, so nothing is refetched
+  :return: error metrics over the predictions for every row, each made by the model that did not see it,
+           along with the metrics of each fold
+  """
+  design = design_matrix(df)
+  prices = df.price.values.astype(float)
+  property_types = df.property_type.values
+
+  folds = np.array_split(np.random.default_rng(seed).permutation(len(df)), k)
+  predictions = np.empty(len(df))
+  fold_metrics = []
+  for fold in folds:
+    train = np.ones(len(df), dtype=bool)
+    train[fold] = False
+    results = sm.OLS(prices[train], design[train]).fit()
+    predictions[fold] = results.predict(design[fold])
+    fold_metrics.append(error_metrics(prices[fold], predictions[fold], property_types[fold]))
+
+  res = error_metrics(prices, predictions, property_types)
+  res["folds"] = fold_metrics
+  return res
+
+def predict_single(conn, latitude, longitude, date, property_type, sales_data=None):
+  """
+  Fit a model to the sales around the property alone and predict its price
+  :param sales_data: sales in each year, as returned by assess.sales_over_time, which is called if not given
+  :return: the prediction and the validation error of the model
+  """
+  earliest, latest = date_window(conn, date, sales_data)
 
-  design = np.concatenate((df_train.num_amenities.values.reshape(-1,1), df_train.num_emergencies.values.reshape(-1,1), df_train.num_healthcares.values.reshape(-1,1), (df_train.property_type=="F").values.reshape(-1,1), (df_train.property_type=="S").values.reshape(-1,1), (df_train.property_type=="D").values.reshape(-1,1), (df_train.property_type=="T").values.reshape(-1,1), (df_train.property_type=="O").values.reshape(-1,1)),axis=1)
-  m_linear = sm.OLS(df_train.price,design)
-  results = m_linear.fit()
-
-  #validate on testing set
-  avg_err = 0
-  for _, row in df_test.iterrows():
-    pred =  make_prediction(results, row['property_type'], row['num_amenities'], row['num_emergencies'], row['num_healthcares'])
-    if pred == 0:
-      continue
-    err = abs(pred - row['price'])
-    avg_err += err / pred
+  #load up table with relevant data
+  df, box_size = fetch_training_set(conn, latitude, longitude, earliest, latest, [property_type])
 
-  avg_err /= len(df_test)
+  #nearby amenities, emergencies and healthcares from osm
+  poi_sets = get_poi_sets(latitude, longitude, box_size)
+  df = add_poi_counts(df, poi_sets)
 
-  num_amenities = len(amenities[amenities.distance(Point(longitude, latitude)) < 0.02])
-  num_emergencies = len(emergencies[emergencies.distance(Point(longitude, latitude)) < 0.02])
-  num_healthcares = len(healthcares[healthcares.distance(Point(longitude, latitude)) < 0.02])
+  #split df into train and test
+  df_train, df_test = split_train_test(df, [property_type])
+  results = fit_model(df_train)
 
-  pred = make_prediction(results, property_type, num_amenities, num_emergencies, num_healthcares)
+  #validate on testing set
+  avg_err = validation_error(results, df_test)
+
+  counts = assess.count_pois_near([latitude], [longitude], poi_sets).iloc[0]
+
+  pred = make_prediction(results, property_type, counts.num_amenities, counts.num_emergencies, counts.num_healthcares)
+  return pred, avg_err
+
+def predict_price(conn, latitude, longitude, date, property_type, model_cache=None, profile=False):
+  if profile:
+    #return the profile of each stage of the prediction along with it
+    with profiling.profile() as prof:
+      pred = predict_price(conn, latitude, longitude, date, property_type, model_cache)
+    return pred, prof
+
+  if model_cache is not None:
+    #use the model of the tile and month holding the property, which is only fitted if it is not in the cache
+    res = predict_prices(conn, pd.DataFrame({"latitude": [latitude], "longitude": [longitude], "date": [date],
+                                             "property_type": [property_type]}), model_cache=model_cache)
+    pred, avg_err = res.prediction[0], res.validation_error[0]
+  else:
+    pred, avg_err = predict_single(conn, latitude, longitude, date, property_type)
   if avg_err > 0.3:
-    print("Warning: the prediction may have poor quality, having an average error of", 100 * avg_err, "% on the test set")
+    report("Warning: the prediction may have poor quality, having an average error of", 100 * avg_err, "% on the test set")
 
   return pred
+
+#features of the model built by design_matrix, and the error its validation_error reports, part of the key of
+#cached models so that models with other features, or validated with another error, are never reused
+model_features = "num_amenities,num_emergencies,num_healthcares,property_type;mape"
+
+def fit_tile_model(conn, latitude, longitude, earliest, latest, property_types, min_box_size=0):
+  """
+  Fit the model to the sales around latitude, longitude between earliest and latest
+  :return: dict of the fitted parameters, the validation error, the property types trained on and the locations
+           of the pois counted, which is all predict_prices needs to use the model again
+  """
+  df, box_size = fetch_training_set(conn, latitude, longitude, earliest, latest, property_types,
+                                    min_box_size=min_box_size)
+  poi_sets = get_poi_sets(latitude, longitude, box_size)
+  df = add_poi_counts(df, poi_sets)
+
+  df_train, df_test = split_train_test(df, property_types)
+  results = fit_model(df_train)
+  return {"params": np.asarray(results.params), "validation_error": validation_error(results, df_test),
+          "property_types": list(df_train.property_type.unique()),
+          "poi_points": {name: assess.poi_points(found) for name, found in poi_sets.items()}}
+
+def window_version(year_totals, earliest, latest):
+  """
+  Return the number of sales and total price of each year from earliest to latest, which changes whenever sales
+  in those years are added or removed, but not for changes to other years
+  :param year_totals: sales and total price in each year, as returned by assess.sales_totals_by_year
+  """
+  return [[year] + list(year_totals[year]) for year in sorted(year_totals) if earliest[:4] <= year <= latest[:4]]
+
+def predict_prices(conn, queries, tile_size=0.02, model_cache=None, profile=False):
+  """
+  Predict the prices of many properties at once. Queries in the same tile of tile_size degrees and the same
+  month share one training set, one set of poi fetches and one model fit, covering the date windows of the month.
+  Without a model_cache, a query alone in its tile and month is predicted on its own, as predict_price does
+  :param queries: DataFrame with latitude, longitude, date (as "YYYY-MM-DD") and property_type columns
+  :param model_cache: models.ModelCache to reuse models from, fitting and storing only those it does not hold
+  :param profile: also return a profiling.Profile of the stages of the predictions
+  :return: copy of queries with the prediction and the validation_error of the model it came from
+  """
+  if profile:
+    with profiling.profile() as prof:
+      res = predict_prices(conn, queries, tile_size, model_cache)
+    return res, prof
+
+  queries = queries.reset_index(drop=True).copy()
+  queries["prediction"] = np.nan
+  queries["validation_error"] = np.nan
+
+  #the sales in each year set the date windows, and the totals of the years a window covers tell whether the
+  #sales a model was fitted on have changed since
+  year_totals = assess.sales_totals_by_year(conn)
+  sales_data = {year: sales for year, (sales, _) in year_totals.items()}
+
+  tiles_y = np.floor(queries.latitude.values / tile_size)
+  tiles_x = np.floor(queries.longitude.values / tile_size)
+  months = queries.date.str[:7].values
+  for (tile_y, tile_x, month), group in queries.groupby([tiles_y, tiles_x, months]):
+    if model_cache is None and len(group) == 1:
+      #a model for the whole tile and month, with its wider box and dates, only costs more to fetch and fit when no
+      #other query shares it and it is not kept, so the query is predicted as predict_price would
+      query = group.iloc[0]
+      queries.loc[group.index, ["prediction", "validation_error"]] = predict_single(
+        conn, query.latitude, query.longitude, query.date, query.property_type, sales_data)
+      continue
+
+    latitude, longitude = (tile_y + 0.5) * tile_size, (tile_x + 0.5) * tile_size
+    property_types = list(group.property_type.unique())
+    earliest, latest = month_window(conn, month, sales_data)
+
+    entry = None
+    if model_cache is not None:
+      key = models.model_key(tile_size, tile_y, tile_x, earliest, latest, model_features)
+      data_version = window_version(year_totals, earliest, latest)
+      entry = model_cache.get(key, property_types, data_version)
+      profiling.record(model_cache_hits=int(entry is not None), model_cache_misses=int(entry is None))
+    if entry is None:
+      entry = fit_tile_model(conn, latitude, longitude, earliest, latest, property_types, min_box_size=tile_size)
+      if model_cache is not None:
+        entry = model_cache.put(key, entry, data_version)
+
+    points = add_poi_counts(pd.DataFrame({"lattitude": group.latitude.values, "longitude": group.longitude.values,
+                                          "property_type": group.property_type.values}), entry["poi_points"])
+    queries.loc[group.index, "prediction"] = design_matrix(points) @ entry["params"]
+    queries.loc[group.index, "validation_error"] = entry["validation_error"]
+
+  return queries
+
+#time every public function of this file as a stage when profiling, see profiling.py, apart from the progress helpers
+profiling.instrument_functions(globals(), exclude=("report", "quiet"))
@@ -1,21 +1,131 @@
 from .config import *
 
 from . import access
+from . import backends
+from . import pois
+from . import profiling
+from . import stats
 
 import osmnx as ox
 import matplotlib.pyplot as plt
 import pandas as pd
+import numpy as np
 import requests
+import json
+import time
+from scipy.spatial import cKDTree
 from io import StringIO
 
 """Place commands in this file to assess the data you have downloaded. How are missing values encoded, how are outliers encoded? What do columns represent, makes rure they are correctly labeled. How is the data indexed. Crete visualisation routines to assess the data (e.g. in bokeh). Ensure that date formats are correct and correctly timezoned."""
 
-def remove_price_outliers(conn, remove_below=0, remove_above=None):
+#rules run by clean_data, mapping a name to the table the rule deletes from and the sql condition,
+#with its parameters, selecting the rows to delete
+cleaning_rules = {}
+
+def cleaning_rule(name, table, condition, params=()):
+  """
+  Return a rule which clean_data can run without it being registered
+  """
+  return {"name": name, "table": table, "condition": condition, "params": tuple(params)}
+
+def register_cleaning_rule(name, table, condition, params=()):
+  cleaning_rules[name] = cleaning_rule(name, table, condition, params)
+
+register_cleaning_rule("missing_postcodes", "pp_data", "postcode=''")
+register_cleaning_rule("anomalous_lat_values", "postcode_data", "lattitude < 0.01")
+
+def create_cleaning_progress_table(conn):
+  backend = backends.backend_for(conn)
+  if backend.embedded:
+    backend.create_table(conn, "cleaning_progress", replace=False)
+    return
+
   cur = conn.cursor()
-  above_condition = (" OR price > " + str(remove_above)) if remove_above is not None else ""
-  cur.execute("DELETE FROM pp_data WHERE price < " + str(remove_below) + above_condition)
+  cur.execute("""CREATE TABLE IF NOT EXISTS `cleaning_progress` (
+                `rule` varchar(64) COLLATE utf8_bin NOT NULL,
+                `rule_definition` text COLLATE utf8_bin NOT NULL,
+                `last_db_id` bigint(20) unsigned NOT NULL,
+                `rows_deleted` bigint(20) unsigned NOT NULL,
+                PRIMARY KEY (`rule`)
+              ) DEFAULT CHARSET=utf8 COLLATE=utf8_bin""")
   conn.commit()
 
+def clean_data(conn, rules=None, batch_size=None, pause=None, dry_run=False, resume=True):
+  """
+  Run cleaning rules as a series of deletes over ranges of db_id, so no single statement holds its locks for long.
+  Progress is recorded in 'cleaning_progress' table, so an interrupted run carries on where it stopped, and a
+  later run only checks rows added since
+  :param rules: rules to run, each the name of a rule in cleaning_rules or a rule made by cleaning_rule, defaults to
+                all of the registered rules
+  :param batch_size: width of the range of db_id deleted from at a time, defaults to the cleaning_batch_size config value
+  :param pause: seconds to wait between batches, to let other queries through, defaults to the cleaning_pause config value
+  :param dry_run: only count the rows each rule would delete, without changing anything
+  :param resume: carry on from the recorded progress of each rule, rather than starting from the first row
+  :return: dict mapping each rule run to the number of rows it has deleted, including before any interruption,
+           or would delete on a dry run
+  """
+  rules = list(cleaning_rules) if rules is None else rules
+  batch_size = batch_size if batch_size is not None else config.get("cleaning_batch_size", 10000)
+  pause = pause if pause is not None else config.get("cleaning_pause", 0)
+  cur = conn.cursor()
+  if not dry_run:
+    create_cleaning_progress_table(conn)
+
+  res = {}
+  for rule in rules:
+    rule = cleaning_rules[rule] if isinstance(rule, str) else rule
+    name, table, condition, params = rule["name"], rule["table"], rule["condition"], tuple(rule["params"])
+
+    if dry_run:
+      cur.execute("SELECT COUNT(*) FROM `" + table + "` WHERE " + condition, params)
+      res[name] = cur.fetchall()[0][0]
+      print(name + ":", res[name], "rows would be deleted from", table)
+      continue
+
+    #progress only carries over if the rule has not changed since it was recorded
+    definition = json.dumps([table, condition, list(params)], default=str)
+    last_db_id, deleted = 0, 0
+    cur.execute("SELECT rule_definition, last_db_id, rows_deleted FROM cleaning_progress WHERE rule = %s", (name,))
+    progress = cur.fetchall()
+    if resume and progress and progress[0][0] == definition:
+      last_db_id, deleted = progress[0][1], progress[0][2]
+
+    cur.execute("SELECT COALESCE(MAX(db_id), 0) FROM `" + table + "`")
+    max_db_id = cur.fetchall()[0][0]
+
+    stale_years = set()
+    while last_db_id < max_db_id:
+      batch_condition = "(" + condition + ") AND db_id > %s AND db_id <= %s"
+      batch_params = params + (last_db_id, last_db_id + batch_size)
+      if table == "pp_data":
+        deleted += access.delete_from_pp_data(conn, batch_condition, batch_params, stale_years)
+      else:
+        deleted += cur.execute("DELETE FROM `" + table + "` WHERE " + batch_condition, batch_params)
+        access.mark_changed(conn, table)
+
+      last_db_id = min(last_db_id + batch_size, max_db_id)
+      cur.execute(backends.backend_for(conn).replace_into() + " cleaning_progress VALUES (%s, %s, %s, %s)",
+                  (name, definition, last_db_id, deleted))
+      conn.commit()
+      print(name + ":", deleted, "rows deleted from", table, "up to db_id", last_db_id, "of", max_db_id)
+      if pause > 0:
+        time.sleep(pause)
+
+    #the summaries of the years deleted from are pruned and their quantiles recomputed once, rather than every batch
+    if stale_years:
+      access.refresh_pp_data_summaries(conn, stale_years)
+    res[name] = deleted
+
+  return res
+
+def remove_price_outliers(conn, remove_below=0, remove_above=None, **kwargs):
+  #the thresholds differ between calls, so the rule is passed to clean_data rather than registered
+  if remove_above is None:
+    rule = cleaning_rule("price_outliers", "pp_data", "price < %s", (remove_below,))
+  else:
+    rule = cleaning_rule("price_outliers", "pp_data", "price < %s OR price > %s", (remove_below, remove_above))
+  return clean_data(conn, [rule], **kwargs)
+
 def sales_date_maxmin(conn):
   cur = conn.cursor()
   cur.execute("SELECT MIN(date_of_transfer), MAX(date_of_transfer) FROM pp_data")
@@ -23,122 +133,155 @@ def sales_date_maxmin(conn):
   res = cur.fetchall()[0]
   return res[0], res[1]
 
-def remove_missing_postcodes(conn):
-  cur = conn.cursor()
-  cur.execute("DELETE FROM pp_data WHERE postcode=''")
-  conn.commit()
+def remove_missing_postcodes(conn, **kwargs):
+  return clean_data(conn, ["missing_postcodes"], **kwargs)
 
-#returns min lat, max lat, min lon, max lon
+#returns min lat, max lat, min lon, max lon, from the statistics kept by stats.py
 def longlat_maxmin(conn):
-    cur = conn.cursor()
-    cur.execute("SELECT MIN(lattitude), MAX(lattitude), MIN(longitude), MAX(longitude) FROM postcode_data")
-    minlat, maxlat, minlon, maxlon = cur.fetchall()[0]
-    return minlat, maxlat, minlon, maxlon
+    lats = stats.column_stats(conn, "postcode_data", "lattitude")
+    lons = stats.column_stats(conn, "postcode_data", "longitude")
+    return lats["min"], lats["max"], lons["min"], lons["max"]
 
-def remove_anomalous_lat_values(conn):
-  cur = conn.cursor()
-  cur.execute("DELETE FROM postcode_data WHERE lattitude < 0.01")
-  conn.commit()
+def remove_anomalous_lat_values(conn, **kwargs):
+  return clean_data(conn, ["anomalous_lat_values"], **kwargs)
 
-def get_pois(lat, lon, box_size, tags):
-  north = lat + box_size/2
-  south = lat - box_size/2
-  west = lon - box_size/2
-  east = lon + box_size/2
+#pois are cached in tiles as fetching them can take a long time, see pois.POICache
+def get_pois(lat, lon, box_size, tags, cache=None):
+  if cache is None:
+    cache = pois.get_default_cache()
+  return cache.get_pois(lat, lon, box_size, tags)
 
-  pois = ox.geometries_from_bbox(north, south, east, west, tags)
-  return pois
+def num_of_pois_by_tag_type(lat, lon, box_size, tag, cache=None):
+  return len(get_pois(lat, lon, box_size, {tag: True}, cache))
 
-#cache results of num_of_pois_by_tag_type as it can take a long time to run
-num_pois_cache = {}
+def num_of_pois_by_tag_types(lat, lon, box_size, tags, cache=None):
+  return len(get_pois(lat, lon, box_size, tags, cache))
 
-def num_of_pois_by_tag_type(lat, lon, box_size, tag):
-  if ((lat,lon), tag) not in num_pois_cache:
-    num_pois_cache[((lat, lon), tag)] = len(get_pois(lat, lon, box_size, {tag: True}))
-  
-  return num_pois_cache[((lat, lon), tag)]
+def num_of_pois_by_tag_type_for_points(lats, lons, box_size, tags, scheduler=None):
+  """
+  Count the pois with each of tags within the box around every point, fetching everything missing from the cache
+  at once through a pois.FetchScheduler, which defaults to the one over the default cache
+  :return: DataFrame with a num_<tag> column for each tag
+  """
+  if scheduler is None:
+    scheduler = pois.get_default_scheduler()
+  boxes = [(lat, lon, box_size, {tag: True}) for tag in tags for lat, lon in zip(lats, lons)]
+  counts = [len(res) for res in scheduler.get_pois(boxes)]
+  return pd.DataFrame({"num_" + tag: counts[i * len(lats):(i + 1) * len(lats)] for i, tag in enumerate(tags)})
 
-def num_of_pois_by_tag_types(lat, lon, box_size, tags):
-  return len(get_pois(lat, lon, box_size, tags))
+def poi_points(pois):
+  """
+  Return the longitude and latitude of the representative point of each poi, as an array with a row per poi
+  """
+  if len(pois) == 0:
+    return np.empty((0, 2))
+  representative = pois.geometry.representative_point()
+  return np.column_stack((representative.x.values, representative.y.values))
 
-#scale to between 0 and 1
-def scaled_lats(conn, lats):
-  cur = conn.cursor()
-  cur.execute("SELECT MIN(lattitude), MAX(lattitude) FROM postcode_data")
-  minlat, maxlat = cur.fetchall()[0]
+def count_pois_near(lats, lons, poi_sets, radii=(0.02,)):
+  """
+  Count the pois of each set within each radius of every point, using one KD-tree per set of pois.
+  Distances are measured in degrees to the representative point of each poi
+  :param lats: latitudes of the points
+  :param lons: longitudes of the points
+  :param poi_sets: dict mapping a name to a GeoDataFrame of pois, or to an array of the longitude and latitude of
+                   the representative point of each poi, as returned by poi_points
+  :param radii: distances within which to count
+  :return: DataFrame with a num_<name> column for each set, or num_<name>_<radius> columns if several radii are given
+  """
+  points = np.column_stack((np.asarray(lons, dtype=float), np.asarray(lats, dtype=float)))
+  counts = {}
+  for name, pois in poi_sets.items():
+    coordinates = pois if isinstance(pois, np.ndarray) else poi_points(pois)
+    tree = cKDTree(coordinates) if len(coordinates) > 0 else None
 
-  scaled_lats = [(lat - float(minlat)) / float(maxlat - minlat) for lat in lats]
+    for radius in radii:
+      column = "num_" + name if len(radii) == 1 else "num_" + name + "_" + str(radius)
+      if tree is None or len(points) == 0:
+        counts[column] = np.zeros(len(points), dtype=int)
+      else:
+        counts[column] = tree.query_ball_point(points, radius, return_length=True)
 
-  return scaled_lats
+  return pd.DataFrame(counts)
 
-#scale to between 0 and 1
-def scaled_lons(conn, lons):
-  cur = conn.cursor()
-  cur.execute("SELECT MIN(longitude), MAX(longitude) FROM postcode_data")
-  minlon, maxlon = cur.fetchall()[0]
+#scale to between 0 and 1, using the bounds of postcode_data kept by stats.py
+def scaled_lats(conn, lats):
+  return stats.min_max_scale(conn, "postcode_data", "lattitude", lats)
 
-  scaled_lons = [(lon - float(minlon)) / float(maxlon - minlon) for lon in lons]
+#scale to between 0 and 1, using the bounds of postcode_data kept by stats.py
+def scaled_lons(conn, lons):
+  return stats.min_max_scale(conn, "postcode_data", "longitude", lons)
 
-  return scaled_lons
 
+def ensure_pp_data_summaries(conn):
+    if not access.has_pp_data_summaries(conn):
+        access.create_pp_data_summary_tables(conn)
 
 def sales_over_time(conn, use_precomputed_result=True):
-    if use_precomputed_result:
-        return {"1995":	796752,
-                "1996":	964931,
-                "1997":	1094034,
-                "1998":	1050098,
-                "1999":	1194438,
-                "2000":	1128901,
-                "2001":	1245388,
-                "2002":	1351270,
-                "2003":	1235010,
-                "2004":	1231502,
-                "2005":	1061047,
-                "2006":	1325642,
-                "2007":	1271929,
-                "2008":	649408,
-                "2009":	625099,
-                "2010":	663121,
-                "2011":	661010,
-                "2012":	668633,
-                "2013":	810717,
-                "2014":	984393,
-                "2015":	1010118,
-                "2016":	1044892,
-                "2017":	1064787,
-                "2018":	1033465,
-                "2019":	1001767,
-                "2020":	818573,
-                "2021":	554279}
-
+    """
+    Return the number of sales in each year of pp_data, keyed by the year as a string. By default the counts
+    are read from the summary tables kept by access, otherwise they are counted from pp_data
+    """
     cur = conn.cursor()
-    cur.execute("SELECT YEAR(date_of_transfer), COUNT(*) FROM pp_data GROUP BY YEAR(date_of_transfer)")
+    if use_precomputed_result:
+        ensure_pp_data_summaries(conn)
+        cur.execute("SELECT year, sales FROM pp_data_year_summary")
+    else:
+        year = backends.backend_for(conn).year("date_of_transfer")
+        cur.execute("SELECT " + year + ", COUNT(*) FROM pp_data GROUP BY " + year)
     rows = cur.fetchall()
     res = {}
     for year, count in rows:
-        res[year] = count
+        res[str(year)] = int(count)
     return res
 
-def postcode_district_sales(conn, use_precomputed_values=True):
-    district_data = []
-    
-    if not use_precomputed_values:
-        cur = conn.cursor()
-        cur.execute("SELECT DISTINCT postcode_district FROM postcode_data")
-        postcode_districts = cur.fetchall()
-
-        sql_query = pd.read_sql_query('SELECT * FROM pp_data LIMIT 1000000', conn)
-        df = pd.DataFrame(sql_query)
-        counts = {}
-        for district in postcode_districts:
-          counts[district] = len(df[df.postcode.str.startswith(district)])
-
-        district_data = [[district[0], counts[district]] for district in postcode_districts]
+def sales_totals_by_year(conn):
+    """
+    Return the number of sales and their total price in each year of pp_data, as a tuple keyed by the year as a
+    string, read from the summary tables kept by access
+    """
+    ensure_pp_data_summaries(conn)
+    cur = conn.cursor()
+    cur.execute("SELECT year, sales, total_price FROM pp_data_year_summary")
+    return {str(year): (int(sales), int(total_price)) for year, sales, total_price in cur.fetchall()}
+
+def price_quantiles(conn):
+    """
+    Return the quantiles of price by year and property type, from the summary tables kept by access
+    """
+    ensure_pp_data_summaries(conn)
+    return access.read_typed(conn, "SELECT year, property_type, quantile, price FROM pp_data_price_quantiles",
+                             dtypes={"price": "float64"})
+
+def postcode_district_counts(conn, use_precomputed_values=True):
+    """
+    Return a list of [district, number of sales] for every postcode district, including those with no sales. By
+    default counts come from the summary tables kept by access, otherwise pp_data is counted with a single grouped
+    query on the outcode of each sale's postcode
+    """
+    cur = conn.cursor()
+    if use_precomputed_values:
+        ensure_pp_data_summaries(conn)
+        cur.execute("""SELECT d.postcode_district, COALESCE(SUM(s.sales), 0) FROM
+                       (SELECT DISTINCT postcode_district FROM postcode_data) d
+                       LEFT JOIN pp_data_summary s ON (d.postcode_district = s.postcode_district)
+                       GROUP BY d.postcode_district""")
     else:
-        district_data = [['AB1', 0], ['AB10', 0], ['AB11', 0], ['AB12', 0], ['AB13', 0], ['AB14', 0], ['AB15', 0], ['AB16', 0], ['AB2', 0], ['AB21', 0], ['AB22', 0], ['AB23', 0], ['AB24', 0], ['AB25', 0], ['AB3', 0], ['AB30', 0], ['AB31', 0], ['AB32', 0], ['AB33', 0], ['AB34', 0], ['AB35', 0], ['AB36', 0], ['AB37', 0], ['AB38', 0], ['AB39', 0], ['AB4', 0], ['AB41', 0], ['AB42', 0], ['AB43', 0], ['AB44', 0], ['AB45', 0], ['AB5', 0], ['AB51', 0], ['AB52', 0], ['AB53', 0], ['AB54', 0], ['AB55', 0], ['AB56', 0], ['AB9', 0], ['AB99', 0], ['AL1', 1310], ['AL10', 455], ['AL2', 467], ['AL3', 568], ['AL4', 459], ['AL5', 743], ['AL6', 214], ['AL7', 521], ['AL8', 276], ['AL9', 198], ['B1', 3190], ['B10', 227], ['B11', 479], ['B12', 151], ['B13', 546], ['B14', 615], ['B15', 177], ['B16', 216], ['B17', 541], ['B18', 90], ['B19', 100], ['B2', 4079], ['B20', 372], ['B21', 331], ['B22', 0], ['B23', 635], ['B24', 427], ['B25', 206], ['B26', 502], ['B27', 441], ['B28', 524], ['B29', 641], ['B3', 3386], ['B30', 523], ['B31', 709], ['B32', 416], ['B33', 369], ['B34', 200], ['B35', 70], ['B36', 403], ['B37', 430], ['B38', 250], ['B4', 2341], ['B40', 0], ['B42', 403], ['B43', 360], ['B44', 440], ['B45', 461], ['B46', 239], ['B47', 154], ['B48', 90], ['B49', 193], ['B5', 218], ['B50', 124], ['B6', 4057], ['B60', 512], ['B61', 478], ['B62', 379], ['B63', 577], ['B64', 177], ['B65', 300], ['B66', 214], ['B67', 437], ['B68', 388], ['B69', 388], ['B7', 4655], ['B70', 265], ['B71', 353], ['B72', 195], ['B73', 426], ['B74', 565], ['B75', 348], ['B76', 568], ['B77', 1154], ['B78', 412], ['B79', 350], ['B8', 574], ['B80', 145], ['B9', 4813], ['B90', 810], ['B91', 802], ['B92', 650], ['B93', 469], ['B94', 151], ['B95', 161], ['B96', 91], ['B97', 608], ['B98', 790], ['B99', 0], ['BA1', 4043], ['BA10', 62], ['BA11', 640], ['BA12', 584], ['BA13', 405], ['BA14', 925], ['BA15', 298], ['BA16', 275], ['BA2', 2463], ['BA20', 258], ['BA21', 662], ['BA22', 279], ['BA3', 601], ['BA4', 266], ['BA5', 436], ['BA6', 247], ['BA7', 86], ['BA8', 99], ['BA9', 147], ['BB0', 0], ['BB1', 3571], ['BB10', 778], ['BB11', 574], ['BB12', 777], ['BB18', 310], ['BB2', 1192], ['BB3', 799], ['BB4', 638], ['BB5', 1319], ['BB6', 334], ['BB7', 702], ['BB8', 370], ['BB9', 933], ['BB94', 0], ['BD1', 3670], ['BD10', 459], ['BD11', 210], ['BD12', 340], ['BD13', 513], ['BD14', 149], ['BD15', 300], ['BD16', 485], ['BD17', 282], ['BD18', 468], ['BD19', 441], ['BD2', 2925], ['BD20', 713], ['BD21', 475], ['BD22', 486], ['BD23', 618], ['BD24', 91], ['BD3', 501], ['BD4', 388], ['BD5', 386], ['BD6', 410], ['BD7', 604], ['BD8', 505], ['BD9', 423], ['BD97', 0], ['BD98', 0], ['BD99', 0], ['BH1', 5291], ['BH10', 397], ['BH11', 301], ['BH12', 762], ['BH13', 344], ['BH14', 687], ['BH15', 665], ['BH16', 301], ['BH17', 629], ['BH18', 305], ['BH19', 294], ['BH2', 4707], ['BH20', 278], ['BH21', 872], ['BH22', 648], ['BH23', 1378], ['BH24', 532], ['BH25', 739], ['BH3', 485], ['BH31', 362], ['BH4', 385], ['BH5', 315], ['BH6', 526], ['BH7', 266], ['BH8', 581], ['BH9', 698], ['BL0', 373], ['BL1', 1057], ['BL11', 0], ['BL2', 750], ['BL3', 926], ['BL4', 446], ['BL5', 508], ['BL6', 568], ['BL7', 301], ['BL78', 0], ['BL8', 709], ['BL9', 941], ['BN1', 7980], ['BN10', 432], ['BN11', 987], ['BN12', 566], ['BN13', 676], ['BN14', 818], ['BN15', 634], ['BN16', 829], ['BN17', 715], ['BN18', 312], ['BN2', 6250], ['BN20', 570], ['BN21', 702], ['BN22', 650], ['BN23', 569], ['BN24', 212], ['BN25', 669], ['BN26', 265], ['BN27', 659], ['BN3', 2290], ['BN4', 1463], ['BN41', 506], ['BN42', 181], ['BN43', 522], ['BN44', 242], ['BN45', 12], ['BN5', 139], ['BN50', 0], ['BN51', 0], ['BN52', 0], ['BN6', 393], ['BN7', 414], ['BN8', 210], ['BN88', 0], ['BN9', 255], ['BN95', 0], ['BN99', 0], ['BR1', 1136], ['BR2', 1012], ['BR3', 1140], ['BR4', 318], ['BR5', 888], ['BR6', 951], ['BR7', 369], ['BR8', 315], ['BS0', 0], ['BS1', 2947], ['BS10', 288], ['BS11', 159], ['BS12', 0], ['BS13', 256], ['BS14', 391], ['BS15', 758], ['BS16', 978], ['BS17', 0], ['BS18', 0], ['BS19', 0], ['BS2', 3684], ['BS20', 498], ['BS21', 566], ['BS22', 1012], ['BS23', 746], ['BS24', 269], ['BS25', 89], ['BS26', 101], ['BS27', 146], ['BS28', 58], ['BS29', 53], ['BS3', 4971], ['BS30', 669], ['BS31', 367], ['BS32', 966], ['BS34', 474], ['BS35', 396], ['BS36', 197], ['BS37', 960], ['BS39', 278], ['BS4', 1745], ['BS40', 205], ['BS41', 70], ['BS48', 468], ['BS49', 271], ['BS5', 909], ['BS6', 752], ['BS7', 612], ['BS77', 0], ['BS8', 679], ['BS80', 0], ['BS9', 519], ['BS98', 0], ['BS99', 0], ['CA1', 2456], ['CA10', 185], ['CA11', 481], ['CA12', 209], ['CA13', 319], ['CA14', 503], ['CA15', 233], ['CA16', 84], ['CA17', 61], ['CA18', 3], ['CA19', 20], ['CA2', 1509], ['CA20', 54], ['CA21', 18], ['CA22', 128], ['CA23', 24], ['CA24', 22], ['CA25', 73], ['CA26', 64], ['CA27', 37], ['CA28', 411], ['CA3', 405], ['CA4', 151], ['CA5', 97], ['CA6', 103], ['CA7', 359], ['CA8', 147], ['CA9', 31], ['CA95', 0], ['CA99', 0], ['CB1', 1738], ['CB10', 269], ['CB11', 373], ['CB2', 2218], ['CB21', 280], ['CB22', 417], ['CB23', 405], ['CB24', 617], ['CB25', 339], ['CB3', 178], ['CB4', 603], ['CB5', 152], ['CB6', 654], ['CB7', 530], ['CB8', 644], ['CB9', 564], ['CF1', 2187], ['CF10', 150], ['CF11', 628], ['CF14', 1148], ['CF15', 260], ['CF2', 1774], ['CF23', 861], ['CF24', 909], ['CF3', 3925], ['CF30', 0], ['CF31', 671], ['CF32', 432], ['CF33', 191], ['CF34', 293], ['CF35', 158], ['CF36', 276], ['CF37', 569], ['CF38', 477], ['CF39', 319], ['CF4', 2102], ['CF40', 251], ['CF41', 117], ['CF42', 148], ['CF43', 160], ['CF44', 406], ['CF45', 238], ['CF46', 215], ['CF47', 268], ['CF48', 297], ['CF5', 1059], ['CF6', 1781], ['CF61', 214], ['CF62', 660], ['CF63', 317], ['CF64', 590], ['CF7', 572], ['CF71', 133], ['CF72', 439], ['CF8', 1258], ['CF81', 164], ['CF82', 190], ['CF83', 903], ['CF91', 0], ['CF95', 0], ['CF99', 0], ['CH1', 401], ['CH2', 768], ['CH25', 0], ['CH26', 0], ['CH27', 0], ['CH28', 0], ['CH29', 0], ['CH3', 604], ['CH30', 0], ['CH31', 0], ['CH32', 0], ['CH33', 0], ['CH34', 0], ['CH4', 4479], ['CH41', 321], ['CH42', 513], ['CH43', 555], ['CH44', 457], ['CH45', 617], ['CH46', 410], ['CH47', 198], ['CH48', 332], ['CH49', 457], ['CH5', 652], ['CH6', 3021], ['CH60', 255], ['CH61', 323], ['CH62', 449], ['CH63', 471], ['CH64', 339], ['CH65', 317], ['CH66', 637], ['CH7', 750], ['CH70', 0], ['CH8', 258], ['CH88', 0], ['CH99', 0], ['CM0', 381], ['CM1', 5192], ['CM11', 336], ['CM12', 555], ['CM13', 477], ['CM14', 474], ['CM15', 486], ['CM16', 488], ['CM17', 582], ['CM18', 306], ['CM19', 348], ['CM2', 3359], ['CM20', 221], ['CM21', 342], ['CM22', 258], ['CM23', 1153], ['CM24', 133], ['CM3', 1067], ['CM4', 189], ['CM5', 168], ['CM6', 441], ['CM7', 1157], ['CM77', 347], ['CM8', 560], ['CM9', 838], ['CM92', 0], ['CM98', 0], ['CM99', 0], ['CO1', 4475], ['CO10', 923], ['CO11', 335], ['CO12', 456], ['CO13', 358], ['CO14', 133], ['CO15', 1298], ['CO16', 590], ['CO2', 479], ['CO3', 694], ['CO4', 773], ['CO5', 541], ['CO6', 549], ['CO7', 663], ['CO8', 41], ['CO9', 536], ['CR0', 3028], ['CR2', 1074], ['CR3', 555], ['CR4', 1133], ['CR44', 0], ['CR5', 483], ['CR6', 195], ['CR7', 964], ['CR8', 622], ['CR9', 1], ['CR90', 0], ['CT1', 4354], ['CT10', 590], ['CT11', 525], ['CT12', 261], ['CT13', 172], ['CT14', 678], ['CT15', 221], ['CT16', 312], ['CT17', 353], ['CT18', 233], ['CT19', 548], ['CT2', 1335], ['CT20', 491], ['CT21', 431], ['CT3', 241], ['CT4', 267], ['CT5', 696], ['CT50', 0], ['CT6', 801], ['CT7', 239], ['CT8', 123], ['CT9', 709], ['CV1', 2501], ['CV10', 731], ['CV11', 804], ['CV12', 478], ['CV13', 177], ['CV2', 2502], ['CV21', 730], ['CV22', 500], ['CV23', 339], ['CV3', 4253], ['CV31', 613], ['CV32', 668], ['CV33', 79], ['CV34', 604], ['CV35', 397], ['CV36', 178], ['CV37', 737], ['CV4', 776], ['CV47', 360], ['CV5', 997], ['CV6', 1212], ['CV7', 436], ['CV8', 701], ['CV9', 276], ['CW1', 1891], ['CW10', 315], ['CW11', 536], ['CW12', 443], ['CW2', 756], ['CW3', 169], ['CW4', 177], ['CW5', 427], ['CW6', 231], ['CW7', 504], ['CW8', 610], ['CW9', 489], ['CW98', 0], ['DA1', 4919], ['DA10', 79], ['DA11', 588], ['DA12', 753], ['DA13', 268], ['DA14', 457], ['DA15', 655], ['DA16', 635], ['DA17', 516], ['DA18', 38], ['DA2', 308], ['DA3', 344], ['DA4', 197], ['DA5', 366], ['DA6', 201], ['DA7', 753], ['DA8', 724], ['DA9', 265], ['DD1', 0], ['DD10', 0], ['DD11', 0], ['DD2', 0], ['DD3', 0], ['DD4', 0], ['DD5', 0], ['DD6', 0], ['DD7', 0], ['DD8', 0], ['DD9', 0], ['DE1', 2868], ['DE11', 626], ['DE12', 366], ['DE13', 641], ['DE14', 614], ['DE15', 402], ['DE2', 3694], ['DE21', 1000], ['DE22', 812], ['DE23', 1003], ['DE24', 879], ['DE3', 255], ['DE4', 714], ['DE45', 150], ['DE5', 2088], ['DE55', 892], ['DE56', 820], ['DE6', 834], ['DE65', 416], ['DE7', 2111], ['DE72', 390], ['DE73', 308], ['DE74', 211], ['DE75', 317], ['DE99', 0], ['DG1', 0], ['DG10', 0], ['DG11', 0], ['DG12', 0], ['DG13', 0], ['DG14', 0], ['DG16', 0], ['DG2', 0], ['DG3', 0], ['DG4', 0], ['DG5', 0], ['DG6', 0], ['DG7', 0], ['DG8', 0], ['DG9', 0], ['DH1', 698], ['DH2', 736], ['DH3', 515], ['DH4', 480], ['DH5', 322], ['DH6', 469], ['DH7', 597], ['DH8', 543], ['DH9', 492], ['DH97', 0], ['DH98', 0], ['DH99', 0], ['DL1', 3089], ['DL10', 303], ['DL11', 68], ['DL12', 177], ['DL13', 193], ['DL14', 733], ['DL15', 283], ['DL16', 303], ['DL17', 304], ['DL2', 254], ['DL3', 999], ['DL4', 153], ['DL5', 463], ['DL6', 224], ['DL7', 310], ['DL8', 346], ['DL9', 71], ['DL98', 0], ['DN1', 3533], ['DN10', 220], ['DN11', 413], ['DN12', 351], ['DN14', 674], ['DN15', 564], ['DN16', 405], ['DN17', 454], ['DN18', 158], ['DN19', 138], ['DN2', 1756], ['DN20', 349], ['DN21', 561], ['DN22', 562], ['DN3', 3591], ['DN31', 234], ['DN32', 584], ['DN33', 204], ['DN34', 339], ['DN35', 880], ['DN36', 343], ['DN37', 339], ['DN38', 33], ['DN39', 48], ['DN4', 1135], ['DN40', 186], ['DN41', 116], ['DN5', 661], ['DN55', 0], ['DN6', 364], ['DN7', 287], ['DN8', 172], ['DN9', 334], ['DT1', 1137], ['DT10', 241], ['DT11', 526], ['DT2', 463], ['DT3', 521], ['DT4', 801], ['DT5', 274], ['DT6', 452], ['DT7', 147], ['DT8', 128], ['DT9', 381], ['DY1', 2104], ['DY10', 656], ['DY11', 397], ['DY12', 217], ['DY13', 377], ['DY14', 112], ['DY2', 335], ['DY3', 393], ['DY4', 683], ['DY5', 690], ['DY6', 471], ['DY7', 122], ['DY8', 1017], ['DY9', 459], ['E1', 9126], ['E10', 799], ['E11', 1197], ['E12', 693], ['E13', 785], ['E14', 941], ['E15', 757], ['E16', 371], ['E17', 2215], ['E18', 475], ['E1W', 305], ['E2', 417], ['E20', 0], ['E3', 783], ['E4', 1151], ['E5', 480], ['E6', 1509], ['E7', 1021], ['E77', 0], ['E8', 365], ['E9', 398], ['E98', 0], ['EC1A', 37], ['EC1M', 34], ['EC1N', 4], ['EC1P', 0], ['EC1R', 66], ['EC1V', 62], ['EC1Y', 27], ['EC2A', 24], ['EC2M', 0], ['EC2N', 0], ['EC2P', 0], ['EC2R', 0], ['EC2V', 0], ['EC2Y', 158], ['EC3A', 2], ['EC3B', 0], ['EC3M', 0], ['EC3N', 0], ['EC3P', 0], ['EC3R', 0], ['EC3V', 0], ['EC4A', 11], ['EC4M', 1], ['EC4N', 1], ['EC4P', 0], ['EC4R', 1], ['EC4V', 4], ['EC4Y', 1], ['EC50', 0], ['EC88', 0], ['EH1', 0], ['EH10', 0], ['EH11', 0], ['EH12', 0], ['EH13', 0], ['EH14', 0], ['EH15', 0], ['EH16', 0], ['EH17', 0], ['EH18', 0], ['EH19', 0], ['EH2', 0], ['EH20', 0], ['EH21', 0], ['EH22', 0], ['EH23', 0], ['EH24', 0], ['EH25', 0], ['EH26', 0], ['EH27', 0], ['EH28', 0], ['EH29', 0], ['EH3', 0], ['EH30', 0], ['EH31', 0], ['EH32', 0], ['EH33', 0], ['EH34', 0], ['EH35', 0], ['EH36', 0], ['EH37', 0], ['EH38', 0], ['EH39', 0], ['EH4', 0], ['EH40', 0], ['EH41', 0], ['EH42', 0], ['EH43', 0], ['EH44', 0], ['EH45', 0], ['EH46', 0], ['EH47', 0], ['EH48', 0], ['EH49', 0], ['EH5', 0], ['EH51', 0], ['EH52', 0], ['EH53', 0], ['EH54', 0], ['EH55', 0], ['EH6', 0], ['EH7', 0], ['EH8', 0], ['EH9', 0], ['EH91', 0], ['EH95', 0], ['EH99', 0], ['EN1', 1788], ['EN10', 281], ['EN11', 354], ['EN2', 734], ['EN3', 1156], ['EN4', 551], ['EN5', 796], ['EN6', 546], ['EN7', 366], ['EN8', 744], ['EN9', 453], ['EX1', 3328], ['EX10', 459], ['EX11', 134], ['EX12', 216], ['EX13', 214], ['EX14', 518], ['EX15', 419], ['EX16', 517], ['EX17', 300], ['EX18', 54], ['EX19', 66], ['EX2', 1681], ['EX20', 372], ['EX21', 56], ['EX22', 125], ['EX23', 322], ['EX24', 57], ['EX3', 2784], ['EX31', 536], ['EX32', 423], ['EX33', 255], ['EX34', 362], ['EX35', 44], ['EX36', 120], ['EX37', 50], ['EX38', 160], ['EX39', 710], ['EX4', 873], ['EX5', 280], ['EX6', 287], ['EX7', 305], ['EX8', 794], ['EX9', 154], ['FK1', 0], ['FK10', 0], ['FK11', 0], ['FK12', 0], ['FK13', 0], ['FK14', 0], ['FK15', 0], ['FK16', 0], ['FK17', 0], ['FK18', 0], ['FK19', 0], ['FK2', 0], ['FK20', 0], ['FK21', 0], ['FK3', 0], ['FK4', 0], ['FK5', 0], ['FK6', 0], ['FK7', 0], ['FK8', 0], ['FK9', 0], ['FY0', 0], ['FY1', 789], ['FY2', 528], ['FY3', 607], ['FY4', 887], ['FY5', 1123], ['FY6', 589], ['FY7', 439], ['FY8', 855], ['G1', 0], ['G11', 0], ['G12', 0], ['G13', 0], ['G14', 0], ['G15', 0], ['G2', 0], ['G20', 0], ['G21', 0], ['G22', 0], ['G23', 0], ['G3', 0], ['G31', 0], ['G32', 0], ['G33', 0], ['G34', 0], ['G4', 0], ['G40', 0], ['G41', 0], ['G42', 0], ['G43', 0], ['G44', 0], ['G45', 0], ['G46', 0], ['G5', 0], ['G51', 0], ['G52', 0], ['G53', 0], ['G58', 0], ['G60', 0], ['G61', 0], ['G62', 0], ['G63', 0], ['G64', 0], ['G65', 0], ['G66', 0], ['G67', 0], ['G68', 0], ['G69', 0], ['G70', 0], ['G71', 0], ['G72', 0], ['G73', 0], ['G74', 0], ['G75', 0], ['G76', 0], ['G77', 0], ['G78', 0], ['G79', 0], ['G80', 0], ['G81', 0], ['G82', 0], ['G83', 0], ['G84', 0], ['G9', 0], ['G90', 0], ['GL1', 2750], ['GL10', 178], ['GL11', 292], ['GL12', 282], ['GL13', 87], ['GL14', 298], ['GL15', 335], ['GL16', 249], ['GL17', 206], ['GL18', 138], ['GL19', 120], ['GL2', 1427], ['GL20', 469], ['GL3', 536], ['GL4', 786], ['GL5', 4438], ['GL50', 575], ['GL51', 1029], ['GL52', 1006], ['GL53', 447], ['GL54', 438], ['GL55', 131], ['GL56', 222], ['GL6', 519], ['GL7', 871], ['GL8', 170], ['GL9', 39], ['GU1', 5212], ['GU10', 410], ['GU11', 374], ['GU12', 675], ['GU13', 4], ['GU14', 1213], ['GU15', 643], ['GU16', 493], ['GU17', 245], ['GU18', 204], ['GU19', 262], ['GU2', 3957], ['GU20', 96], ['GU21', 1099], ['GU22', 739], ['GU23', 109], ['GU24', 292], ['GU25', 135], ['GU26', 190], ['GU27', 383], ['GU28', 81], ['GU29', 194], ['GU3', 2120], ['GU30', 167], ['GU31', 225], ['GU32', 242], ['GU33', 187], ['GU34', 604], ['GU35', 507], ['GU4', 1274], ['GU46', 380], ['GU47', 498], ['GU5', 1025], ['GU51', 473], ['GU52', 387], ['GU6', 279], ['GU7', 529], ['GU8', 295], ['GU9', 747], ['GU95', 0], ['HA0', 798], ['HA1', 706], ['HA2', 896], ['HA3', 953], ['HA4', 980], ['HA5', 834], ['HA6', 413], ['HA7', 523], ['HA8', 936], ['HA9', 688], ['HD1', 333], ['HD2', 443], ['HD3', 501], ['HD4', 502], ['HD5', 501], ['HD6', 491], ['HD7', 458], ['HD8', 560], ['HD9', 620], ['HG1', 736], ['HG2', 737], ['HG3', 475], ['HG4', 429], ['HG5', 363], ['HP1', 4187], ['HP10', 394], ['HP11', 292], ['HP12', 385], ['HP13', 821], ['HP14', 317], ['HP15', 363], ['HP16', 213], ['HP17', 196], ['HP18', 253], ['HP19', 429], ['HP2', 2951], ['HP20', 307], ['HP21', 792], ['HP22', 475], ['HP23', 409], ['HP27', 228], ['HP3', 481], ['HP4', 545], ['HP5', 478], ['HP6', 349], ['HP7', 183], ['HP8', 141], ['HP9', 342], ['HR1', 584], ['HR2', 572], ['HR3', 96], ['HR4', 567], ['HR5', 50], ['HR6', 346], ['HR7', 120], ['HR8', 241], ['HR9', 350], ['HS1', 0], ['HS2', 0], ['HS3', 0], ['HS4', 0], ['HS5', 0], ['HS6', 0], ['HS7', 0], ['HS8', 0], ['HS9', 0], ['HU1', 3964], ['HU10', 422], ['HU11', 192], ['HU12', 489], ['HU13', 314], ['HU14', 188], ['HU15', 493], ['HU16', 337], ['HU17', 1172], ['HU18', 192], ['HU19', 122], ['HU2', 42], ['HU20', 24], ['HU3', 600], ['HU4', 433], ['HU5', 1126], ['HU6', 333], ['HU7', 507], ['HU8', 668], ['HU9', 682], ['HX1', 506], ['HX2', 534], ['HX3', 821], ['HX4', 274], ['HX5', 207], ['HX6', 392], ['HX7', 306], ['IG1', 2601], ['IG10', 677], ['IG11', 607], ['IG2', 421], ['IG3', 675], ['IG4', 150], ['IG5', 262], ['IG6', 486], ['IG7', 316], ['IG8', 726], ['IG9', 336], ['IP1', 3528], ['IP10', 42], ['IP11', 650], ['IP12', 431], ['IP13', 322], ['IP14', 709], ['IP15', 110], ['IP16', 119], ['IP17', 198], ['IP18', 141], ['IP19', 193], ['IP2', 3333], ['IP20', 145], ['IP21', 190], ['IP22', 494], ['IP23', 124], ['IP24', 491], ['IP25', 316], ['IP26', 135], ['IP27', 374], ['IP28', 489], ['IP29', 152], ['IP3', 2082], ['IP30', 284], ['IP31', 359], ['IP32', 356], ['IP33', 538], ['IP4', 936], ['IP5', 458], ['IP6', 318], ['IP7', 234], ['IP8', 185], ['IP9', 280], ['IP98', 0], ['IV1', 0], ['IV10', 0], ['IV11', 0], ['IV12', 0], ['IV13', 0], ['IV14', 0], ['IV15', 0], ['IV16', 0], ['IV17', 0], ['IV18', 0], ['IV19', 0], ['IV2', 0], ['IV20', 0], ['IV21', 0], ['IV22', 0], ['IV23', 0], ['IV24', 0], ['IV25', 0], ['IV26', 0], ['IV27', 0], ['IV28', 0], ['IV3', 0], ['IV30', 0], ['IV31', 0], ['IV32', 0], ['IV33', 0], ['IV34', 0], ['IV35', 0], ['IV36', 0], ['IV4', 0], ['IV40', 0], ['IV41', 0], ['IV42', 0], ['IV43', 0], ['IV44', 0], ['IV45', 0], ['IV46', 0], ['IV47', 0], ['IV48', 0], ['IV49', 0], ['IV5', 0], ['IV51', 0], ['IV52', 0], ['IV53', 0], ['IV54', 0], ['IV55', 0], ['IV56', 0], ['IV6', 0], ['IV63', 0], ['IV7', 0], ['IV8', 0], ['IV9', 0], ['IV99', 0], ['KA1', 0], ['KA10', 0], ['KA11', 0], ['KA12', 0], ['KA13', 0], ['KA14', 0], ['KA15', 0], ['KA16', 0], ['KA17', 0], ['KA18', 0], ['KA19', 0], ['KA2', 0], ['KA20', 0], ['KA21', 0], ['KA22', 0], ['KA23', 0], ['KA24', 0], ['KA25', 0], ['KA26', 0], ['KA27', 0], ['KA28', 0], ['KA29', 0], ['KA3', 0], ['KA30', 0], ['KA4', 0], ['KA5', 0], ['KA6', 0], ['KA7', 0], ['KA8', 0], ['KA9', 0], ['KT1', 5232], ['KT10', 405], ['KT11', 322], ['KT12', 771], ['KT13', 614], ['KT14', 301], ['KT15', 583], ['KT16', 371], ['KT17', 527], ['KT18', 323], ['KT19', 518], ['KT2', 2305], ['KT20', 384], ['KT21', 264], ['KT22', 519], ['KT23', 201], ['KT24', 158], ['KT3', 742], ['KT4', 635], ['KT5', 417], ['KT6', 836], ['KT7', 220], ['KT8', 497], ['KT9', 534], ['KW1', 0], ['KW10', 0], ['KW11', 0], ['KW12', 0], ['KW13', 0], ['KW14', 0], ['KW15', 0], ['KW16', 0], ['KW17', 0], ['KW2', 0], ['KW3', 0], ['KW5', 0], ['KW6', 0], ['KW7', 0], ['KW8', 0], ['KW9', 0], ['KY1', 0], ['KY10', 0], ['KY11', 0], ['KY12', 0], ['KY13', 0], ['KY14', 0], ['KY15', 0], ['KY16', 0], ['KY2', 0], ['KY3', 0], ['KY4', 0], ['KY5', 0], ['KY6', 0], ['KY7', 0], ['KY8', 0], ['KY9', 0], ['KY99', 0], ['L1', 4073], ['L10', 299], ['L11', 141], ['L12', 718], ['L13', 491], ['L14', 290], ['L15', 585], ['L16', 267], ['L17', 478], ['L18', 503], ['L19', 278], ['L2', 2379], ['L20', 429], ['L21', 243], ['L22', 233], ['L23', 451], ['L24', 93], ['L25', 425], ['L26', 455], ['L27', 27], ['L28', 18], ['L29', 4], ['L3', 3132], ['L30', 164], ['L31', 378], ['L32', 238], ['L33', 174], ['L34', 152], ['L35', 507], ['L36', 506], ['L37', 371], ['L38', 68], ['L39', 416], ['L4', 890], ['L40', 220], ['L41', 11], ['L42', 1], ['L43', 11], ['L44', 2], ['L45', 0], ['L46', 1], ['L47', 0], ['L48', 1], ['L49', 0], ['L5', 127], ['L6', 353], ['L60', 0], ['L61', 1], ['L62', 0], ['L63', 0], ['L64', 0], ['L65', 1], ['L66', 0], ['L67', 0], ['L68', 0], ['L69', 0], ['L7', 291], ['L70', 0], ['L71', 0], ['L72', 0], ['L73', 0], ['L74', 0], ['L75', 0], ['L8', 276], ['L80', 0], ['L9', 634], ['LA1', 2950], ['LA10', 61], ['LA11', 212], ['LA12', 346], ['LA13', 277], ['LA14', 753], ['LA15', 130], ['LA16', 80], ['LA17', 12], ['LA18', 129], ['LA19', 4], ['LA2', 665], ['LA20', 20], ['LA21', 15], ['LA22', 104], ['LA23', 199], ['LA3', 502], ['LA4', 558], ['LA5', 348], ['LA6', 178], ['LA7', 84], ['LA8', 142], ['LA9', 638], ['LD1', 116], ['LD2', 55], ['LD3', 249], ['LD4', 4], ['LD5', 18], ['LD6', 37], ['LD7', 60], ['LD8', 41], ['LE1', 6644], ['LE10', 1074], ['LE11', 1005], ['LE12', 1240], ['LE13', 505], ['LE14', 270], ['LE15', 538], ['LE16', 674], ['LE17', 381], ['LE18', 541], ['LE19', 380], ['LE2', 1822], ['LE21', 0], ['LE3', 1552], ['LE4', 1421], ['LE41', 0], ['LE5', 1017], ['LE55', 0], ['LE6', 1663], ['LE65', 281], ['LE67', 1130], ['LE7', 900], ['LE8', 740], ['LE87', 0], ['LE9', 1121], ['LE94', 0], ['LE95', 0], ['LL11', 477], ['LL12', 403], ['LL13', 410], ['LL14', 348], ['LL15', 128], ['LL16', 174], ['LL17', 68], ['LL18', 751], ['LL19', 345], ['LL20', 108], ['LL21', 68], ['LL22', 338], ['LL23', 36], ['LL24', 27], ['LL25', 8], ['LL26', 57], ['LL27', 9], ['LL28', 239], ['LL29', 304], ['LL30', 454], ['LL31', 129], ['LL32', 115], ['LL33', 59], ['LL34', 65], ['LL35', 22], ['LL36', 70], ['LL37', 13], ['LL38', 17], ['LL39', 1], ['LL40', 51], ['LL41', 101], ['LL42', 27], ['LL43', 6], ['LL44', 20], ['LL45', 4], ['LL46', 47], ['LL47', 6], ['LL48', 37], ['LL49', 79], ['LL51', 3], ['LL52', 48], ['LL53', 206], ['LL54', 119], ['LL55', 273], ['LL56', 58], ['LL57', 323], ['LL58', 64], ['LL59', 90], ['LL60', 41], ['LL61', 92], ['LL62', 13], ['LL63', 10], ['LL64', 20], ['LL65', 299], ['LL66', 6], ['LL67', 18], ['LL68', 63], ['LL69', 6], ['LL70', 1], ['LL71', 15], ['LL72', 13], ['LL73', 3], ['LL74', 69], ['LL75', 29], ['LL76', 4], ['LL77', 73], ['LL78', 2], ['LN1', 1630], ['LN10', 99], ['LN11', 560], ['LN12', 350], ['LN13', 129], ['LN2', 705], ['LN3', 132], ['LN4', 595], ['LN5', 724], ['LN6', 1051], ['LN7', 80], ['LN8', 271], ['LN9', 197], ['LS1', 5345], ['LS10', 378], ['LS11', 684], ['LS12', 562], ['LS13', 546], ['LS14', 251], ['LS15', 593], ['LS16', 615], ['LS17', 854], ['LS18', 394], ['LS19', 458], ['LS2', 5180], ['LS20', 216], ['LS21', 359], ['LS22', 366], ['LS23', 181], ['LS24', 186], ['LS25', 752], ['LS26', 517], ['LS27', 846], ['LS28', 953], ['LS29', 757], ['LS3', 26], ['LS4', 189], ['LS5', 160], ['LS6', 639], ['LS7', 354], ['LS8', 800], ['LS88', 0], ['LS9', 384], ['LS98', 0], ['LS99', 0], ['LU1', 679], ['LU2', 1254], ['LU3', 1020], ['LU4', 734], ['LU5', 658], ['LU6', 673], ['LU7', 1164], ['LU95', 0], ['M1', 2730], ['M10', 0], ['M11', 337], ['M12', 262], ['M13', 157], ['M14', 598], ['M15', 83], ['M16', 355], ['M17', 1], ['M18', 294], ['M19', 558], ['M2', 5685], ['M20', 774], ['M21', 507], ['M22', 398], ['M23', 232], ['M24', 706], ['M25', 526], ['M26', 761], ['M27', 570], ['M28', 793], ['M29', 418], ['M3', 3559], ['M30', 539], ['M31', 53], ['M32', 408], ['M33', 1049], ['M34', 789], ['M35', 478], ['M38', 96], ['M4', 2558], ['M40', 520], ['M41', 716], ['M43', 368], ['M44', 236], ['M45', 410], ['M46', 290], ['M5', 220], ['M50', 46], ['M52', 0], ['M6', 413], ['M60', 0], ['M61', 0], ['M7', 352], ['M8', 453], ['M9', 472], ['M90', 0], ['M99', 0], ['ME1', 5373], ['ME10', 895], ['ME11', 70], ['ME12', 581], ['ME13', 528], ['ME14', 716], ['ME15', 701], ['ME16', 539], ['ME17', 330], ['ME18', 124], ['ME19', 413], ['ME2', 1061], ['ME20', 349], ['ME3', 359], ['ME4', 445], ['ME5', 949], ['ME6', 176], ['ME7', 996], ['ME8', 909], ['ME9', 275], ['ME99', 0], ['MK1', 3032], ['MK10', 37], ['MK11', 156], ['MK12', 194], ['MK13', 393], ['MK14', 387], ['MK15', 203], ['MK16', 372], ['MK17', 392], ['MK18', 723], ['MK19', 165], ['MK2', 174], ['MK3', 325], ['MK4', 5341], ['MK40', 655], ['MK41', 849], ['MK42', 766], ['MK43', 752], ['MK44', 310], ['MK45', 1171], ['MK46', 334], ['MK5', 362], ['MK6', 443], ['MK7', 803], ['MK77', 0], ['MK8', 274], ['MK9', 37], ['MK98', 0], ['ML1', 0], ['ML10', 0], ['ML11', 0], ['ML12', 0], ['ML2', 0], ['ML3', 0], ['ML4', 0], ['ML5', 0], ['ML6', 0], ['ML7', 0], ['ML8', 0], ['ML9', 0], ['N1', 7456], ['N10', 650], ['N11', 494], ['N12', 551], ['N13', 664], ['N14', 650], ['N15', 648], ['N16', 956], ['N17', 931], ['N18', 534], ['N19', 403], ['N1C', 0], ['N1P', 0], ['N2', 2104], ['N20', 323], ['N21', 554], ['N22', 735], ['N3', 579], ['N4', 803], ['N5', 399], ['N6', 541], ['N7', 419], ['N8', 870], ['N81', 0], ['N9', 970], ['NE1', 2622], ['NE10', 388], ['NE11', 295], ['NE12', 496], ['NE13', 201], ['NE15', 621], ['NE16', 433], ['NE17', 66], ['NE18', 15], ['NE19', 24], ['NE2', 5477], ['NE20', 246], ['NE21', 264], ['NE22', 356], ['NE23', 758], ['NE24', 595], ['NE25', 618], ['NE26', 408], ['NE27', 101], ['NE28', 846], ['NE29', 698], ['NE3', 4234], ['NE30', 487], ['NE31', 269], ['NE32', 260], ['NE33', 462], ['NE34', 590], ['NE35', 127], ['NE36', 82], ['NE37', 308], ['NE38', 545], ['NE39', 126], ['NE4', 1594], ['NE40', 297], ['NE41', 36], ['NE42', 143], ['NE43', 90], ['NE44', 21], ['NE45', 66], ['NE46', 302], ['NE47', 131], ['NE48', 57], ['NE49', 78], ['NE5', 619], ['NE6', 2442], ['NE61', 490], ['NE62', 143], ['NE63', 482], ['NE64', 59], ['NE65', 341], ['NE66', 219], ['NE67', 28], ['NE68', 48], ['NE69', 12], ['NE7', 311], ['NE70', 24], ['NE71', 38], ['NE8', 380], ['NE82', 0], ['NE83', 0], ['NE85', 0], ['NE88', 0], ['NE89', 0], ['NE9', 482], ['NE92', 0], ['NE98', 0], ['NE99', 0], ['NG1', 6960], ['NG10', 986], ['NG11', 449], ['NG12', 543], ['NG13', 424], ['NG14', 292], ['NG15', 700], ['NG16', 1045], ['NG17', 1039], ['NG18', 656], ['NG19', 772], ['NG2', 3330], ['NG20', 231], ['NG21', 346], ['NG22', 368], ['NG23', 301], ['NG24', 722], ['NG25', 147], ['NG3', 2825], ['NG31', 875], ['NG32', 195], ['NG33', 158], ['NG34', 887], ['NG4', 765], ['NG5', 1428], ['NG6', 566], ['NG7', 791], ['NG70', 0], ['NG8', 718], ['NG80', 0], ['NG9', 1225], ['NG90', 0], ['NN1', 6511], ['NN10', 781], ['NN11', 969], ['NN12', 512], ['NN13', 650], ['NN14', 806], ['NN15', 701], ['NN16', 665], ['NN17', 336], ['NN18', 376], ['NN2', 1003], ['NN29', 187], ['NN3', 1391], ['NN4', 1248], ['NN5', 728], ['NN6', 746], ['NN7', 531], ['NN8', 970], ['NN9', 511], ['NN99', 0], ['NP1', 3093], ['NP10', 358], ['NP11', 450], ['NP12', 386], ['NP13', 217], ['NP15', 106], ['NP16', 441], ['NP18', 396], ['NP19', 739], ['NP2', 2076], ['NP20', 765], ['NP22', 226], ['NP23', 338], ['NP24', 56], ['NP25', 214], ['NP26', 473], ['NP3', 2], ['NP4', 1222], ['NP44', 655], ['NP5', 0], ['NP6', 1], ['NP7', 339], ['NP8', 67], ['NP9', 1], ['', 1000000], ['NR1', 4138], ['NR10', 444], ['NR11', 412], ['NR12', 424], ['NR13', 493], ['NR14', 424], ['NR15', 273], ['NR16', 202], ['NR17', 348], ['NR18', 300], ['NR19', 416], ['NR2', 2917], ['NR20', 301], ['NR21', 340], ['NR22', 13], ['NR23', 62], ['NR24', 83], ['NR25', 233], ['NR26', 253], ['NR27', 271], ['NR28', 400], ['NR29', 369], ['NR3', 4246], ['NR30', 597], ['NR31', 919], ['NR32', 728], ['NR33', 835], ['NR34', 427], ['NR35', 194], ['NR4', 293], ['NR5', 300], ['NR6', 376], ['NR7', 664], ['NR8', 616], ['NR9', 347], ['NR99', 0], ['NW1', 2707], ['NW10', 1365], ['NW11', 564], ['NW1W', 0], ['NW2', 1150], ['NW26', 0], ['NW3', 1268], ['NW4', 587], ['NW5', 329], ['NW6', 1423], ['NW7', 478], ['NW8', 672], ['NW9', 861], ['OL1', 3425], ['OL10', 494], ['OL11', 549], ['OL12', 732], ['OL13', 195], ['OL14', 276], ['OL15', 232], ['OL16', 580], ['OL2', 755], ['OL3', 280], ['OL4', 708], ['OL5', 206], ['OL6', 470], ['OL7', 390], ['OL8', 478], ['OL9', 587], ['OL95', 0], ['OX1', 5537], ['OX10', 423], ['OX11', 1058], ['OX12', 442], ['OX13', 204], ['OX14', 867], ['OX15', 470], ['OX16', 975], ['OX17', 359], ['OX18', 455], ['OX2', 3098], ['OX20', 96], ['OX25', 108], ['OX26', 1192], ['OX27', 120], ['OX28', 558], ['OX29', 350], ['OX3', 937], ['OX33', 216], ['OX39', 121], ['OX4', 1186], ['OX44', 137], ['OX49', 103], ['OX5', 466], ['OX6', 1], ['OX7', 483], ['OX8', 2], ['OX9', 400], ['PA1', 0], ['PA10', 0], ['PA11', 0], ['PA12', 0], ['PA13', 0], ['PA14', 0], ['PA15', 0], ['PA16', 0], ['PA17', 0], ['PA18', 0], ['PA19', 0], ['PA2', 0], ['PA20', 0], ['PA21', 0], ['PA22', 0], ['PA23', 0], ['PA24', 0], ['PA25', 0], ['PA26', 0], ['PA27', 0], ['PA28', 0], ['PA29', 0], ['PA3', 0], ['PA30', 0], ['PA31', 0], ['PA32', 0], ['PA33', 0], ['PA34', 0], ['PA35', 0], ['PA36', 0], ['PA37', 0], ['PA38', 0], ['PA39', 0], ['PA4', 0], ['PA40', 0], ['PA41', 0], ['PA42', 0], ['PA43', 0], ['PA44', 0], ['PA45', 0], ['PA46', 0], ['PA47', 0], ['PA48', 0], ['PA49', 0], ['PA5', 0], ['PA6', 0], ['PA60', 0], ['PA61', 0], ['PA62', 0], ['PA63', 0], ['PA64', 0], ['PA65', 0], ['PA66', 0], ['PA67', 0], ['PA68', 0], ['PA69', 0], ['PA7', 0], ['PA70', 0], ['PA71', 0], ['PA72', 0], ['PA73', 0], ['PA74', 0], ['PA75', 0], ['PA76', 0], ['PA77', 0], ['PA78', 0], ['PA8', 0], ['PA80', 0], ['PA81', 0], ['PA82', 0], ['PA83', 0], ['PA84', 0], ['PA85', 0], ['PA86', 0], ['PA87', 0], ['PA88', 0], ['PA9', 0], ['PA98', 0], ['PE1', 5500], ['PE10', 497], ['PE11', 847], ['PE12', 689], ['PE13', 561], ['PE14', 348], ['PE15', 568], ['PE16', 297], ['PE17', 1], ['PE18', 0], ['PE19', 921], ['PE2', 5428], ['PE20', 194], ['PE21', 663], ['PE22', 284], ['PE23', 126], ['PE24', 253], ['PE25', 419], ['PE26', 294], ['PE27', 629], ['PE28', 968], ['PE29', 780], ['PE3', 3247], ['PE30', 790], ['PE31', 499], ['PE32', 271], ['PE33', 295], ['PE34', 217], ['PE35', 0], ['PE36', 214], ['PE37', 230], ['PE38', 277], ['PE4', 620], ['PE5', 25], ['PE6', 831], ['PE7', 599], ['PE8', 244], ['PE9', 707], ['PE99', 0], ['PH1', 0], ['PH10', 0], ['PH11', 0], ['PH12', 0], ['PH13', 0], ['PH14', 0], ['PH15', 0], ['PH16', 0], ['PH17', 0], ['PH18', 0], ['PH19', 0], ['PH2', 0], ['PH20', 0], ['PH21', 0], ['PH22', 0], ['PH23', 0], ['PH24', 0], ['PH25', 0], ['PH26', 0], ['PH3', 0], ['PH30', 0], ['PH31', 0], ['PH32', 0], ['PH33', 0], ['PH34', 0], ['PH35', 0], ['PH36', 0], ['PH37', 0], ['PH38', 0], ['PH39', 0], ['PH4', 0], ['PH40', 0], ['PH41', 0], ['PH42', 0], ['PH43', 0], ['PH44', 0], ['PH49', 0], ['PH5', 0], ['PH50', 0], ['PH6', 0], ['PH7', 0], ['PH8', 0], ['PH9', 0], ['PL1', 2638], ['PL10', 52], ['PL11', 190], ['PL12', 446], ['PL13', 233], ['PL14', 491], ['PL15', 337], ['PL16', 27], ['PL17', 169], ['PL18', 90], ['PL19', 311], ['PL2', 2706], ['PL20', 187], ['PL21', 490], ['PL22', 71], ['PL23', 90], ['PL24', 168], ['PL25', 393], ['PL26', 461], ['PL27', 231], ['PL28', 114], ['PL29', 22], ['PL3', 1193], ['PL30', 143], ['PL31', 219], ['PL32', 55], ['PL33', 32], ['PL34', 29], ['PL35', 22], ['PL4', 638], ['PL5', 470], ['PL6', 615], ['PL7', 641], ['PL8', 108], ['PL9', 580], ['PL95', 0], ['PO1', 5821], ['PO10', 305], ['PO11', 489], ['PO12', 1047], ['PO13', 629], ['PO14', 778], ['PO15', 577], ['PO16', 693], ['PO17', 68], ['PO18', 236], ['PO19', 591], ['PO2', 3486], ['PO20', 763], ['PO21', 1043], ['PO22', 767], ['PO3', 3523], ['PO30', 654], ['PO31', 365], ['PO32', 141], ['PO33', 723], ['PO34', 76], ['PO35', 96], ['PO36', 447], ['PO37', 232], ['PO38', 312], ['PO39', 59], ['PO4', 1309], ['PO40', 150], ['PO41', 52], ['PO5', 609], ['PO6', 638], ['PO7', 892], ['PO8', 721], ['PO9', 695], ['PR0', 0], ['PR1', 1146], ['PR11', 0], ['PR2', 2356], ['PR25', 596], ['PR26', 186], ['PR3', 626], ['PR4', 929], ['PR5', 755], ['PR6', 609], ['PR7', 715], ['PR8', 950], ['PR9', 702], ['RG1', 4117], ['RG10', 441], ['RG11', 0], ['RG12', 1041], ['RG13', 0], ['RG14', 721], ['RG15', 0], ['RG16', 1], ['RG17', 336], ['RG18', 362], ['RG19', 310], ['RG2', 4378], ['RG20', 318], ['RG21', 474], ['RG22', 969], ['RG23', 226], ['RG24', 694], ['RG25', 146], ['RG26', 435], ['RG27', 451], ['RG28', 104], ['RG29', 94], ['RG3', 1517], ['RG30', 808], ['RG31', 708], ['RG4', 3398], ['RG40', 619], ['RG41', 607], ['RG42', 1030], ['RG45', 279], ['RG5', 529], ['RG6', 926], ['RG7', 642], ['RG8', 371], ['RG9', 492], ['RH1', 8660], ['RH10', 1631], ['RH11', 807], ['RH12', 1229], ['RH13', 930], ['RH14', 219], ['RH15', 936], ['RH16', 706], ['RH17', 337], ['RH18', 85], ['RH19', 707], ['RH2', 1088], ['RH20', 562], ['RH3', 55], ['RH4', 293], ['RH5', 264], ['RH6', 537], ['RH7', 129], ['RH77', 0], ['RH8', 262], ['RH9', 84], ['RM1', 5760], ['RM10', 636], ['RM11', 651], ['RM12', 621], ['RM13', 532], ['RM14', 515], ['RM15', 580], ['RM16', 788], ['RM17', 615], ['RM18', 244], ['RM19', 153], ['RM2', 339], ['RM20', 111], ['RM3', 665], ['RM4', 73], ['RM5', 307], ['RM50', 0], ['RM6', 644], ['RM7', 545], ['RM8', 636], ['RM9', 450], ['S1', 2977], ['S10', 746], ['S11', 650], ['S12', 431], ['S13', 414], ['S14', 52], ['S17', 275], ['S18', 394], ['S19', 0], ['S2', 2215], ['S20', 752], ['S21', 329], ['S25', 456], ['S26', 388], ['S3', 1362], ['S30', 3], ['S31', 1], ['S32', 97], ['S33', 54], ['S35', 655], ['S36', 476], ['S4', 2784], ['S40', 567], ['S41', 506], ['S42', 464], ['S43', 579], ['S44', 389], ['S45', 137], ['S49', 0], ['S5', 401], ['S6', 4244], ['S60', 527], ['S61', 451], ['S62', 281], ['S63', 453], ['S64', 405], ['S65', 401], ['S66', 861], ['S7', 3143], ['S70', 602], ['S71', 517], ['S72', 305], ['S73', 376], ['S74', 218], ['S75', 816], ['S8', 1904], ['S80', 451], ['S81', 625], ['S9', 296], ['S95', 0], ['S96', 0], ['S97', 0], ['S98', 0], ['S99', 0], ['SA1', 3559], ['SA10', 494], ['SA11', 460], ['SA12', 370], ['SA13', 223], ['SA14', 360], ['SA15', 478], ['SA16', 107], ['SA17', 76], ['SA18', 312], ['SA19', 96], ['SA2', 739], ['SA20', 34], ['SA3', 1000], ['SA31', 227], ['SA32', 69], ['SA33', 120], ['SA34', 38], ['SA35', 7], ['SA36', 3], ['SA37', 10], ['SA38', 38], ['SA39', 18], ['SA4', 1137], ['SA40', 28], ['SA41', 16], ['SA42', 41], ['SA43', 139], ['SA44', 119], ['SA45', 31], ['SA46', 50], ['SA47', 14], ['SA48', 77], ['SA5', 476], ['SA6', 1288], ['SA61', 171], ['SA62', 222], ['SA63', 13], ['SA64', 18], ['SA65', 72], ['SA66', 33], ['SA67', 97], ['SA68', 53], ['SA69', 53], ['SA7', 794], ['SA70', 175], ['SA71', 103], ['SA72', 112], ['SA73', 195], ['SA8', 194], ['SA80', 0], ['SA9', 178], ['SA99', 0], ['SE1', 6804], ['SE10', 398], ['SE11', 200], ['SE12', 499], ['SE13', 839], ['SE14', 621], ['SE15', 584], ['SE16', 903], ['SE17', 159], ['SE18', 1074], ['SE19', 700], ['SE1P', 0], ['SE2', 5332], ['SE20', 531], ['SE21', 288], ['SE22', 645], ['SE23', 673], ['SE24', 389], ['SE25', 1015], ['SE26', 578], ['SE27', 399], ['SE28', 383], ['SE3', 657], ['SE4', 557], ['SE5', 453], ['SE6', 1029], ['SE7', 327], ['SE8', 288], ['SE9', 999], ['SE99', 0], ['SG1', 4005], ['SG10', 38], ['SG11', 146], ['SG12', 634], ['SG13', 439], ['SG14', 479], ['SG15', 100], ['SG16', 97], ['SG17', 267], ['SG18', 479], ['SG19', 502], ['SG2', 782], ['SG3', 172], ['SG4', 539], ['SG5', 586], ['SG6', 573], ['SG7', 322], ['SG8', 711], ['SG9', 227], ['SK1', 4814], ['SK10', 769], ['SK11', 696], ['SK12', 372], ['SK13', 578], ['SK14', 800], ['SK15', 487], ['SK16', 354], ['SK17', 564], ['SK2', 985], ['SK22', 230], ['SK23', 302], ['SK3', 468], ['SK4', 557], ['SK5', 369], ['SK6', 880], ['SK7', 776], ['SK8', 942], ['SK9', 751], ['SL0', 181], ['SL1', 1166], ['SL2', 769], ['SL3', 727], ['SL4', 925], ['SL5', 546], ['SL6', 1638], ['SL60', 0], ['SL7', 459], ['SL8', 178], ['SL9', 405], ['SL95', 0], ['SM1', 966], ['SM2', 1066], ['SM3', 422], ['SM4', 609], ['SM5', 756], ['SM6', 889], ['SM7', 385], ['SN1', 4180], ['SN10', 588], ['SN11', 465], ['SN12', 540], ['SN13', 207], ['SN14', 700], ['SN15', 703], ['SN16', 275], ['SN17', 0], ['SN2', 1447], ['SN25', 501], ['SN26', 19], ['SN3', 920], ['SN38', 0], ['SN4', 560], ['SN5', 1017], ['SN6', 401], ['SN7', 289], ['SN8', 422], ['SN9', 190], ['SN99', 0], ['SO1', 4602], ['SO14', 321], ['SO15', 917], ['SO16', 1071], ['SO17', 436], ['SO18', 737], ['SO19', 1120], ['SO2', 1604], ['SO20', 115], ['SO21', 383], ['SO22', 506], ['SO23', 397], ['SO24', 203], ['SO25', 0], ['SO3', 2400], ['SO30', 940], ['SO31', 1046], ['SO32', 414], ['SO4', 2672], ['SO40', 971], ['SO41', 875], ['SO42', 103], ['SO43', 105], ['SO45', 618], ['SO5', 2337], ['SO50', 903], ['SO51', 577], ['SO52', 157], ['SO53', 700], ['SO9', 0], ['SO97', 0], ['SP1', 1705], ['SP10', 838], ['SP11', 356], ['SP2', 652], ['SP3', 155], ['SP4', 387], ['SP5', 403], ['SP6', 326], ['SP7', 276], ['SP8', 424], ['SP9', 69], ['SR1', 33], ['SR2', 432], ['SR3', 453], ['SR4', 550], ['SR43', 0], ['SR5', 467], ['SR6', 475], ['SR7', 439], ['SR8', 552], ['SR88', 0], ['SR9', 0], ['SS0', 1130], ['SS1', 4101], ['SS11', 329], ['SS12', 517], ['SS13', 398], ['SS14', 316], ['SS15', 501], ['SS16', 706], ['SS17', 532], ['SS2', 737], ['SS22', 0], ['SS3', 704], ['SS4', 441], ['SS5', 393], ['SS6', 653], ['SS7', 995], ['SS8', 764], ['SS9', 1139], ['SS99', 0], ['ST1', 4387], ['ST10', 420], ['ST11', 149], ['ST12', 38], ['ST13', 554], ['ST14', 357], ['ST15', 492], ['ST16', 685], ['ST17', 565], ['ST18', 257], ['ST19', 197], ['ST2', 619], ['ST20', 136], ['ST21', 115], ['ST3', 1109], ['ST4', 1191], ['ST5', 1329], ['ST55', 0], ['ST6', 1127], ['ST7', 907], ['ST8', 379], ['ST9', 183], ['SW10', 522], ['SW11', 2016], ['SW12', 882], ['SW13', 381], ['SW14', 420], ['SW15', 1464], ['SW16', 1712], ['SW17', 1359], ['SW18', 1640], ['SW19', 2007], ['SW1A', 9], ['SW1E', 13], ['SW1H', 11], ['SW1P', 254], ['SW1V', 555], ['SW1W', 126], ['SW1X', 275], ['SW1Y', 16], ['SW2', 1625], ['SW20', 727], ['SW3', 879], ['SW4', 851], ['SW5', 521], ['SW6', 1725], ['SW7', 664], ['SW8', 439], ['SW9', 456], ['SW95', 0], ['SW99', 0], ['SY1', 2197], ['SY10', 190], ['SY11', 562], ['SY12', 132], ['SY13', 296], ['SY14', 94], ['SY15', 47], ['SY16', 206], ['SY17', 41], ['SY18', 59], ['SY19', 10], ['SY2', 1076], ['SY20', 57], ['SY21', 221], ['SY22', 69], ['SY23', 291], ['SY24', 70], ['SY25', 29], ['SY3', 713], ['SY4', 377], ['SY5', 300], ['SY6', 146], ['SY7', 150], ['SY8', 373], ['SY9', 36], ['SY99', 0], ['TA1', 2078], ['TA10', 169], ['TA11', 182], ['TA12', 161], ['TA13', 96], ['TA14', 56], ['TA15', 14], ['TA16', 31], ['TA17', 11], ['TA18', 241], ['TA19', 197], ['TA2', 1813], ['TA20', 423], ['TA21', 333], ['TA22', 46], ['TA23', 83], ['TA24', 413], ['TA3', 219], ['TA4', 301], ['TA5', 189], ['TA6', 822], ['TA7', 251], ['TA8', 474], ['TA9', 224], ['TD1', 263], ['TD10', 0], ['TD11', 0], ['TD12', 12], ['TD13', 0], ['TD14', 0], ['TD15', 251], ['TD2', 0], ['TD3', 0], ['TD4', 0], ['TD5', 0], ['TD6', 0], ['TD7', 0], ['TD8', 0], ['TD9', 1], ['TF1', 1235], ['TF10', 317], ['TF11', 188], ['TF12', 69], ['TF13', 36], ['TF2', 779], ['TF3', 525], ['TF4', 363], ['TF5', 115], ['TF6', 40], ['TF7', 381], ['TF8', 59], ['TF9', 363], ['TN1', 3216], ['TN10', 197], ['TN11', 212], ['TN12', 548], ['TN13', 515], ['TN14', 226], ['TN15', 419], ['TN16', 358], ['TN17', 197], ['TN18', 105], ['TN19', 85], ['TN2', 3910], ['TN20', 61], ['TN21', 402], ['TN22', 637], ['TN23', 760], ['TN24', 460], ['TN25', 256], ['TN26', 161], ['TN27', 237], ['TN28', 165], ['TN29', 236], ['TN3', 4065], ['TN30', 208], ['TN31', 347], ['TN32', 128], ['TN33', 234], ['TN34', 659], ['TN35', 424], ['TN36', 60], ['TN37', 553], ['TN38', 583], ['TN39', 708], ['TN4', 1182], ['TN40', 562], ['TN5', 184], ['TN6', 530], ['TN7', 35], ['TN8', 191], ['TN9', 358], ['TQ1', 2958], ['TQ10', 80], ['TQ11', 63], ['TQ12', 1136], ['TQ13', 388], ['TQ14', 473], ['TQ2', 742], ['TQ3', 736], ['TQ4', 448], ['TQ5', 480], ['TQ6', 201], ['TQ7', 386], ['TQ8', 75], ['TQ9', 386], ['TR1', 3263], ['TR10', 162], ['TR11', 621], ['TR12', 145], ['TR13', 352], ['TR14', 435], ['TR15', 331], ['TR16', 254], ['TR17', 28], ['TR18', 370], ['TR19', 185], ['TR2', 956], ['TR20', 144], ['TR21', 25], ['TR22', 0], ['TR23', 1], ['TR24', 0], ['TR25', 0], ['TR26', 327], ['TR27', 290], ['TR3', 279], ['TR4', 230], ['TR5', 79], ['TR6', 88], ['TR7', 434], ['TR8', 146], ['TR9', 134], ['TR93', 0], ['TS1', 4098], ['TS10', 595], ['TS11', 187], ['TS12', 422], ['TS13', 167], ['TS14', 290], ['TS15', 265], ['TS16', 141], ['TS17', 788], ['TS18', 394], ['TS19', 471], ['TS2', 2744], ['TS20', 351], ['TS21', 191], ['TS22', 139], ['TS23', 417], ['TS24', 343], ['TS25', 493], ['TS26', 431], ['TS27', 265], ['TS28', 48], ['TS29', 55], ['TS3', 234], ['TS4', 146], ['TS5', 593], ['TS6', 378], ['TS7', 338], ['TS8', 442], ['TS9', 244], ['TS90', 0], ['TW1', 5792], ['TW10', 467], ['TW11', 603], ['TW12', 522], ['TW13', 690], ['TW14', 612], ['TW15', 533], ['TW16', 370], ['TW17', 326], ['TW18', 609], ['TW19', 249], ['TW2', 1141], ['TW20', 490], ['TW3', 557], ['TW4', 277], ['TW5', 370], ['TW6', 0], ['TW7', 754], ['TW8', 238], ['TW9', 543], ['UB1', 1031], ['UB10', 638], ['UB11', 0], ['UB18', 0], ['UB2', 497], ['UB3', 760], ['UB4', 681], ['UB5', 653], ['UB6', 768], ['UB7', 547], ['UB8', 646], ['UB9', 257], ['W1', 4108], ['W10', 340], ['W11', 656], ['W12', 680], ['W13', 695], ['W14', 976], ['W1A', 0], ['W1B', 15], ['W1C', 0], ['W1D', 37], ['W1F', 32], ['W1G', 89], ['W1H', 146], ['W1J', 63], ['W1K', 86], ['W1M', 5], ['W1N', 3], ['W1P', 0], ['W1R', 0], ['W1S', 10], ['W1T', 67], ['W1U', 133], ['W1V', 3], ['W1W', 70], ['W1X', 1], ['W1Y', 1], ['W2', 1282], ['W3', 735], ['W4', 1344], ['W5', 1091], ['W6', 751], ['W7', 488], ['W8', 665], ['W9', 983], ['WA1', 4020], ['WA10', 575], ['WA11', 636], ['WA12', 353], ['WA13', 228], ['WA14', 593], ['WA15', 855], ['WA16', 431], ['WA2', 471], ['WA3', 927], ['WA4', 862], ['WA5', 1197], ['WA55', 0], ['WA6', 332], ['WA7', 764], ['WA8', 792], ['WA88', 0], ['WA9', 506], ['WC1A', 17], ['WC1B', 18], ['WC1E', 19], ['WC1H', 165], ['WC1N', 73], ['WC1R', 11], ['WC1V', 1], ['WC1X', 49], ['WC2A', 0], ['WC2B', 20], ['WC2E', 21], ['WC2H', 26], ['WC2N', 13], ['WC2R', 3], ['WC99', 0], ['WD1', 1396], ['WD17', 329], ['WD18', 606], ['WD19', 458], ['WD2', 1566], ['WD23', 533], ['WD24', 568], ['WD25', 464], ['WD3', 860], ['WD4', 219], ['WD5', 334], ['WD6', 621], ['WD7', 289], ['WD99', 0], ['WF1', 3426], ['WF10', 571], ['WF11', 186], ['WF12', 453], ['WF13', 356], ['WF14', 288], ['WF15', 320], ['WF16', 201], ['WF17', 578], ['WF2', 741], ['WF3', 688], ['WF4', 761], ['WF5', 389], ['WF6', 321], ['WF7', 298], ['WF8', 423], ['WF9', 513], ['WF90', 0], ['WN1', 369], ['WN2', 748], ['WN3', 529], ['WN4', 494], ['WN5', 551], ['WN6', 831], ['WN7', 734], ['WN8', 491], ['WR1', 2355], ['WR10', 331], ['WR11', 956], ['WR12', 112], ['WR13', 113], ['WR14', 553], ['WR15', 98], ['WR2', 538], ['WR3', 366], ['WR4', 787], ['WR5', 742], ['WR6', 159], ['WR7', 89], ['WR78', 0], ['WR8', 186], ['WR9', 600], ['WR99', 0], ['WS1', 3315], ['WS10', 383], ['WS11', 640], ['WS12', 627], ['WS13', 353], ['WS14', 357], ['WS15', 566], ['WS2', 356], ['WS3', 664], ['WS4', 229], ['WS5', 317], ['WS6', 309], ['WS7', 555], ['WS8', 165], ['WS9', 413], ['WV1', 2584], ['WV10', 566], ['WV11', 441], ['WV12', 315], ['WV13', 242], ['WV14', 451], ['WV15', 140], ['WV16', 331], ['WV2', 146], ['WV3', 407], ['WV4', 450], ['WV5', 262], ['WV6', 884], ['WV7', 86], ['WV8', 217], ['WV9', 130], ['WV98', 0], ['WV99', 0], ['YO1', 4010], ['YO10', 392], ['YO11', 456], ['YO12', 933], ['YO13', 177], ['YO14', 268], ['YO15', 371], ['YO16', 505], ['YO17', 358], ['YO18', 259], ['YO19', 225], ['YO2', 2487], ['YO21', 245], ['YO22', 149], ['YO23', 411], ['YO24', 451], ['YO25', 697], ['YO26', 533], ['YO3', 1601], ['YO30', 539], ['YO31', 489], ['YO32', 573], ['YO4', 771], ['YO41', 246], ['YO42', 268], ['YO43', 256], ['YO5', 150], ['YO51', 150], ['YO6', 525], ['YO60', 70], ['YO61', 274], ['YO62', 181], ['YO7', 347], ['YO8', 808], ['YO90', 0], ['YO91', 0], ['YO95', 0], ['ZE1', 0], ['ZE2', 0], ['ZE3', 0]]
+        cur.execute("""SELECT d.postcode_district, COALESCE(s.frequency, 0) FROM
+                       (SELECT DISTINCT postcode_district FROM postcode_data) d
+                       LEFT JOIN
+                       (SELECT """ + backends.backend_for(conn).outcode("postcode") + """ AS outcode, COUNT(*) AS frequency
+                        FROM pp_data GROUP BY outcode) s
+                       ON (d.postcode_district = s.outcode)""")
+    return [[district, int(frequency)] for district, frequency in cur.fetchall()]
+
+def postcode_district_sales(conn, use_precomputed_values=True):
+    """
+    Return the number of sales in each postcode district along with the district's location, counted by
+    postcode_district_counts
+    """
+    district_data = postcode_district_counts(conn, use_precomputed_values)
 
-        
     district_df = pd.DataFrame(district_data, columns=["postcode", "frequency"])
     
     headers = {'User-Agent': 'Mozilla/5.0 (Windows NT 6.1; WOW64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/56.0.2924.76 Safari/537.36'}
@@ -165,3 +308,6 @@ def view(data):
 def labelled(data):
     """Provide a labelled set of data ready for supervised learning."""
     raise NotImplementedError
+
+#time every public function of this file as a stage when profiling, see profiling.py
+profiling.instrument_functions(globals())
@@ -0,0 +1,459 @@
+# This file contains the databases the tables can be stored in
+
+import numpy as np
+import pandas as pd
+
+import csv
+import itertools
+import sqlite3
+
+"""The functions in access, assess and address are written against MariaDB, through a pymysql connection. An embedded connection, made by connect_embedded, wraps an in process SQLite or DuckDB database so it can be passed as conn to the same functions. It takes the %s parameters and `quoted` names used with pymysql, and carries a backend which supplies the parts of the sql which differ between databases: table definitions, bulk loading, date and postcode expressions, upserts and quantiles. Any connection without a backend is taken to be MariaDB."""
+
+#tables as stored by the embedded backends, as (column, type) pairs along with the primary key. These mirror the
+#MariaDB definitions in access and assess, with enums and sized text columns stored as TEXT
+embedded_schemas = {
+    "pp_data": {"columns": [("id", "TEXT"), ("transaction_unique_identifier", "TEXT"), ("price", "INTEGER"),
+                            ("date_of_transfer", "DATE"), ("postcode", "TEXT"), ("property_type", "TEXT"),
+                            ("new_build_flag", "TEXT"), ("tenure_type", "TEXT"),
+                            ("primary_addressable_object_name", "TEXT"), ("secondary_addressable_object_name", "TEXT"),
+                            ("street", "TEXT"), ("locality", "TEXT"), ("town_city", "TEXT"), ("district", "TEXT"),
+                            ("county", "TEXT"), ("ppd_category_type", "TEXT"), ("record_status", "TEXT"),
+                            ("db_id", "BIGINT")],
+                "primary_key": ["db_id"], "auto_increment": "db_id"},
+    "postcode_data": {"columns": [("postcode", "TEXT"), ("status", "TEXT"), ("usertype", "TEXT"), ("easting", "INTEGER"),
+                                  ("northing", "INTEGER"), ("positional_quality_indicator", "INTEGER"), ("country", "TEXT"),
+                                  ("lattitude", "DOUBLE"), ("longitude", "DOUBLE"), ("postcode_no_space", "TEXT"),
+                                  ("postcode_fixed_width_seven", "TEXT"), ("postcode_fixed_width_eight", "TEXT"),
+                                  ("postcode_area", "TEXT"), ("postcode_district", "TEXT"), ("postcode_sector", "TEXT"),
+                                  ("outcode", "TEXT"), ("incode", "TEXT"), ("db_id", "BIGINT")],
+                      "primary_key": ["db_id"], "auto_increment": "db_id"},
+    "prices_coordinates_data": {"columns": [("price", "INTEGER"), ("date_of_transfer", "DATE"), ("postcode", "TEXT"),
+                                            ("property_type", "TEXT"), ("new_build_flag", "TEXT"), ("tenure_type", "TEXT"),
+                                            ("locality", "TEXT"), ("town_city", "TEXT"), ("district", "TEXT"),
+                                            ("county", "TEXT"), ("country", "TEXT"), ("lattitude", "DOUBLE"),
+                                            ("longitude", "DOUBLE"), ("db_id", "BIGINT")],
+                                "primary_key": ["db_id"]},
+    "pp_data_summary": {"columns": [("year", "INTEGER"), ("month", "INTEGER"), ("postcode_district", "TEXT"),
+                                    ("property_type", "TEXT"), ("sales", "BIGINT"), ("total_price", "BIGINT")],
+                        "primary_key": ["year", "month", "postcode_district", "property_type"]},
+    "pp_data_year_summary": {"columns": [("year", "INTEGER"), ("sales", "BIGINT"), ("total_price", "BIGINT")],
+                             "primary_key": ["year"]},
+    "pp_data_price_quantiles": {"columns": [("year", "INTEGER"), ("property_type", "TEXT"), ("quantile", "DOUBLE"),
+                                            ("price", "DOUBLE")],
+                                "primary_key": ["year", "property_type", "quantile"]},
+    "cleaning_progress": {"columns": [("rule", "TEXT"), ("rule_definition", "TEXT"), ("last_db_id", "BIGINT"),
+                                      ("rows_deleted", "BIGINT")],
+                          "primary_key": ["rule"]},
+}
+
+#secondary indexes built by the embedded backends, the same columns as the btree scheme of access.index_schemes
+embedded_indexes = {
+    "pp_data": [("pp_postcode_date", ["postcode", "date_of_transfer"]), ("pp_date", ["date_of_transfer"])],
+    "postcode_data": [("po_postcode", ["postcode"]), ("po_lattitude_longitude", ["lattitude", "longitude"])],
+}
+
+class MariaDBBackend:
+    """
+    The sql of a MariaDB server, reached through pymysql
+    """
+    name = "mariadb"
+    embedded = False
+
+    def year(self, column):
+        return "YEAR(" + column + ")"
+
+    def month(self, column):
+        return "MONTH(" + column + ")"
+
+    def outcode(self, column):
+        return "SUBSTRING_INDEX(" + column + ", ' ', 1)"
+
+    def upsert(self, table, keys, summed):
+        """
+        Return the clause following an INSERT into table which adds the summed columns of rows whose keys are
+        already present onto the existing row
+        """
+        return " ON DUPLICATE KEY UPDATE " + ", ".join(column + " = " + table + "." + column + " + VALUES(" + column + ")"
+                                                       for column in summed)
+
+    def replace_into(self):
+        return "REPLACE INTO"
+
+    def truncate(self, table):
+        return "TRUNCATE TABLE `" + table + "`"
+
+    def drop_temporary_table(self, table):
+        return "DROP TEMPORARY TABLE IF EXISTS `" + table + "`"
+
+    def create_temporary_table(self, table):
+        return "CREATE TEMPORARY TABLE `" + table + "` "
+
+    def relax_checks(self, cur):
+        cur.execute("SET SESSION unique_checks=0, foreign_key_checks=0")
+
+    def restore_checks(self, cur):
+        cur.execute("SET SESSION unique_checks=1, foreign_key_checks=1")
+
+    def insert_rows(self, conn, table, columns, rows):
+        cur = conn.cursor()
+        cur.executemany("INSERT INTO `" + table + "` (" + ", ".join(columns) + ") VALUES (" +
+                        ", ".join(["%s"] * len(columns)) + ")", rows)
+
+    def upsert_rows(self, conn, table, keys, summed, rows):
+        """
+        Insert rows, holding the keys then the summed columns of table, adding the summed columns of rows whose keys
+        are already present onto the existing row
+        """
+        cur = conn.cursor()
+        cur.executemany("INSERT INTO `" + table + "` (" + ", ".join(keys + summed) + ") VALUES (" +
+                        ", ".join(["%s"] * len(keys + summed)) + ")" + self.upsert(table, keys, summed), rows)
+
+    def price_quantiles(self, conn, quantiles, start_date, end_date):
+        """
+        Return a list of (property_type, list of the quantiles of price) for the sales between start_date and end_date
+        """
+        percentiles = ", ".join("PERCENTILE_CONT(" + str(q) + ") WITHIN GROUP (ORDER BY price) OVER (PARTITION BY property_type)"
+                                for q in quantiles)
+        cur = conn.cursor()
+        cur.execute("SELECT DISTINCT property_type, " + percentiles + """ FROM pp_data
+                       WHERE date_of_transfer >= %s AND date_of_transfer < %s""", (start_date, end_date))
+        return [(row[0], list(row[1:])) for row in cur.fetchall()]
+
+    def explain(self, conn, sql, params):
+        cur = conn.cursor()
+        cur.execute("EXPLAIN " + sql, params)
+        columns = [column[0] for column in cur.description]
+        return [dict(zip(columns, row)) for row in cur.fetchall()]
+
+class EmbeddedBackend:
+    """
+    The sql shared by SQLite and DuckDB, used through an EmbeddedConnection
+    """
+    embedded = True
+
+    def outcode(self, column):
+        return "CASE WHEN instr(" + column + ", ' ') > 0 THEN substr(" + column + ", 1, instr(" + column + ", ' ') - 1) ELSE " + column + " END"
+
+    def upsert(self, table, keys, summed):
+        return (" ON CONFLICT (" + ", ".join(keys) + ") DO UPDATE SET " +
+                ", ".join(column + " = " + table + "." + column + " + excluded." + column for column in summed))
+
+    def replace_into(self):
+        return "INSERT OR REPLACE INTO"
+
+    def truncate(self, table):
+        return "DELETE FROM `" + table + "`"
+
+    def drop_temporary_table(self, table):
+        return "DROP TABLE IF EXISTS `" + table + "`"
+
+    def create_temporary_table(self, table):
+        return "CREATE TEMPORARY TABLE `" + table + "` AS "
+
+    def relax_checks(self, cur):
+        pass
+
+    def restore_checks(self, cur):
+        pass
+
+    def column_definition(self, table, column, column_type):
+        return column + " " + column_type
+
+    def open_cursor(self, db):
+        return db.cursor()
+
+    def close_cursor(self, cursor):
+        cursor.close()
+
+    def create_table(self, conn, table, replace=True):
+        """
+        Create table from its definition in embedded_schemas, dropping any existing table of the same name unless
+        replace is False
+        """
+        schema = embedded_schemas[table]
+        cur = conn.cursor()
+        if replace:
+            cur.execute("DROP TABLE IF EXISTS " + table)
+        columns = [self.column_definition(table, column, column_type) for column, column_type in schema["columns"]]
+        if schema["primary_key"] != [schema.get("auto_increment")]:
+            columns.append("PRIMARY KEY (" + ", ".join(schema["primary_key"]) + ")")
+        cur.execute("CREATE TABLE IF NOT EXISTS " + table + " (" + ", ".join(columns) + ")")
+        conn.commit()
+
+    def build_indexes(self, conn, table, index_scheme):
+        if index_scheme == "spatial":
+            raise ValueError("The spatial index scheme needs a MariaDB database")
+
+    def convert_rows(self, table, columns, rows):
+        """
+        Convert rows of strings, as read from a csv, to the values stored in columns of table. Empty strings in
+        columns which are not text become NULL, and dates lose any time of day
+        """
+        types = dict(embedded_schemas[table]["columns"])
+        dates = [i for i, column in enumerate(columns) if types[column] == "DATE"]
+        numbers = [i for i, column in enumerate(columns) if types[column] not in ("TEXT", "DATE")]
+        converted = []
+        for row in rows:
+            row = list(row)
+            for i in dates:
+                row[i] = row[i][:10] if isinstance(row[i], str) else row[i]
+            for i in numbers:
+                row[i] = None if row[i] == "" else row[i]
+            converted.append(row)
+        return converted
+
+    def insert_rows(self, conn, table, columns, rows):
+        cur = conn.cursor()
+        cur.executemany("INSERT INTO " + table + " (" + ", ".join(columns) + ") VALUES (" +
+                        ", ".join(["%s"] * len(columns)) + ")", self.convert_rows(table, columns, rows))
+
+    def upsert_rows(self, conn, table, keys, summed, rows):
+        cur = conn.cursor()
+        cur.executemany("INSERT INTO " + table + " (" + ", ".join(keys + summed) + ") VALUES (" +
+                        ", ".join(["%s"] * len(keys + summed)) + ")" + self.upsert(table, keys, summed), rows)
+
+    def load_csv(self, conn, table, filepath, columns, chunk_size=100000):
+        """
+        Load the csv at filepath, whose fields are the given columns of table, in chunks of chunk_size rows
+        """
+        with open(filepath, newline="", encoding="utf-8") as f:
+            reader = csv.reader(f)
+            while True:
+                chunk = list(itertools.islice(reader, chunk_size))
+                if not chunk:
+                    break
+                self.insert_rows(conn, table, columns, chunk)
+                conn.commit()
+
+class SQLiteBackend(EmbeddedBackend):
+    name = "sqlite"
+
+    def year(self, column):
+        return "CAST(strftime('%Y', " + column + ") AS INTEGER)"
+
+    def month(self, column):
+        return "CAST(strftime('%m', " + column + ") AS INTEGER)"
+
+    def column_definition(self, table, column, column_type):
+        #an INTEGER PRIMARY KEY is the rowid of the table, so is numbered automatically like AUTO_INCREMENT
+        if column == embedded_schemas[table].get("auto_increment"):
+            return column + " INTEGER PRIMARY KEY"
+        return column + " " + column_type
+
+    def relax_checks(self, cur):
+        cur.execute("PRAGMA synchronous = OFF")
+
+    def restore_checks(self, cur):
+        cur.execute("PRAGMA synchronous = FULL")
+
+    def build_indexes(self, conn, table, index_scheme):
+        EmbeddedBackend.build_indexes(self, conn, table, index_scheme)
+        cur = conn.cursor()
+        for name, columns in embedded_indexes.get(table, []):
+            cur.execute("CREATE INDEX IF NOT EXISTS " + name + " ON " + table + " (" + ", ".join(columns) + ")")
+        conn.commit()
+
+    def has_table(self, db, table):
+        return db.execute("SELECT name FROM sqlite_master WHERE type IN ('table', 'view') AND name = ? UNION "
+                          "SELECT name FROM sqlite_temp_master WHERE name = ?", (table, table)).fetchone() is not None
+
+    def rowcount(self, cursor, sql):
+        return cursor.rowcount
+
+    def price_quantiles(self, conn, quantiles, start_date, end_date):
+        #sqlite has no percentile function, so the prices are sorted here instead
+        cur = conn.cursor()
+        cur.execute("SELECT property_type, price FROM pp_data WHERE date_of_transfer >= %s AND date_of_transfer < %s",
+                    (start_date, end_date))
+        df = pd.DataFrame(cur.fetchall(), columns=["property_type", "price"])
+        return [(property_type, list(np.quantile(group.price.values.astype(float), quantiles)))
+                for property_type, group in df.groupby("property_type")]
+
+    def explain(self, conn, sql, params):
+        #reshape the query plan into the table, type and key fields of MariaDB's EXPLAIN, a type of ALL being a scan
+        cur = conn.cursor()
+        #sqlite does not plan a cached EXPLAIN again once indexes are added or dropped, so the schema version is
+        #put in the sql to keep the statement cache from answering with the plan made for an earlier schema
+        cur.execute("PRAGMA schema_version")
+        schema_version = cur.fetchall()[0][0]
+        cur.execute("EXPLAIN QUERY PLAN " + sql + " -- schema " + str(schema_version), params)
+        rows = []
+        for row in cur.fetchall():
+            detail = row[-1]
+            words = detail.split()
+            if words[0] not in ("SCAN", "SEARCH"):
+                continue
+            key = words[words.index("INDEX") + 1] if "INDEX" in words else None
+            rows.append({"table": words[1], "type": "ALL" if words[0] == "SCAN" else "range", "key": key, "detail": detail})
+        return rows
+
+class DuckDBBackend(EmbeddedBackend):
+    name = "duckdb"
+
+    def year(self, column):
+        return "YEAR(" + column + ")"
+
+    def month(self, column):
+        return "MONTH(" + column + ")"
+
+    def outcode(self, column):
+        return "split_part(" + column + ", ' ', 1)"
+
+    def column_definition(self, table, column, column_type):
+        if column == embedded_schemas[table].get("auto_increment"):
+            return column + " " + column_type + " DEFAULT nextval('" + table + "_" + column + "')"
+        return column + " " + column_type
+
+    def open_cursor(self, db):
+        #a duckdb cursor is a separate connection, which would not see the temporary tables of this one, so
+        #statements all run on the connection itself
+        return db
+
+    def close_cursor(self, cursor):
+        pass
+
+    def create_table(self, conn, table, replace=True):
+        cur = conn.cursor()
+        if replace:
+            cur.execute("DROP TABLE IF EXISTS " + table)
+        column = embedded_schemas[table].get("auto_increment")
+        if column is not None:
+            if replace:
+                cur.execute("DROP SEQUENCE IF EXISTS " + table + "_" + column)
+            cur.execute("CREATE SEQUENCE IF NOT EXISTS " + table + "_" + column + " START 1")
+        EmbeddedBackend.create_table(self, conn, table, replace=False)
+
+    def build_indexes(self, conn, table, index_scheme):
+        #duckdb keeps the min and max of each block of a column, which is what prunes the range conditions of the
+        #bounding box join, and its indexes only serve point lookups, so none are built
+        EmbeddedBackend.build_indexes(self, conn, table, index_scheme)
+
+    def insert_rows(self, conn, table, columns, rows):
+        #inserting a DataFrame is far faster than executemany, which runs one statement per row in duckdb
+        df = pd.DataFrame(self.convert_rows(table, columns, rows), columns=columns, dtype=object)
+        conn.db.register("fynesse_insert_rows", df)
+        try:
+            conn.db.execute("INSERT INTO " + table + " (" + ", ".join(columns) + ") SELECT * FROM fynesse_insert_rows")
+        finally:
+            conn.db.unregister("fynesse_insert_rows")
+
+    def upsert_rows(self, conn, table, keys, summed, rows):
+        #as for insert_rows, the rows are inserted from a DataFrame in one statement. Their keys must be distinct, as
+        #duckdb cannot update the same row twice in one statement
+        if not rows:
+            return
+        df = pd.DataFrame(rows, columns=keys + summed)
+        conn.db.register("fynesse_upsert_rows", df)
+        try:
+            conn.db.execute("INSERT INTO " + table + " (" + ", ".join(keys + summed) + ") SELECT * FROM fynesse_upsert_rows" +
+                            self.upsert(table, keys, summed))
+        finally:
+            conn.db.unregister("fynesse_upsert_rows")
+
+    def has_table(self, db, table):
+        return db.execute("SELECT table_name FROM information_schema.tables WHERE table_name = ?",
+                          [table]).fetchone() is not None
+
+    def rowcount(self, cursor, sql):
+        #duckdb returns the number of rows changed as the result of INSERT, UPDATE and DELETE
+        if sql.lstrip().split(None, 1)[0].upper() in ("INSERT", "UPDATE", "DELETE"):
+            row = cursor.fetchone()
+            return row[0] if row else 0
+        return -1
+
+    def price_quantiles(self, conn, quantiles, start_date, end_date):
+        cur = conn.cursor()
+        cur.execute("SELECT property_type, quantile_cont(price, [" + ", ".join(str(q) for q in quantiles) + """])
+                     FROM pp_data WHERE date_of_transfer >= %s AND date_of_transfer < %s GROUP BY property_type""",
+                    (start_date, end_date))
+        return [(row[0], list(row[1])) for row in cur.fetchall()]
+
+    def explain(self, conn, sql, params):
+        #duckdb always scans, skipping the blocks whose min and max fall outside the conditions
+        cur = conn.cursor()
+        cur.execute("EXPLAIN " + sql, params)
+        plan = "\n".join(row[-1] for row in cur.fetchall())
+        return [{"table": None, "type": "ALL" if "SCAN" in plan else "range", "key": None, "detail": plan}]
+
+mariadb = MariaDBBackend()
+embedded_backends = {"sqlite": SQLiteBackend(), "duckdb": DuckDBBackend()}
+
+def backend_for(conn):
+    return getattr(conn, "backend", mariadb)
+
+class EmbeddedCursor:
+    """
+    Cursor of an embedded database taking the %s parameters and `quoted` names used with pymysql. execute returns
+    the number of rows changed, as it does in pymysql
+    """
+    def __init__(self, cursor, backend):
+        self.cursor = cursor
+        self.backend = backend
+
+    def translate(self, sql):
+        return sql.replace("%s", "?").replace("`", '"')
+
+    @property
+    def description(self):
+        return self.cursor.description
+
+    def execute(self, sql, params=None):
+        self.cursor.execute(self.translate(sql), list(params) if params is not None else [])
+        return self.backend.rowcount(self.cursor, sql)
+
+    def executemany(self, sql, rows):
+        rows = [list(row) for row in rows]
+        if rows:
+            self.cursor.executemany(self.translate(sql), rows)
+        return len(rows)
+
+    def fetchone(self):
+        return self.cursor.fetchone()
+
+    def fetchall(self):
+        return self.cursor.fetchall()
+
+    def fetchmany(self, size):
+        return self.cursor.fetchmany(size)
+
+    def close(self):
+        self.backend.close_cursor(self.cursor)
+
+class EmbeddedConnection:
+    """
+    Connection to an in process SQLite or DuckDB database, which can be passed as conn in place of a pymysql connection
+    """
+    def __init__(self, db, backend):
+        self.db = db
+        self.backend = backend
+
+    def cursor(self, cursor_type=None):
+        #every embedded cursor streams its results, so the unbuffered cursor_type of pymysql is not needed
+        return EmbeddedCursor(self.backend.open_cursor(self.db), self.backend)
+
+    def has_table(self, table):
+        return self.backend.has_table(self.db, table)
+
+    def commit(self):
+        #duckdb commits each statement as it runs
+        if self.backend.name == "sqlite":
+            self.db.commit()
+
+    def close(self):
+        self.commit()
+        self.db.close()
+
+def connect_embedded(path=":memory:", backend="sqlite"):
+    """
+    Open an embedded database stored at path, or in memory
+    :param backend: sqlite or duckdb
+    :return: EmbeddedConnection
+    """
+    if backend == "sqlite":
+        db = sqlite3.connect(path, check_same_thread=False)
+    elif backend == "duckdb":
+        import duckdb
+        db = duckdb.connect(path)
+    else:
+        raise ValueError("Unknown embedded backend: " + str(backend))
+    return EmbeddedConnection(db, embedded_backends[backend])
@@ -0,0 +1,566 @@
+# This file contains benchmarks for the slow parts of the pipeline, run against synthetic data
+
+from . import access
+from . import assess
+from . import address
+from . import backends
+from . import geocoder
+from . import models
+from . import pois
+from . import service
+
+import numpy as np
+import pandas as pd
+import geopandas as gpd
+from shapely.geometry import Point
+
+import asyncio
+import csv
+import io
+import json
+import os
+import platform
+import tempfile
+import time
+import warnings
+from contextlib import contextmanager, redirect_stdout
+from datetime import datetime
+
+"""Time the pipeline on made up data, so changes can be compared without downloading the real datasets"""
+
+#postcode areas the synthetic postcodes are spread over, as (area, latitude, longitude, spread in degrees,
+#share of postcodes, country, town, price relative to the median), covering cities across England and Wales
+synthetic_areas = [
+    ("E", 51.53, -0.03, 0.04, 4, "England", "LONDON", 2.0), ("N", 51.58, -0.11, 0.04, 3, "England", "LONDON", 2.2),
+    ("NW", 51.55, -0.20, 0.04, 3, "England", "LONDON", 2.6), ("SE", 51.46, -0.05, 0.05, 4, "England", "LONDON", 1.9),
+    ("SW", 51.46, -0.17, 0.04, 4, "England", "LONDON", 2.8), ("W", 51.51, -0.25, 0.04, 3, "England", "LONDON", 2.7),
+    ("B", 52.48, -1.89, 0.08, 6, "England", "BIRMINGHAM", 0.9), ("M", 53.48, -2.24, 0.07, 5, "England", "MANCHESTER", 0.85),
+    ("L", 53.41, -2.98, 0.06, 4, "England", "LIVERPOOL", 0.7), ("LS", 53.80, -1.55, 0.07, 4, "England", "LEEDS", 0.85),
+    ("S", 53.38, -1.47, 0.07, 4, "England", "SHEFFIELD", 0.75), ("BS", 51.45, -2.59, 0.06, 4, "England", "BRISTOL", 1.3),
+    ("NE", 54.98, -1.61, 0.08, 4, "England", "NEWCASTLE UPON TYNE", 0.65), ("NG", 52.95, -1.15, 0.07, 3, "England", "NOTTINGHAM", 0.8),
+    ("LE", 52.63, -1.13, 0.08, 3, "England", "LEICESTER", 0.9), ("CB", 52.20, 0.12, 0.08, 2, "England", "CAMBRIDGE", 1.6),
+    ("OX", 51.75, -1.26, 0.08, 2, "England", "OXFORD", 1.6), ("BN", 50.83, -0.14, 0.06, 3, "England", "BRIGHTON", 1.4),
+    ("PL", 50.37, -4.14, 0.08, 2, "England", "PLYMOUTH", 0.8), ("NR", 52.63, 1.30, 0.10, 2, "England", "NORWICH", 1.0),
+    ("YO", 53.96, -1.08, 0.10, 2, "England", "YORK", 1.05), ("EX", 50.72, -3.53, 0.10, 2, "England", "EXETER", 1.1),
+    ("CF", 51.48, -3.18, 0.06, 3, "Wales", "CARDIFF", 0.85), ("SA", 51.62, -3.94, 0.10, 2, "Wales", "SWANSEA", 0.65),
+]
+
+#sales in England and Wales each year in millions, roughly as in the price paid data, so the years differ in size
+#as the real ones do
+yearly_sales = {1995: 0.80, 1996: 0.95, 1997: 1.05, 1998: 1.05, 1999: 1.15, 2000: 1.10, 2001: 1.20, 2002: 1.30,
+                2003: 1.20, 2004: 1.20, 2005: 1.05, 2006: 1.30, 2007: 1.25, 2008: 0.65, 2009: 0.60, 2010: 0.66,
+                2011: 0.66, 2012: 0.67, 2013: 0.80, 2014: 0.98, 2015: 1.00, 2016: 1.00, 2017: 1.05, 2018: 1.02,
+                2019: 1.00, 2020: 0.90, 2021: 1.20}
+
+#share of sales and price relative to a semi-detached house of each property type
+property_type_shares = {"D": 0.23, "S": 0.28, "T": 0.29, "F": 0.18, "O": 0.02}
+property_type_prices = {"D": 1.6, "S": 1.0, "T": 0.85, "F": 0.8, "O": 1.2}
+
+#letters used in the last two characters of postcodes
+unit_letters = list("ABDEFGHJLNPQRSTUWXYZ")
+
+def synthetic_postcodes(num_postcodes, districts_per_area=20, seed=0):
+    """
+    Return up to num_postcodes made up postcodes as rows of postcode_data, with the columns of the postcode csv.
+    Postcodes are shared between synthetic_areas by their share, each area's districts are scattered around
+    its centre and each district's postcodes around the district, so they are as clustered as real postcodes
+    """
+    rng = np.random.default_rng(seed)
+    areas = pd.DataFrame(synthetic_areas, columns=["area", "lat", "lon", "spread", "share", "country", "town", "price"])
+    district_lats = rng.normal(areas.lat.values[:, None], areas.spread.values[:, None], (len(areas), districts_per_area))
+    district_lons = rng.normal(areas.lon.values[:, None], 1.6 * areas.spread.values[:, None], (len(areas), districts_per_area))
+
+    area = rng.choice(len(areas), num_postcodes, p=areas.share.values / areas.share.sum())
+    district = rng.integers(0, districts_per_area, num_postcodes)
+    spread = areas.spread.values[area] / 4
+    outcodes = areas.area.values[area] + (district + 1).astype(str)
+    incodes = (rng.integers(0, 10, num_postcodes).astype(str) + rng.choice(unit_letters, num_postcodes) +
+               rng.choice(unit_letters, num_postcodes))
+    lats = rng.normal(district_lats[area, district], spread)
+    lons = rng.normal(district_lons[area, district], 1.6 * spread)
+
+    df = pd.DataFrame({"postcode": pd.Series(outcodes) + " " + incodes, "status": "live", "usertype": "small",
+                       #a rough flat projection, near enough to the national grid for made up data
+                       "easting": (400000 + (lons + 2) * 111320 * np.cos(np.radians(lats))).astype(int),
+                       "northing": (-100000 + (lats - 49) * 110950).astype(int),
+                       "positional_quality_indicator": 1, "country": areas.country.values[area],
+                       "lattitude": lats.round(6), "longitude": lons.round(6)})
+    df["postcode_no_space"] = pd.Series(outcodes) + incodes
+    df["postcode_fixed_width_seven"] = pd.Series(outcodes).str.ljust(4) + incodes
+    df["postcode_fixed_width_eight"] = pd.Series(outcodes).str.ljust(4) + " " + incodes
+    df["postcode_area"] = areas.area.values[area]
+    df["postcode_district"] = outcodes
+    df["postcode_sector"] = pd.Series(outcodes) + " " + incodes.astype("U1")
+    df["outcode"] = outcodes
+    df["incode"] = incodes
+    #the town and price level of each postcode are kept for making sales, and left out of the csv
+    df["town"] = areas.town.values[area]
+    df["price_level"] = areas.price.values[area]
+    return df.drop_duplicates("postcode").reset_index(drop=True)
+
+def write_synthetic_postcode_csv(filepath, postcodes):
+    """
+    Write postcodes, as returned by synthetic_postcodes, to filepath in the same format as the postcode csv
+    """
+    postcodes[access.postcode_data_csv_columns].to_csv(filepath, header=False, index=False, quoting=csv.QUOTE_ALL)
+
+def sales_per_year(rows, years):
+    """
+    Return the number of synthetic sales to make in each of years, sharing rows between them as yearly_sales does
+    """
+    weights = np.array([yearly_sales.get(year, 1) for year in years])
+    counts = np.floor(rows * weights / weights.sum()).astype(int)
+    counts[:rows - counts.sum()] += 1
+    return dict(zip(years, counts.tolist()))
+
+def synthetic_pp_data(postcodes, year, rows, rng, first=0):
+    """
+    Return rows of made up sales from the given year in postcodes, as a DataFrame with the columns of the price
+    paid csvs, numbered from first. Prices depend on the area, property type and year, and have the long right
+    tail of real prices
+    """
+    chosen = rng.integers(0, len(postcodes), rows)
+    property_types = rng.choice(list(property_type_shares), rows, p=list(property_type_shares.values()))
+    #prices rose by about 7% a year up to 2007, fell in 2008 and 2009 and have risen by about 4% a year since
+    index = 1.07 ** (min(year, 2007) - 1995) * 0.9 ** (min(max(year - 2007, 0), 2)) * 1.04 ** max(year - 2009, 0)
+    levels = postcodes.price_level.values[chosen] * np.vectorize(property_type_prices.get)(property_types) * index
+    prices = np.maximum(rng.lognormal(np.log(60000 * levels), 0.45), 100).astype(int)
+    dates = (np.datetime64(str(year) + "-01-01") + rng.integers(0, 365, rows)).astype(str)
+    towns = postcodes.town.values[chosen]
+
+    return pd.DataFrame({"transaction_unique_identifier": ["{" + str(year) + "-" + str(first + i) + "}" for i in range(rows)],
+                         "price": prices, "date_of_transfer": np.char.add(dates, " 00:00"),
+                         "postcode": postcodes.postcode.values[chosen], "property_type": property_types,
+                         "new_build_flag": rng.choice(list("YN"), rows, p=[0.1, 0.9]),
+                         #flats are almost all leasehold, and houses almost all freehold
+                         "tenure_type": np.where(property_types == "F", np.where(rng.random(rows) < 0.95, "L", "F"),
+                                                 np.where(rng.random(rows) < 0.9, "F", "L")),
+                         "primary_addressable_object_name": rng.integers(1, 200, rows).astype(str),
+                         "secondary_addressable_object_name": "", "street": "HIGH STREET", "locality": "",
+                         "town_city": towns, "district": towns, "county": towns,
+                         "ppd_category_type": "A", "record_status": "A"})
+
+def write_synthetic_pp_csv(filepath, year, rows, seed=0, postcodes=None, chunk_size=100000):
+    """
+    Write rows of made up sales from the given year to filepath, in the same format as the land registry csvs,
+    chunk_size rows at a time so tens of millions of rows can be written
+    :param postcodes: postcodes the sales are in, as returned by synthetic_postcodes, defaulting to 1000 of them
+    """
+    if postcodes is None:
+        postcodes = synthetic_postcodes(1000, seed=seed)
+    rng = np.random.default_rng(seed + year)
+    with open(filepath, "w", newline="") as f:
+        for start in range(0, rows, chunk_size):
+            chunk = synthetic_pp_data(postcodes, year, min(chunk_size, rows - start), rng, start)
+            chunk.to_csv(f, header=False, index=False, quoting=csv.QUOTE_ALL)
+
+#values of the tags of synthetic pois, and the share of pois with each tag key
+synthetic_poi_tags = {"amenity": (["restaurant", "cafe", "pub", "school", "bank", "place_of_worship", "parking"], 0.75),
+                      "healthcare": (["doctor", "pharmacy", "dentist", "hospital"], 0.15),
+                      "emergency": (["defibrillator", "ambulance_station", "fire_hydrant"], 0.10)}
+
+def synthetic_poi_fixture(postcodes, num_pois, seed=0):
+    """
+    Return num_pois made up pois placed near randomly chosen postcodes, so they are densest where the postcodes
+    are, tagged as amenities, healthcares or emergencies in the columns osmnx would use. The result can be passed
+    to pois.fixture_fetcher
+    """
+    rng = np.random.default_rng(seed)
+    chosen = rng.integers(0, len(postcodes), num_pois)
+    lats = rng.normal(postcodes.lattitude.values[chosen], 0.003)
+    lons = rng.normal(postcodes.longitude.values[chosen], 0.005)
+    keys = rng.choice(list(synthetic_poi_tags), num_pois, p=[share for _, share in synthetic_poi_tags.values()])
+    columns = {}
+    for key, (values, _) in synthetic_poi_tags.items():
+        columns[key] = np.where(keys == key, rng.choice(values, num_pois), None)
+    return gpd.GeoDataFrame(columns, geometry=gpd.points_from_xy(lons, lats), crs="EPSG:4326")
+
+def benchmark_pp_data_loading(connect, years=range(1995, 2001), rows_per_year=100000, workers=4):
+    """
+    Time loading synthetic yearly csvs into 'pp_data', first one year at a time and then with a pool of workers.
+    Recreates the pp_data table before each run
+    :param connect: function taking no arguments which returns a new connection
+    :return: dict of wall clock seconds taken by each run, and the number of rows loaded
+    """
+    with tempfile.TemporaryDirectory() as direc:
+        for year in years:
+            write_synthetic_pp_csv(os.path.join(direc, "pp-" + str(year) + ".csv"), year, rows_per_year)
+
+        def source(year):
+            return os.path.join(direc, "pp-" + str(year) + ".csv")
+
+        timings = {}
+        for name, num_workers in [("sequential", 1), ("parallel", workers)]:
+            conn = connect()
+            access.create_pp_data_table(conn)
+            conn.close()
+
+            start = time.perf_counter()
+            access.load_pp_data_parallel(connect, years, num_workers, os.path.join(direc, name + "_manifest.json"), source)
+            timings[name] = time.perf_counter() - start
+
+    timings["rows"] = rows_per_year * len(years)
+    return timings
+
+def benchmark_box_join(conn, lat, lon, start_date, end_date, box_sizes=(0.01, 0.02, 0.05, 0.1, 0.2), repeats=3):
+    """
+    Time the bounding box join of access.box_join_query at several box sizes, checking with EXPLAIN whether
+    each one is answered from the indexes or by scanning a whole table
+    :return: list of dicts holding the box size, best time over the repeats, number of rows and whether a scan was used
+    """
+    results = []
+    for box_size in box_sizes:
+        sql, params = access.box_join_query(lat, lon, box_size, start_date, end_date,
+                                            index_scheme=access.query_index_scheme(conn))
+        plan = access.explain_box_join(conn, lat, lon, box_size, start_date, end_date)
+
+        best = None
+        for _ in range(repeats):
+            cur = conn.cursor()
+            start = time.perf_counter()
+            cur.execute(sql, params)
+            rows = len(cur.fetchall())
+            taken = time.perf_counter() - start
+            best = taken if best is None else min(best, taken)
+
+        results.append({"box_size": box_size, "seconds": best, "rows": rows,
+                        "full_scan": any(row["type"] == "ALL" for row in plan)})
+    return results
+
+def synthetic_pois(lat, lon, box_size, num_pois, seed=0):
+    """
+    Return num_pois made up points spread over the box, each tagged as an amenity, emergency or healthcare
+    in the columns osmnx would use
+    """
+    rng = np.random.default_rng(seed)
+    lats = rng.uniform(lat - box_size/2, lat + box_size/2, num_pois)
+    lons = rng.uniform(lon - box_size/2, lon + box_size/2, num_pois)
+    kinds = rng.choice(["amenity", "emergency", "healthcare"], num_pois, p=[0.8, 0.05, 0.15])
+    return gpd.GeoDataFrame({kind: np.where(kinds == kind, "yes", None) for kind in ["amenity", "emergency", "healthcare"]},
+                            geometry=gpd.points_from_xy(lons, lats), crs="EPSG:4326")
+
+def benchmark_poi_counting(sizes=(1000, 10000, 100000), num_pois=2000, lat=52.2, lon=0.12, box_size=0.1, seed=0,
+                           max_loop_rows=1000):
+    """
+    Time counting the pois within 0.02 of each of a number of points, one point at a time with GeoDataFrame.distance
+    as predict_price used to, and in one batch with assess.count_pois_near
+    :param max_loop_rows: largest number of points counted one at a time, as the loop takes about 20 seconds for
+                          every 1000 points
+    :return: list of dicts holding the number of points and the seconds taken each way, with loop_seconds None
+             for sizes above max_loop_rows
+    """
+    pois = synthetic_pois(lat, lon, box_size, num_pois, seed)
+    poi_sets = {kind: pois[pois[kind].notna()] for kind in ["amenity", "emergency", "healthcare"]}
+    rng = np.random.default_rng(seed)
+
+    results = []
+    for size in sizes:
+        lats = rng.uniform(lat - box_size/2, lat + box_size/2, size)
+        lons = rng.uniform(lon - box_size/2, lon + box_size/2, size)
+
+        loop = None
+        if max_loop_rows is None or size <= max_loop_rows:
+            with warnings.catch_warnings():
+                #geopandas warns about distances in a geographic crs on every call, as predict_price ignored
+                warnings.simplefilter("ignore", UserWarning)
+                start = time.perf_counter()
+                for subset in poi_sets.values():
+                    [len(subset[subset.distance(Point(lons[i], lats[i])) < 0.02]) for i in range(size)]
+                loop = time.perf_counter() - start
+
+        start = time.perf_counter()
+        assess.count_pois_near(lats, lons, poi_sets)
+        batched = time.perf_counter() - start
+
+        results.append({"rows": size, "loop_seconds": loop, "batched_seconds": batched})
+    return results
+
+def benchmark_predict_prices(conn, queries, single_sample=10):
+    """
+    Measure the throughput of address.predict_prices on queries, and of calling address.predict_price one at a
+    time on single_sample of them, at most half, which are left out of the batched run. The default poi cache is
+    cleared before each, so both fetch their pois
+    :return: dict of queries per second each way
+    """
+    sample = queries.tail(min(single_sample, len(queries) // 2))
+    batch = queries.head(len(queries) - len(sample))
+
+    pois.get_default_cache().clear()
+    start = time.perf_counter()
+    address.predict_prices(conn, batch)
+    batched = len(batch) / (time.perf_counter() - start)
+
+    pois.get_default_cache().clear()
+    start = time.perf_counter()
+    for row in sample.itertuples():
+        address.predict_price(conn, row.latitude, row.longitude, row.date, row.property_type)
+    single = len(sample) / (time.perf_counter() - start)
+
+    return {"batched_queries_per_second": batched, "single_queries_per_second": single}
+
+def benchmark_geocoder(conn, path, sample_size=10000, batch_size=1000, seed=0):
+    """
+    Compare geocoder.Geocoder with postcode_data: the time to build and open the geocoder and its size against
+    the time and memory taken to read the same columns of the table into a DataFrame, and the time to look up
+    sample_size postcodes with the geocoder against querying the table batch_size postcodes at a time
+    :return: dict of the timings in seconds and sizes in bytes
+    """
+    start = time.perf_counter()
+    geocoder.build_geocoder(conn, path)
+    build = time.perf_counter() - start
+
+    start = time.perf_counter()
+    gc = geocoder.Geocoder(path)
+    open_seconds = time.perf_counter() - start
+    file_bytes = sum(os.path.getsize(os.path.join(path, name)) for name in ("keys.npy", "lats.npy", "lons.npy"))
+
+    start = time.perf_counter()
+    df = pd.read_sql_query("SELECT postcode, lattitude, longitude FROM postcode_data", conn)
+    table_seconds = time.perf_counter() - start
+    table_bytes = int(df.memory_usage(deep=True).sum())
+
+    rng = np.random.default_rng(seed)
+    postcodes = list(df.postcode.values[rng.integers(0, len(df), sample_size)])
+
+    start = time.perf_counter()
+    gc.lookup(postcodes)
+    lookup = time.perf_counter() - start
+
+    start = time.perf_counter()
+    cur = conn.cursor()
+    for i in range(0, len(postcodes), batch_size):
+        batch = postcodes[i:i + batch_size]
+        cur.execute("SELECT postcode, lattitude, longitude FROM postcode_data WHERE postcode IN (" +
+                    ", ".join(["%s"] * len(batch)) + ")", batch)
+        cur.fetchall()
+    query = time.perf_counter() - start
+
+    return {"build_seconds": build, "open_seconds": open_seconds, "geocoder_file_bytes": file_bytes,
+            "table_read_seconds": table_seconds, "table_dataframe_bytes": table_bytes,
+            "lookups": sample_size, "geocoder_lookup_seconds": lookup, "table_query_seconds": query}
+
+def benchmark_typed_reads(conn, rows=1000000, columns=("price", "date_of_transfer", "property_type", "lattitude", "longitude"),
+                          chunk_size=100000):
+    """
+    Compare the memory taken by rows of the joined pp_data and postcode_data read with pd.read_sql_query, as all
+    of the columns of the bounding box join, against access.read_typed reading the same columns and reading only
+    the given columns, those the model uses by default
+    :return: dict of the rows read, and the bytes per row and seconds taken by each read
+    """
+    def join_query(selected):
+        return ("SELECT " + ", ".join(access.box_join_columns[column] for column in selected) +
+                " FROM postcode_data po INNER JOIN pp_data pp ON (pp.postcode = po.postcode) LIMIT " + str(int(rows)))
+
+    with warnings.catch_warnings():
+        #pandas warns about connections which are not sqlalchemy ones
+        warnings.simplefilter("ignore", UserWarning)
+        untyped, untyped_seconds = timed(pd.read_sql_query, join_query(access.box_join_columns), conn)
+    typed, typed_seconds = timed(access.read_typed, conn, join_query(access.box_join_columns), chunk_size=chunk_size)
+    projected, projected_seconds = timed(access.read_typed, conn, join_query(columns), chunk_size=chunk_size)
+
+    return {"rows": len(untyped), "untyped_bytes_per_row": access.bytes_per_row(untyped), "untyped_seconds": untyped_seconds,
+            "typed_bytes_per_row": access.bytes_per_row(typed), "typed_seconds": typed_seconds,
+            "projected_bytes_per_row": access.bytes_per_row(projected), "projected_seconds": projected_seconds}
+
+def benchmark_prediction_service(connect, queries, concurrency=32, window=0.05, workers=4):
+    """
+    Send queries to a service.PredictionService, with up to concurrency of them waiting at once, and measure the
+    latency of each and the throughput
+    :param connect: function taking no arguments which returns a new connection, such as one to an embedded
+                    database file
+    :param queries: DataFrame with latitude, longitude, date and property_type columns
+    :return: dict of queries per second, the number of batches they were predicted in and the latency percentiles
+    """
+    async def run():
+        limit = asyncio.Semaphore(concurrency)
+        async with service.PredictionService(connect, window=window, workers=workers) as svc:
+            async def request(row):
+                async with limit:
+                    return await svc.predict_price(row.latitude, row.longitude, row.date, row.property_type)
+
+            start = time.perf_counter()
+            await asyncio.gather(*[request(row) for row in queries.itertuples()])
+            seconds = time.perf_counter() - start
+            stats = svc.stats()
+        return {"queries": len(queries), "queries_per_second": len(queries) / seconds, "batches": stats["batches"],
+                "mean_batch_size": stats["mean_batch_size"],
+                **{name: value for name, value in stats.items() if name.endswith("_seconds")}}
+
+    return asyncio.run(run())
+
+@contextmanager
+def fixture_pois(fixture):
+    """
+    Answer the default poi cache and scheduler from the GeoDataFrame fixture, with no rate limit, within the body
+    of a with statement, putting the previous ones back afterwards
+    """
+    previous = pois.default_cache, pois.default_scheduler
+    pois.default_cache = pois.POICache(fetcher=pois.fixture_fetcher(fixture))
+    pois.default_scheduler = pois.FetchScheduler(pois.default_cache, requests_per_second=None)
+    try:
+        yield pois.default_scheduler
+    finally:
+        pois.default_cache, pois.default_scheduler = previous
+
+def timed(func, *args, **kwargs):
+    """
+    Call func, returning its result and the seconds it took
+    """
+    start = time.perf_counter()
+    res = func(*args, **kwargs)
+    return res, time.perf_counter() - start
+
+def benchmark_ingestion(conn, postcode_filepath, pp_filepaths):
+    """
+    Time creating postcode_data and pp_data without their indexes, loading the csvs into them, then building the
+    indexes and computing the price quantiles
+    :param pp_filepaths: price paid csvs, in the format of the land registry's
+    :return: dict of the seconds taken by each step, the rows loaded and the rows loaded each second
+    """
+    access.create_postcode_data_table(conn, defer_indexes=True)
+    access.create_pp_data_table(conn, defer_indexes=True)
+
+    _, postcode_seconds = timed(access.upload_csv_file_to_postcode_data_table, conn, postcode_filepath)
+    pp_seconds = 0
+    rows = 0
+    stale_years = set()
+    for filepath in pp_filepaths:
+        loaded, seconds = timed(access.stream_csv_to_pp_data_table, conn, filepath, stale_years=stale_years)
+        rows += loaded
+        pp_seconds += seconds
+    _, index_seconds = timed(lambda: [access.build_indexes(conn, table) for table in ("postcode_data", "pp_data")])
+    _, quantile_seconds = timed(access.refresh_price_quantiles, conn, stale_years)
+
+    return {"postcode_data_seconds": postcode_seconds, "pp_data_seconds": pp_seconds, "index_seconds": index_seconds,
+            "quantile_seconds": quantile_seconds, "pp_data_rows": rows,
+            "pp_data_rows_per_second": rows / pp_seconds if pp_seconds else 0}
+
+def benchmark_aggregates(conn):
+    """
+    Time the aggregates of assess, both read from the summary tables and counted from pp_data
+    :return: dict of the seconds taken by each
+    """
+    return {"sales_over_time_seconds": timed(assess.sales_over_time, conn)[1],
+            "sales_over_time_recounted_seconds": timed(assess.sales_over_time, conn, False)[1],
+            "price_quantiles_seconds": timed(assess.price_quantiles, conn)[1],
+            "postcode_district_counts_seconds": timed(assess.postcode_district_counts, conn)[1],
+            "postcode_district_counts_recounted_seconds": timed(assess.postcode_district_counts, conn, False)[1]}
+
+def benchmark_poi_features(lats, lons, fixture, box_size=0.05, tags=("amenity", "emergency", "healthcare")):
+    """
+    Time counting the pois of fixture with each of tags in the box around every point through a poi cache, first
+    with the cache empty and then again once it is full, and counting them within 0.02 of every point as the
+    model's features are
+    :return: dict of the seconds taken by each, and the number of points
+    """
+    scheduler = pois.FetchScheduler(pois.POICache(fetcher=pois.fixture_fetcher(fixture)), requests_per_second=None)
+    _, cold = timed(assess.num_of_pois_by_tag_type_for_points, lats, lons, box_size, list(tags), scheduler)
+    _, warm = timed(assess.num_of_pois_by_tag_type_for_points, lats, lons, box_size, list(tags), scheduler)
+    poi_sets = {tag: fixture[fixture[tag].notna()] for tag in tags}
+    _, near = timed(assess.count_pois_near, lats, lons, poi_sets)
+    return {"points": len(lats), "box_counts_cold_seconds": cold, "box_counts_warm_seconds": warm,
+            "poi_requests": scheduler.requests, "count_pois_near_seconds": near}
+
+def run_benchmark_suite(results_path="benchmark_results.json", num_postcodes=100000, pp_rows=1000000,
+                        years=range(1995, 2022), num_pois=50000, backend="sqlite", path=":memory:",
+                        num_points=100, num_predictions=20, seed=0):
+    """
+    Generate postcode_data, pp_data and pois, and time loading them into an embedded database, the bounding box
+    join, the aggregates of assess, typed reads of up to 1M rows, counting pois and predicting prices against it. Everything is made from seed,
+    so runs with the same arguments can be compared
+    :param results_path: json file the results are written to
+    :param pp_rows: sales to make, shared between years as yearly_sales are. Tens of millions can be made, as
+                    the csvs are written and loaded in chunks, though path should then be a file rather than memory
+    :param backend: sqlite or duckdb, see backends.connect_embedded
+    :param num_points: postcodes the pois are counted around
+    :param num_predictions: prices predicted, in the last of years
+    :return: dict of the results, as written to results_path
+    """
+    years = list(years)
+    rng = np.random.default_rng(seed)
+    results = {"started": datetime.now().isoformat(timespec="seconds"),
+               "environment": {"python": platform.python_version(), "platform": platform.platform(),
+                               "numpy": np.__version__, "pandas": pd.__version__, "backend": backend},
+               "parameters": {"num_postcodes": num_postcodes, "pp_rows": pp_rows, "years": [years[0], years[-1]],
+                              "num_pois": num_pois, "num_points": num_points, "num_predictions": num_predictions,
+                              "seed": seed}}
+
+    with tempfile.TemporaryDirectory() as direc:
+        start = time.perf_counter()
+        postcodes = synthetic_postcodes(num_postcodes, seed=seed)
+        postcode_filepath = os.path.join(direc, "postcodes.csv")
+        write_synthetic_postcode_csv(postcode_filepath, postcodes)
+        pp_filepaths = []
+        for year, rows in sales_per_year(pp_rows, years).items():
+            pp_filepaths.append(os.path.join(direc, "pp-" + str(year) + ".csv"))
+            write_synthetic_pp_csv(pp_filepaths[-1], year, rows, seed, postcodes)
+        fixture = synthetic_poi_fixture(postcodes, num_pois, seed)
+        results["generate"] = {"seconds": time.perf_counter() - start, "postcodes": len(postcodes)}
+
+        conn = backends.connect_embedded(path, backend)
+        try:
+            results["ingest"] = benchmark_ingestion(conn, postcode_filepath, pp_filepaths)
+        except Exception:
+            conn.close()
+            raise
+
+    try:
+        #centred on a postcode in the first area, so the boxes are in a city
+        centre = postcodes.iloc[0]
+        last_year = str(years[-1])
+        results["box_join"] = benchmark_box_join(conn, centre.lattitude, centre.longitude, last_year + "-01-01",
+                                                 last_year + "-12-31")
+        results["aggregates"] = benchmark_aggregates(conn)
+        results["typed_reads"] = benchmark_typed_reads(conn, min(pp_rows, 1000000))
+
+        points = postcodes.iloc[rng.integers(0, len(postcodes), num_points)]
+        results["poi_features"] = benchmark_poi_features(points.lattitude.values, points.longitude.values, fixture)
+
+        chosen = postcodes.iloc[rng.integers(0, len(postcodes), num_predictions)]
+        queries = pd.DataFrame({"latitude": chosen.lattitude.values, "longitude": chosen.longitude.values,
+                                "date": last_year + "-" + pd.Series(rng.integers(1, 13, num_predictions)).map("{:02d}".format) + "-15",
+                                "property_type": rng.choice(list(property_type_shares)[:4], num_predictions)})
+        with fixture_pois(fixture), redirect_stdout(io.StringIO()):
+            #predictions print their progress, which would drown out everything else
+            results["predict"] = benchmark_predict_prices(conn, queries, single_sample=min(5, num_predictions))
+            model_cache = models.ModelCache()
+            pois.get_default_cache().clear()
+            (_, profile), cold = timed(address.predict_prices, conn, queries, model_cache=model_cache, profile=True)
+            _, warm = timed(address.predict_prices, conn, queries, model_cache=model_cache)
+        results["predict"].update({"model_cache_cold_seconds": cold, "model_cache_warm_seconds": warm,
+                                   "stage_seconds": profile.summary()["self_seconds"].to_dict()})
+    finally:
+        conn.close()
+
+    with open(results_path, "w") as f:
+        json.dump(results, f, indent=2, default=lambda value: value.item() if isinstance(value, np.generic) else str(value))
+    return results
+
+def flatten_results(results, prefix=""):
+    """
+    Return the numbers within results, as read from the json written by run_benchmark_suite, keyed by their path
+    """
+    if isinstance(results, dict):
+        items = results.items()
+    elif isinstance(results, list):
+        items = enumerate(results)
+    else:
+        return {prefix: results} if isinstance(results, (int, float)) and not isinstance(results, bool) else {}
+    flat = {}
+    for key, value in items:
+        flat.update(flatten_results(value, prefix + "." + str(key) if prefix else str(key)))
+    return flat
+
+def compare_benchmark_results(before_path, after_path):
+    """
+    Compare the results of two runs of run_benchmark_suite, written to before_path and after_path
+    :return: DataFrame of each number in both runs, with the ratio of the second to the first
+    """
+    with open(before_path) as f:
+        before = flatten_results(json.load(f))
+    with open(after_path) as f:
+        after = flatten_results(json.load(f))
+    df = pd.DataFrame({"before": pd.Series(before, dtype=float), "after": pd.Series(after, dtype=float)}).dropna()
+    df["ratio"] = df.after / df.before.replace(0, np.nan)
+    return df
+
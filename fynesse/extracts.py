@@ -0,0 +1,233 @@
+# This file contains a store of points of interest read from a local open street map extract
+
+from . import pois
+
+import geopandas as gpd
+import pandas as pd
+import shapely.wkb
+
+import json
+import sqlite3
+import threading
+
+"""For use without a connection to open street map, pois can be read once from an extract, a .osm.pbf file (which needs the osmium package) or a GeoJSON file, into a sqlite database. Each poi is indexed by its representative point in an R-tree and by its tags, so the pois in a box are found without reading the rest. An ExtractStore can be used as the fetcher of a pois.POICache, through extract_fetcher, or passed straight to assess.get_pois as its cache."""
+
+#tag keys kept when reading an extract, the poi types used in address
+extract_keys = ["amenity", "emergency", "healthcare", "highway", "leisure", "man_made", "military", "power",
+                "public_transport", "railway", "sport", "tourism"]
+
+class ExtractStore:
+    """
+    Pois read from open street map extracts, stored in a sqlite database at path
+    """
+    def __init__(self, path=":memory:"):
+        self.lock = threading.Lock()
+        self.db = sqlite3.connect(path, check_same_thread=False)
+        self.db.execute("""CREATE TABLE IF NOT EXISTS pois (
+                             id INTEGER PRIMARY KEY,
+                             geometry BLOB NOT NULL,
+                             tags TEXT NOT NULL)""")
+        self.db.execute("CREATE VIRTUAL TABLE IF NOT EXISTS pois_rtree USING rtree(id, min_x, max_x, min_y, max_y)")
+        self.db.execute("""CREATE TABLE IF NOT EXISTS poi_tags (
+                             id INTEGER NOT NULL,
+                             key TEXT NOT NULL,
+                             value TEXT NOT NULL)""")
+        self.db.execute("CREATE INDEX IF NOT EXISTS poi_tags_id ON poi_tags (id, key, value)")
+        #the box covered by each extract read, so boxes outside of them can be sent elsewhere
+        self.db.execute("""CREATE TABLE IF NOT EXISTS extracts (
+                             source TEXT PRIMARY KEY,
+                             north REAL NOT NULL, south REAL NOT NULL, east REAL NOT NULL, west REAL NOT NULL)""")
+        self.db.commit()
+
+    def insert(self, geometries, tags):
+        """
+        Store pois, given as shapely geometries along with a dict of the tags of each
+        """
+        with self.lock:
+            first = self.db.execute("SELECT COALESCE(MAX(id), 0) + 1 FROM pois").fetchone()[0]
+            ids = range(first, first + len(geometries))
+            points = [geometry.representative_point() for geometry in geometries]
+            self.db.executemany("INSERT INTO pois VALUES (?, ?, ?)",
+                                [(i, shapely.wkb.dumps(geometry), json.dumps(poi_tags))
+                                 for i, geometry, poi_tags in zip(ids, geometries, tags)])
+            self.db.executemany("INSERT INTO pois_rtree VALUES (?, ?, ?, ?, ?)",
+                                [(i, point.x, point.x, point.y, point.y) for i, point in zip(ids, points)])
+            self.db.executemany("INSERT INTO poi_tags VALUES (?, ?, ?)",
+                                [(i, key, str(value)) for i, poi_tags in zip(ids, tags) for key, value in poi_tags.items()])
+            self.db.commit()
+
+    def record_extract(self, source, north, south, east, west):
+        with self.lock:
+            self.db.execute("INSERT OR REPLACE INTO extracts VALUES (?, ?, ?, ?, ?)", (source, north, south, east, west))
+            self.db.commit()
+
+    def ingest_geojson(self, filepath, keys=None, bounds=None):
+        """
+        Read the pois of a GeoJSON file, whose properties are open street map tags, keeping those with any of keys
+        :param keys: tag keys to keep, defaults to extract_keys
+        :param bounds: north, south, east and west edges of the area the file covers, defaulting to the box around its pois
+        :return: number of pois stored
+        """
+        keys = extract_keys if keys is None else keys
+        gdf = gpd.read_file(filepath).to_crs("EPSG:4326")
+        kept = gdf[[key for key in keys if key in gdf]].notna().any(axis=1) if any(key in gdf for key in keys) else []
+        gdf = gdf[kept] if len(kept) else gdf.iloc[:0]
+        properties = gdf.drop(columns="geometry")
+        tags = [{k: v for k, v in row.items() if isinstance(v, (str, int, float)) and pd.notna(v)}
+                for row in properties.to_dict("records")]
+        self.insert(list(gdf.geometry), tags)
+
+        if bounds is None:
+            west, south, east, north = gdf.total_bounds if len(gdf) else (0, 0, 0, 0)
+            bounds = (north, south, east, west)
+        self.record_extract(filepath, *bounds)
+        return len(gdf)
+
+    def ingest_pbf(self, filepath, keys=None, chunk_size=10000):
+        """
+        Read the nodes, ways and areas of a .osm.pbf extract with any of keys, using osmium
+        :param keys: tag keys to keep, defaults to extract_keys
+        :return: number of pois stored
+        """
+        import osmium
+
+        keys = set(extract_keys if keys is None else keys)
+        factory = osmium.geom.WKBFactory()
+        store = self
+        pending = {"geometries": [], "tags": [], "count": 0}
+
+        def add(create, obj):
+            tags = {tag.k: tag.v for tag in obj.tags}
+            if not keys & tags.keys():
+                return
+            try:
+                geometry = shapely.wkb.loads(create(obj), hex=True)
+            except RuntimeError:
+                #osmium cannot build geometries with missing or invalid locations
+                return
+            pending["geometries"].append(geometry)
+            pending["tags"].append(tags)
+            if len(pending["geometries"]) >= chunk_size:
+                flush()
+
+        def flush():
+            store.insert(pending["geometries"], pending["tags"])
+            pending["count"] += len(pending["geometries"])
+            pending["geometries"], pending["tags"] = [], []
+
+        class Handler(osmium.SimpleHandler):
+            def node(self, n):
+                add(factory.create_point, n)
+
+            def way(self, w):
+                #closed ways are read as areas
+                if not w.is_closed():
+                    add(factory.create_linestring, w)
+
+            def area(self, a):
+                add(factory.create_multipolygon, a)
+
+        Handler().apply_file(filepath, locations=True)
+        flush()
+
+        box = osmium.io.Reader(filepath, osmium.osm.osm_entity_bits.NOTHING).header().box()
+        if box.valid():
+            self.record_extract(filepath, box.top_right.lat, box.bottom_left.lat, box.top_right.lon, box.bottom_left.lon)
+        else:
+            with self.lock:
+                row = self.db.execute("SELECT MAX(max_y), MIN(min_y), MAX(max_x), MIN(min_x) FROM pois_rtree").fetchone()
+            self.record_extract(filepath, *[value or 0 for value in row])
+        return pending["count"]
+
+    def covers(self, north, south, east, west):
+        """
+        Return whether the box lies within one of the extracts read
+        """
+        with self.lock:
+            return self.db.execute("SELECT 1 FROM extracts WHERE north >= ? AND south <= ? AND east >= ? AND west <= ?",
+                                   (north, south, east, west)).fetchone() is not None
+
+    def fetch_query(self, north, south, east, west, tags):
+        """
+        Return the sql and params selecting the geometry and tags of the pois with the given tags in the box, or None
+        if no tags are given. The ids in the box are read from the R-tree first, and each is then checked for the tags,
+        so the box rather than the tags decides how many pois are read
+        """
+        conditions, params = [], []
+        for key, value in tags.items():
+            if value is True:
+                conditions.append("t.key = ?")
+                params.append(key)
+            else:
+                values = [value] if isinstance(value, str) else list(value)
+                conditions.append("(t.key = ? AND t.value IN (" + ",".join("?" * len(values)) + "))")
+                params += [key] + [str(v) for v in values]
+        if not conditions:
+            return None
+
+        #CROSS JOIN keeps sqlite from reordering the join, so pois_rtree is always read first
+        sql = """SELECT p.geometry, p.tags FROM
+                   (SELECT id FROM pois_rtree WHERE min_x >= ? AND max_x <= ? AND min_y >= ? AND max_y <= ?) AS r
+                 CROSS JOIN pois p ON (p.id = r.id)
+                 WHERE EXISTS (SELECT 1 FROM poi_tags t WHERE t.id = p.id AND (""" + " OR ".join(conditions) + "))"
+        return sql, [west, east, south, north] + params
+
+    def fetch(self, north, south, east, west, tags):
+        """
+        Return the pois with the given tags whose representative point is within the box, as a GeoDataFrame with a
+        column for each tag key, as osmnx returns them
+        """
+        query = self.fetch_query(north, south, east, west, tags)
+        if query is None:
+            return gpd.GeoDataFrame(geometry=[], crs="EPSG:4326")
+
+        with self.lock:
+            rows = self.db.execute(*query).fetchall()
+        return gpd.GeoDataFrame([json.loads(poi_tags) for _, poi_tags in rows],
+                                geometry=[shapely.wkb.loads(geometry) for geometry, _ in rows], crs="EPSG:4326")
+
+    def explain_fetch(self, north, south, east, west, tags):
+        """
+        Return the detail of each row of sqlite's EXPLAIN QUERY PLAN for fetch
+        """
+        query = self.fetch_query(north, south, east, west, tags)
+        if query is None:
+            return []
+        with self.lock:
+            return [row[-1] for row in self.db.execute("EXPLAIN QUERY PLAN " + query[0], query[1]).fetchall()]
+
+    def check_fetch_uses_rtree(self, north, south, east, west, tags):
+        """
+        Raise a RuntimeError unless EXPLAIN QUERY PLAN shows fetch finding the pois in the box through the R-tree
+        before reading pois or their tags
+        """
+        plan = self.explain_fetch(north, south, east, west, tags)
+        if not plan:
+            return
+        if "pois_rtree VIRTUAL TABLE INDEX" not in plan[0]:
+            raise RuntimeError("pois_rtree is not read first in fetch: " + str(plan))
+        for detail in plan:
+            if detail.startswith("SCAN") and "pois_rtree" not in detail:
+                raise RuntimeError("full scan in fetch: " + str(plan))
+
+    def get_pois(self, lat, lon, box_size, tags):
+        """
+        Return the pois in the box as POICache.get_pois does, so the store can be passed to assess.get_pois as its cache
+        """
+        return self.fetch(lat + box_size/2, lat - box_size/2, lon + box_size/2, lon - box_size/2, tags)
+
+    def stats(self):
+        with self.lock:
+            return {"pois": self.db.execute("SELECT COUNT(*) FROM pois").fetchone()[0],
+                    "extracts": self.db.execute("SELECT COUNT(*) FROM extracts").fetchone()[0]}
+
+def extract_fetcher(store, fallback=pois.osmnx_fetcher):
+    """
+    Return a fetcher answering from store for boxes within the extracts it has read, and from fallback, which
+    defaults to open street map, for other boxes. With no fallback, boxes outside the extracts have no pois
+    """
+    def fetch(north, south, east, west, tags):
+        if store.covers(north, south, east, west) or fallback is None:
+            return store.fetch(north, south, east, west, tags)
+        return fallback(north, south, east, west, tags)
+    return fetch
@@ -0,0 +1,112 @@
+# This file contains a geocoder from postcodes to coordinates, held in arrays rather than the database
+
+import numpy as np
+import pymysql
+from scipy.spatial import cKDTree
+
+import os
+
+"""postcode_data holds several forms of every postcode along with its coordinates, and looking postcodes up means a join against all 2.6M rows of it. build_geocoder keeps just a sorted array of normalised postcodes, the postcode with its spaces removed and in upper case, and float32 arrays of their latitudes and longitudes, saved as .npy files which are memory mapped when opened, so many processes can share one copy. Lookups are vectorised binary searches over the sorted keys."""
+
+#longest postcode without its space, e.g. SW1A1AA
+key_length = 7
+
+def normalise_postcodes(postcodes):
+    """
+    Return the keys of postcodes, with spaces removed and in upper case, along with a mask of the postcodes
+    which are short enough to be valid and only hold ascii characters, as every real postcode does
+    """
+    keys = np.char.upper(np.char.replace(np.asarray(postcodes, dtype=str), " ", ""))
+    #a key is ascii when encoding it takes one byte per character
+    is_ascii = np.char.str_len(np.char.encode(keys, "utf-8")) == np.char.str_len(keys)
+    valid = (np.char.str_len(keys) <= key_length) & is_ascii
+    return np.where(valid, keys, "").astype("S" + str(key_length)), valid
+
+def format_postcodes(keys):
+    """
+    Return keys as postcodes, with the space put back in front of the last three characters
+    """
+    keys = np.char.decode(np.asarray(keys, dtype="S" + str(key_length)), "ascii")
+    return np.char.add(np.char.add(np.char.rstrip(np.array([key[:-3] for key in keys], dtype=str)), " "),
+                       np.array([key[-3:] for key in keys], dtype=str))
+
+def build_geocoder(conn, path, chunk_size=100000):
+    """
+    Build the geocoder from postcode_data and save it under path, streaming the table chunk_size rows at a time
+    :return: the Geocoder
+    """
+    cur = conn.cursor(pymysql.cursors.SSCursor)
+    cur.execute("SELECT postcode, lattitude, longitude FROM postcode_data")
+    keys, lats, lons = [], [], []
+    while True:
+        chunk = cur.fetchmany(chunk_size)
+        if not chunk:
+            break
+        postcodes, chunk_lats, chunk_lons = zip(*chunk)
+        chunk_keys, valid = normalise_postcodes(postcodes)
+        keys.append(chunk_keys[valid])
+        lats.append(np.asarray(chunk_lats, dtype=np.float32)[valid])
+        lons.append(np.asarray(chunk_lons, dtype=np.float32)[valid])
+    cur.close()
+
+    keys = np.concatenate(keys) if keys else np.array([], dtype="S" + str(key_length))
+    order = np.argsort(keys, kind="stable")
+    os.makedirs(path, exist_ok=True)
+    np.save(os.path.join(path, "keys.npy"), keys[order])
+    np.save(os.path.join(path, "lats.npy"), np.concatenate(lats)[order] if lats else np.array([], dtype=np.float32))
+    np.save(os.path.join(path, "lons.npy"), np.concatenate(lons)[order] if lons else np.array([], dtype=np.float32))
+    return Geocoder(path)
+
+class Geocoder:
+    """
+    Geocoder saved under path by build_geocoder. With mmap the arrays are read from disk as they are used,
+    rather than loaded into memory up front
+    """
+    def __init__(self, path, mmap=True):
+        mode = "r" if mmap else None
+        self.keys = np.load(os.path.join(path, "keys.npy"), mmap_mode=mode)
+        self.lats = np.load(os.path.join(path, "lats.npy"), mmap_mode=mode)
+        self.lons = np.load(os.path.join(path, "lons.npy"), mmap_mode=mode)
+        self.tree = None
+
+    def __len__(self):
+        return len(self.keys)
+
+    def nbytes(self):
+        return self.keys.nbytes + self.lats.nbytes + self.lons.nbytes
+
+    def find(self, postcodes):
+        """
+        Return the positions of postcodes in the arrays, or -1 for those which are not known
+        """
+        keys, valid = normalise_postcodes(postcodes)
+        if len(self.keys) == 0:
+            return np.full(len(keys), -1)
+        positions = np.minimum(np.searchsorted(self.keys, keys), len(self.keys) - 1)
+        found = valid & (self.keys[positions] == keys)
+        return np.where(found, positions, -1)
+
+    def lookup(self, postcodes):
+        """
+        Return the latitudes and longitudes of postcodes, which can be written with or without their space and
+        in any case, as float64 arrays holding NaN for unknown postcodes
+        """
+        positions = self.find(postcodes)
+        found = positions >= 0
+        lats = np.full(len(positions), np.nan)
+        lons = np.full(len(positions), np.nan)
+        lats[found] = self.lats[positions[found]]
+        lons[found] = self.lons[positions[found]]
+        return lats, lons
+
+    def nearest(self, lats, lons, k=1):
+        """
+        Return the k postcodes nearest each point, and their distances in degrees. The KD-tree used is built
+        the first time this is called
+        :return: arrays of postcodes and distances, with a column for each of the k nearest if k is more than 1
+        """
+        if self.tree is None:
+            self.tree = cKDTree(np.column_stack((np.asarray(self.lons, dtype=float), np.asarray(self.lats, dtype=float))))
+        distances, positions = self.tree.query(np.column_stack((np.asarray(lons, dtype=float), np.asarray(lats, dtype=float))), k)
+        postcodes = format_postcodes(self.keys[positions.ravel()]).reshape(positions.shape)
+        return postcodes, distances
@@ -0,0 +1,121 @@
+# This file contains a cache of the models fitted to make predictions
+
+from .config import *
+
+import collections
+import json
+import pickle
+import sqlite3
+import threading
+import time
+
+"""Fitting a model means joining the sales around a place, fetching its pois and fitting, so the models fitted by address.predict_prices are kept for reuse by later predictions in the same tile and date window. An entry holds everything needed to predict without going back to the database or open street map: the fitted parameters, the validation error, the property types seen in training and the locations of the pois used for the counts. Entries are kept in memory, evicting the least recently used, and optionally in a sqlite file so they outlive the process."""
+
+def model_key(tile_size, tile_y, tile_x, earliest, latest, features):
+    return json.dumps([tile_size, int(tile_y), int(tile_x), earliest, latest, features])
+
+class ModelCache:
+    """
+    Fitted models keyed by model_key, at most max_models held in memory, and all of them in the sqlite file at
+    path if given. An entry is stale, and fitted again, once it is older than max_age seconds, or if it was fitted
+    on data with a different version to the one given when it is looked up
+    """
+    def __init__(self, path=None, max_models=1000, max_age=None):
+        self.max_models = max_models
+        self.max_age = max_age
+        self.models = collections.OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.stale = 0
+        self.evictions = 0
+
+        self.lock = threading.Lock()
+        self.db = None
+        if path:
+            self.db = sqlite3.connect(path, check_same_thread=False)
+            self.db.execute("""CREATE TABLE IF NOT EXISTS models (
+                                 key TEXT PRIMARY KEY,
+                                 entry BLOB NOT NULL,
+                                 created REAL NOT NULL)""")
+            self.db.commit()
+
+    def is_stale(self, entry, data_version):
+        if self.max_age is not None and time.time() - entry["created"] > self.max_age:
+            return True
+        return data_version is not None and entry.get("data_version") != data_version
+
+    def get(self, key, property_types=(), data_version=None):
+        """
+        Return the entry stored against key, or None if there is none, it is stale, or it was not trained on all of
+        property_types
+        """
+        with self.lock:
+            entry = self.models.get(key)
+            if entry is None and self.db is not None:
+                row = self.db.execute("SELECT entry FROM models WHERE key = ?", (key,)).fetchone()
+                if row is not None:
+                    entry = pickle.loads(row[0])
+                    self.remember(key, entry)
+
+            if entry is not None and self.is_stale(entry, data_version):
+                self.stale += 1
+                self.forget(key)
+                entry = None
+            if entry is None or any(t not in entry["property_types"] for t in property_types):
+                self.misses += 1
+                return None
+
+            self.models.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def put(self, key, entry, data_version=None):
+        """
+        Store entry, a dict of the fitted model, against key, recording when it was made and the data version
+        """
+        entry = dict(entry, created=time.time(), data_version=data_version)
+        with self.lock:
+            self.remember(key, entry)
+            if self.db is not None:
+                self.db.execute("INSERT OR REPLACE INTO models VALUES (?, ?, ?)", (key, pickle.dumps(entry), entry["created"]))
+                self.db.commit()
+        return entry
+
+    def remember(self, key, entry):
+        self.models[key] = entry
+        self.models.move_to_end(key)
+        while len(self.models) > self.max_models:
+            #only dropped from memory, the file keeps every entry until it is stale
+            self.models.popitem(last=False)
+            self.evictions += 1
+
+    def forget(self, key):
+        self.models.pop(key, None)
+        if self.db is not None:
+            self.db.execute("DELETE FROM models WHERE key = ?", (key,))
+            self.db.commit()
+
+    def clear(self):
+        with self.lock:
+            self.models.clear()
+            if self.db is not None:
+                self.db.execute("DELETE FROM models")
+                self.db.commit()
+
+    def stats(self):
+        with self.lock:
+            lookups = self.hits + self.misses
+            return {"hits": self.hits, "misses": self.misses, "stale": self.stale, "evictions": self.evictions,
+                    "models": len(self.models), "hit_rate": self.hits / lookups if lookups else 0}
+
+default_model_cache = None
+
+def get_default_model_cache():
+    """
+    Return a model cache set up from the model_cache config values, the same one each time it is called
+    """
+    global default_model_cache
+    if default_model_cache is None:
+        default_model_cache = ModelCache(config.get("model_cache_path") or None, config.get("model_cache_size", 1000),
+                                         config.get("model_cache_max_age"))
+    return default_model_cache
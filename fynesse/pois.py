@@ -0,0 +1,380 @@
+# This file contains a persistent cache of points of interest from open street map
+
+from .config import *
+
+from . import profiling
+
+import osmnx as ox
+import geopandas as gpd
+import pandas as pd
+import shapely.wkb
+
+import json
+import math
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+"""Fetching pois from open street map is the slowest part of making a prediction, so pois are cached on disk in fixed size tiles. A box is answered by putting together the tiles it covers, and only the missing tiles are fetched. Where the pois come from is decided by a fetcher, any function taking (north, south, east, west, tags) and returning a GeoDataFrame, so a local fixture can stand in for open street map."""
+
+def osmnx_fetcher(north, south, east, west, tags):
+    """
+    Fetch the pois within the box with the given tags from open street map
+    """
+    try:
+        return ox.geometries_from_bbox(north, south, east, west, tags)
+    except Exception as e:
+        #osmnx raises rather than returning an empty result when there is nothing in the box
+        if type(e).__name__ in ("EmptyOverpassResponse", "InsufficientResponseError"):
+            return gpd.GeoDataFrame(geometry=[], crs="EPSG:4326")
+        raise
+
+def matching_tags(pois, tags):
+    """
+    Return a mask of the pois with any of tags, given as osmnx takes them. pois should have a column for each
+    tag key, as the results of osmnx do
+    """
+    has_tags = pd.Series(False, index=pois.index)
+    for key, value in tags.items():
+        if key not in pois:
+            continue
+        if value is True:
+            has_tags |= pois[key].notna()
+        elif isinstance(value, str):
+            has_tags |= pois[key] == value
+        else:
+            has_tags |= pois[key].isin(value)
+    return has_tags
+
+def merge_tags(tag_sets):
+    """
+    Return tags selecting every poi selected by any of tag_sets, so one request can fetch all of them
+    """
+    merged = {}
+    for tags in tag_sets:
+        for key, value in tags.items():
+            if value is True or merged.get(key) is True:
+                merged[key] = True
+            else:
+                values = [value] if isinstance(value, str) else list(value)
+                merged[key] = sorted(set(merged.get(key, [])) | set(values))
+    return merged
+
+def fixture_fetcher(pois):
+    """
+    Return a fetcher which answers from the GeoDataFrame pois instead of open street map, for use offline.
+    pois should have a column for each tag key, as the results of osmnx do
+    """
+    def fetch(north, south, east, west, tags):
+        points = pois.geometry.representative_point()
+        in_box = (points.y >= south) & (points.y <= north) & (points.x >= west) & (points.x <= east)
+        return pois[in_box & matching_tags(pois, tags)]
+    return fetch
+
+def tags_key(tags):
+    return json.dumps(tags, sort_keys=True)
+
+class POICache:
+    """
+    Pois stored by tile and set of tags in a sqlite database, evicting the least recently used tiles once more
+    than max_tiles are stored. Tiles being read by get_pois are pinned, so they are not evicted by another thread
+    before they are read. hits and misses count the tiles found in and missing from the cache
+    """
+    def __init__(self, path=":memory:", tile_size=0.01, max_tiles=10000, fetcher=osmnx_fetcher):
+        self.tile_size = tile_size
+        self.max_tiles = max_tiles
+        self.fetcher = fetcher
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        self.lock = threading.Lock()
+        #number of calls to get_pois using each (tags, tile), which evict leaves alone
+        self.pinned = {}
+        self.db = sqlite3.connect(path, check_same_thread=False)
+        self.db.execute("""CREATE TABLE IF NOT EXISTS tiles (
+                             tags TEXT NOT NULL,
+                             tile TEXT NOT NULL,
+                             last_used REAL NOT NULL,
+                             PRIMARY KEY (tags, tile))""")
+        self.db.execute("""CREATE TABLE IF NOT EXISTS pois (
+                             tags TEXT NOT NULL,
+                             tile TEXT NOT NULL,
+                             geometry BLOB NOT NULL,
+                             properties TEXT NOT NULL)""")
+        self.db.execute("CREATE INDEX IF NOT EXISTS pois_tile ON pois (tags, tile)")
+        self.db.commit()
+
+    def tile_of(self, lat, lon):
+        #the tile size is part of the name, so tiles cached with a different size are never mixed in
+        return str(self.tile_size) + ":" + str(math.floor(lon / self.tile_size)) + ":" + str(math.floor(lat / self.tile_size))
+
+    def tiles_covering(self, north, south, east, west):
+        tiles = []
+        for x in range(math.floor(west / self.tile_size), math.floor(east / self.tile_size) + 1):
+            for y in range(math.floor(south / self.tile_size), math.floor(north / self.tile_size) + 1):
+                tiles.append(str(self.tile_size) + ":" + str(x) + ":" + str(y))
+        return tiles
+
+    def tile_bounds(self, tile):
+        """
+        Return the north, south, east and west edges of tile
+        """
+        _, x, y = tile.split(":")
+        x, y = int(x), int(y)
+        return (y + 1) * self.tile_size, y * self.tile_size, (x + 1) * self.tile_size, x * self.tile_size
+
+    def cached_tiles(self, key, tiles):
+        with self.lock:
+            rows = self.db.execute("SELECT tile FROM tiles WHERE tags = ? AND tile IN (" + ",".join("?" * len(tiles)) + ")",
+                                   [key] + tiles).fetchall()
+        return set(row[0] for row in rows)
+
+    def fetch_tiles(self, tags, tiles):
+        """
+        Fetch the pois of tiles with one request covering all of them, and store each poi in the tile holding its
+        representative point
+        """
+        bounds = [self.tile_bounds(tile) for tile in tiles]
+        north, south = max(b[0] for b in bounds), min(b[1] for b in bounds)
+        east, west = max(b[2] for b in bounds), min(b[3] for b in bounds)
+        pois = self.fetcher(north, south, east, west, tags)
+        self.store_tiles(tags, tiles, pois)
+
+    def store_tiles(self, tags, tiles, pois):
+        """
+        Store pois, fetched from a box covering tiles, against the tiles holding their representative points.
+        pois in other tiles are left out, as they are stored when their own tile is fetched
+        """
+        key = tags_key(tags)
+        wanted = set(tiles)
+        rows = []
+        if len(pois) > 0:
+            points = pois.geometry.representative_point()
+            properties = pois.drop(columns="geometry")
+            for i in range(len(pois)):
+                tile = self.tile_of(points.iloc[i].y, points.iloc[i].x)
+                if tile not in wanted:
+                    continue
+                values = {k: v for k, v in properties.iloc[i].items() if isinstance(v, (str, int, float)) and pd.notna(v)}
+                rows.append((key, tile, shapely.wkb.dumps(pois.geometry.iloc[i]), json.dumps(values)))
+
+        now = time.time()
+        with self.lock:
+            self.db.execute("DELETE FROM pois WHERE tags = ? AND tile IN (" + ",".join("?" * len(tiles)) + ")",
+                            [key] + tiles)
+            self.db.executemany("INSERT INTO pois VALUES (?, ?, ?, ?)", rows)
+            self.db.executemany("INSERT OR REPLACE INTO tiles VALUES (?, ?, ?)", [(key, tile, now) for tile in tiles])
+            self.db.commit()
+
+    def evict(self):
+        with self.lock:
+            excess = self.db.execute("SELECT COUNT(*) FROM tiles").fetchone()[0] - self.max_tiles
+            if excess <= 0:
+                return
+            oldest = self.db.execute("SELECT tags, tile FROM tiles ORDER BY last_used LIMIT ?",
+                                     (excess + len(self.pinned),)).fetchall()
+            oldest = [tile for tile in oldest if tile not in self.pinned][:excess]
+            self.db.executemany("DELETE FROM pois WHERE tags = ? AND tile = ?", oldest)
+            self.db.executemany("DELETE FROM tiles WHERE tags = ? AND tile = ?", oldest)
+            self.db.commit()
+            self.evictions += len(oldest)
+
+    def pin(self, key, tiles):
+        with self.lock:
+            for tile in tiles:
+                self.pinned[(key, tile)] = self.pinned.get((key, tile), 0) + 1
+
+    def unpin(self, key, tiles):
+        with self.lock:
+            for tile in tiles:
+                self.pinned[(key, tile)] -= 1
+                if not self.pinned[(key, tile)]:
+                    del self.pinned[(key, tile)]
+
+    def get_pois(self, lat, lon, box_size, tags, evict=True):
+        """
+        Return the pois with the given tags whose representative point is within the box, as a GeoDataFrame
+        :param evict: whether to evict tiles beyond max_tiles afterwards, left off by callers reading many boxes
+                      which call evict once they are done
+        """
+        north, south = lat + box_size/2, lat - box_size/2
+        east, west = lon + box_size/2, lon - box_size/2
+        key = tags_key(tags)
+        tiles = self.tiles_covering(north, south, east, west)
+
+        #the tiles are pinned from before they are looked up until they are read, so the tiles found in the cache
+        #and those fetched stay there in between
+        self.pin(key, tiles)
+        try:
+            cached = self.cached_tiles(key, tiles)
+            missing = [tile for tile in tiles if tile not in cached]
+            with self.lock:
+                self.hits += len(tiles) - len(missing)
+                self.misses += len(missing)
+            profiling.record(tile_hits=len(tiles) - len(missing), tile_misses=len(missing))
+            if missing:
+                self.fetch_tiles(tags, missing)
+
+            with self.lock:
+                placeholders = ",".join("?" * len(tiles))
+                self.db.execute("UPDATE tiles SET last_used = ? WHERE tags = ? AND tile IN (" + placeholders + ")",
+                                [time.time(), key] + tiles)
+                self.db.commit()
+                rows = self.db.execute("SELECT geometry, properties FROM pois WHERE tags = ? AND tile IN (" + placeholders + ")",
+                                       [key] + tiles).fetchall()
+        finally:
+            self.unpin(key, tiles)
+        if evict:
+            self.evict()
+
+        pois = gpd.GeoDataFrame([json.loads(properties) for _, properties in rows],
+                                geometry=[shapely.wkb.loads(geometry) for geometry, _ in rows], crs="EPSG:4326")
+        points = pois.geometry.representative_point()
+        return pois[(points.y >= south) & (points.y <= north) & (points.x >= west) & (points.x <= east)]
+
+    def clear(self):
+        """
+        Remove every stored tile, so each box is fetched again
+        """
+        with self.lock:
+            self.db.execute("DELETE FROM pois")
+            self.db.execute("DELETE FROM tiles")
+            self.db.commit()
+
+    def stats(self):
+        with self.lock:
+            tiles = self.db.execute("SELECT COUNT(*) FROM tiles").fetchone()[0]
+            return {"hits": self.hits, "misses": self.misses, "evictions": self.evictions, "tiles": tiles}
+
+class FetchScheduler:
+    """
+    Answers many requests for pois at once through cache. The tiles missing from the cache for every request are
+    put together, so boxes which overlap are only fetched once, and grouped into blocks of block_tiles by
+    block_tiles tiles. Each block is fetched with a single request for the tags of all of the requests needing
+    it, and the blocks are fetched by up to workers threads, starting no more than requests_per_second requests
+    a second. requests and tiles_fetched count the requests made to the fetcher and the tiles they covered
+    """
+    def __init__(self, cache, workers=4, requests_per_second=1, block_tiles=10):
+        self.cache = cache
+        self.workers = workers
+        self.requests_per_second = requests_per_second
+        self.block_tiles = block_tiles
+        self.requests = 0
+        self.tiles_fetched = 0
+        self.boxes_requested = 0
+
+        self.lock = threading.Lock()
+        self.next_request = 0
+
+    def wait_for_turn(self):
+        #space out the starts of requests, so open street map is not sent more than requests_per_second
+        if not self.requests_per_second:
+            return
+        with self.lock:
+            now = time.monotonic()
+            start = max(now, self.next_request)
+            self.next_request = start + 1 / self.requests_per_second
+        time.sleep(start - now)
+
+    def missing_blocks(self, requests):
+        """
+        Return a dict mapping each block to a dict of the tiles missing from the cache within it for each set of tags
+        """
+        needed = {}
+        for lat, lon, box_size, tags in requests:
+            key = tags_key(tags)
+            needed.setdefault(key, set()).update(self.cache.tiles_covering(lat + box_size/2, lat - box_size/2,
+                                                                           lon + box_size/2, lon - box_size/2))
+        blocks = {}
+        for key, tiles in needed.items():
+            tiles = sorted(tiles)
+            cached = self.cache.cached_tiles(key, tiles)
+            for tile in tiles:
+                if tile in cached:
+                    continue
+                _, x, y = tile.split(":")
+                block = (int(x) // self.block_tiles, int(y) // self.block_tiles)
+                blocks.setdefault(block, {}).setdefault(key, []).append(tile)
+        return blocks
+
+    def fetch_block(self, missing):
+        """
+        Fetch the tiles of one block with a single request for all of the tags missing there, and store the pois of
+        each set of tags against its own tiles
+        """
+        tiles = set(tile for key_tiles in missing.values() for tile in key_tiles)
+        bounds = [self.cache.tile_bounds(tile) for tile in tiles]
+        north, south = max(b[0] for b in bounds), min(b[1] for b in bounds)
+        east, west = max(b[2] for b in bounds), min(b[3] for b in bounds)
+        tag_sets = {key: json.loads(key) for key in missing}
+
+        self.wait_for_turn()
+        pois = self.cache.fetcher(north, south, east, west, merge_tags(tag_sets.values()))
+        with self.lock:
+            self.requests += 1
+            self.tiles_fetched += len(tiles)
+
+        for key, tags in tag_sets.items():
+            self.cache.store_tiles(tags, missing[key], pois[matching_tags(pois, tags)] if len(pois) > 0 else pois)
+
+    def prefetch(self, requests):
+        """
+        Fetch every tile missing from the cache for requests, a list of (lat, lon, box_size, tags)
+        """
+        blocks = self.missing_blocks(requests)
+        with self.lock:
+            self.boxes_requested += len(requests)
+        profiling.record(poi_requests=len(blocks))
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            for future in [executor.submit(self.fetch_block, missing) for missing in blocks.values()]:
+                future.result()
+
+    def get_pois(self, requests):
+        """
+        Return a list of the pois for each of requests, a list of (lat, lon, box_size, tags), as POICache.get_pois would
+        """
+        self.prefetch(requests)
+        #the cache is evicted once every box is read, as evicting after each could drop tiles prefetched for the
+        #boxes still to be read once they cover more than max_tiles
+        res = [self.cache.get_pois(lat, lon, box_size, tags, evict=False) for lat, lon, box_size, tags in requests]
+        self.cache.evict()
+        return res
+
+    def stats(self):
+        with self.lock:
+            return {"boxes_requested": self.boxes_requested, "requests": self.requests, "tiles_fetched": self.tiles_fetched}
+
+default_cache = None
+
+def get_default_cache():
+    """
+    Return the cache used by assess.get_pois, set up from the poi_cache and poi_extract config values the first
+    time it is needed
+    """
+    global default_cache
+    if default_cache is None:
+        fetcher = osmnx_fetcher
+        if config.get("poi_extract_path"):
+            #answer from a local extract, read in with extracts.ExtractStore, falling back to open street map if set
+            from . import extracts
+            fetcher = extracts.extract_fetcher(extracts.ExtractStore(config["poi_extract_path"]),
+                                               osmnx_fetcher if config.get("poi_extract_fallback", True) else None)
+        default_cache = POICache(config.get("poi_cache_path") or ":memory:", config.get("poi_tile_size", 0.01),
+                                 config.get("poi_cache_max_tiles", 10000), fetcher)
+    return default_cache
+
+default_scheduler = None
+
+def get_default_scheduler():
+    """
+    Return the FetchScheduler over the default cache, set up from the poi_fetch config values the first time it
+    is needed. It is shared so its rate limit holds across callers
+    """
+    global default_scheduler
+    if default_scheduler is None or default_scheduler.cache is not get_default_cache():
+        default_scheduler = FetchScheduler(get_default_cache(), config.get("poi_fetch_workers", 4),
+                                           config.get("poi_requests_per_second", 1),
+                                           config.get("poi_fetch_block_tiles", 10))
+    return default_scheduler
@@ -0,0 +1,216 @@
+# This file contains a pool of database connections shared between callers
+
+from .config import *
+
+from . import access
+
+import threading
+import time
+from contextlib import contextmanager
+
+"""Long running jobs reuse a small number of connections rather than each making their own. Connections are checked before being handed out, as the server closes connections which have been idle for too long, and are remade with retries if the check fails. The pool is safe to use from many threads, and keeps track of how long callers wait and how busy its connections are."""
+
+class PooledConnection:
+    """
+    A connection borrowed from a ConnectionPool. It behaves as the connection it wraps, except that closing it
+    returns the connection to the pool, so it can be given to functions which close their connections when done
+    """
+    def __init__(self, pool, conn):
+        self.pool = pool
+        self.conn = conn
+
+    def __getattr__(self, name):
+        return getattr(self.conn, name)
+
+    def close(self):
+        if self.conn is not None:
+            self.pool.release(self)
+
+class ConnectionPool:
+    """
+    Pool of at most size connections, each made by calling connect
+    :param connect: function taking no arguments which returns a new connection, raising if it cannot
+    :param timeout: seconds to wait for a free connection before raising TimeoutError
+    :param max_retries: attempts made to connect before giving up, waiting retry_delay seconds after the first
+                        failure and doubling the wait after each one
+    :param check_after: seconds a connection can sit idle before it is pinged when next handed out
+    :param recycle: seconds after which a connection is closed and remade rather than handed out again
+    """
+    def __init__(self, connect, size=4, timeout=30, max_retries=3, retry_delay=1, check_after=60, recycle=3600):
+        self.connect = connect
+        self.size = size
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.retry_delay = retry_delay
+        self.check_after = check_after
+        self.recycle = recycle
+
+        self.condition = threading.Condition()
+        #idle connections as (connection, time made, time returned)
+        self.idle = []
+        self.in_use = {}
+        self.opened = 0
+        self.closed = False
+
+        self.created = time.perf_counter()
+        self.acquisitions = 0
+        self.wait_seconds = 0
+        self.max_wait_seconds = 0
+        self.busy_seconds = 0
+        self.connects = 0
+        self.reconnects = 0
+        self.failed_checks = 0
+
+    def open_connection(self):
+        """
+        Make a new connection, retrying with backoff
+        """
+        delay = self.retry_delay
+        for attempt in range(self.max_retries):
+            try:
+                conn = self.connect()
+                if conn is None:
+                    raise ConnectionError("connect returned None")
+                with self.condition:
+                    self.connects += 1
+                return conn
+            except Exception as e:
+                if attempt == self.max_retries - 1:
+                    raise
+                print("Connection failed, retrying in", delay, "seconds:", e)
+                time.sleep(delay)
+                delay *= 2
+
+    def healthy(self, conn, made, returned):
+        """
+        Check conn can still be used, pinging it if it has been idle for longer than check_after
+        """
+        now = time.time()
+        if now - made > self.recycle:
+            return False
+        if now - returned <= self.check_after or not hasattr(conn, "ping"):
+            return True
+        try:
+            conn.ping(reconnect=False)
+            return True
+        except Exception:
+            with self.condition:
+                self.failed_checks += 1
+            return False
+
+    def acquire(self, timeout=None):
+        """
+        Borrow a connection, waiting up to timeout seconds (defaulting to the pool's timeout) for one to be free.
+        The connection should be given back with release, or by closing it
+        :return: PooledConnection
+        """
+        timeout = self.timeout if timeout is None else timeout
+        start = time.perf_counter()
+        with self.condition:
+            while not self.idle and self.opened >= self.size:
+                if self.closed:
+                    raise RuntimeError("Connection pool is closed")
+                remaining = timeout - (time.perf_counter() - start)
+                if remaining <= 0 or not self.condition.wait(remaining):
+                    if not self.idle and self.opened >= self.size:
+                        raise TimeoutError("No connection free after " + str(timeout) + " seconds")
+            if self.closed:
+                raise RuntimeError("Connection pool is closed")
+            entry = self.idle.pop() if self.idle else None
+            if entry is None:
+                #reserve a place for the new connection before making it outside of the lock
+                self.opened += 1
+
+        try:
+            if entry is not None and not self.healthy(*entry):
+                close_quietly(entry[0])
+                with self.condition:
+                    self.reconnects += 1
+                entry = None
+            if entry is None:
+                entry = (self.open_connection(), time.time(), time.time())
+        except Exception:
+            with self.condition:
+                self.opened -= 1
+                self.condition.notify()
+            raise
+
+        waited = time.perf_counter() - start
+        pooled = PooledConnection(self, entry[0])
+        with self.condition:
+            self.acquisitions += 1
+            self.wait_seconds += waited
+            self.max_wait_seconds = max(self.max_wait_seconds, waited)
+            self.in_use[id(pooled)] = (entry[1], time.perf_counter())
+        return pooled
+
+    def release(self, pooled):
+        conn = pooled.conn
+        pooled.conn = None
+        with self.condition:
+            made, acquired = self.in_use.pop(id(pooled))
+            self.busy_seconds += time.perf_counter() - acquired
+            if self.closed:
+                self.opened -= 1
+            else:
+                self.idle.append((conn, made, time.time()))
+            self.condition.notify()
+        if self.closed:
+            close_quietly(conn)
+
+    @contextmanager
+    def connection(self, timeout=None):
+        """
+        Borrow a connection for the body of a with statement
+        """
+        pooled = self.acquire(timeout)
+        try:
+            yield pooled
+        finally:
+            pooled.close()
+
+    def stats(self):
+        """
+        Return the number of connections open, in use and idle, the number of times connections have been handed
+        out with the mean and longest wait for one, and the utilisation of the pool, the fraction of the time
+        since it was made that its size connections have spent handed out
+        """
+        with self.condition:
+            now = time.perf_counter()
+            busy = self.busy_seconds + sum(now - acquired for _, acquired in self.in_use.values())
+            return {"size": self.size, "open": self.opened, "in_use": len(self.in_use), "idle": len(self.idle),
+                    "acquisitions": self.acquisitions, "connects": self.connects, "reconnects": self.reconnects,
+                    "failed_checks": self.failed_checks,
+                    "mean_wait_seconds": self.wait_seconds / self.acquisitions if self.acquisitions else 0,
+                    "max_wait_seconds": self.max_wait_seconds,
+                    "utilisation": busy / (self.size * (now - self.created))}
+
+    def close(self):
+        """
+        Close the idle connections, and the connections in use as they are given back
+        """
+        with self.condition:
+            self.closed = True
+            idle, self.idle = self.idle, []
+            self.opened -= len(idle)
+            self.condition.notify_all()
+        for conn, _, _ in idle:
+            close_quietly(conn)
+
+def close_quietly(conn):
+    try:
+        conn.close()
+    except Exception:
+        pass
+
+def create_pool(user, password, host, database, port=3306, **kwargs):
+    """
+    Return a ConnectionPool of connections made by access.create_connection, set up from the pool config values.
+    Keyword arguments override the config values
+    """
+    settings = {"size": config.get("pool_size", 4), "timeout": config.get("pool_timeout", 30),
+                "max_retries": config.get("pool_max_retries", 3), "retry_delay": config.get("pool_retry_delay", 1),
+                "check_after": config.get("pool_check_after", 60), "recycle": config.get("pool_recycle", 3600)}
+    settings.update(kwargs)
+    return ConnectionPool(lambda: access.create_connection(user, password, host, database, port, raise_errors=True),
+                          **settings)
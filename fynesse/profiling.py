@@ -0,0 +1,148 @@
+# This file contains timings of the stages of the pipeline
+
+from .config import *
+
+import pandas as pd
+
+import functools
+import inspect
+import json
+import logging
+import threading
+import time
+from contextlib import contextmanager
+
+"""The public functions of access, assess and address are each timed as a stage when profiling is on, along with the counters they record, such as the rows and bytes fetched and cache hits. Stages nest, so a profile of predict_price shows the time spent in each function it calls. Profiling is on within a profile() block, for the calling thread, or everywhere if the profiling config value is set, in which case the profile of each outermost call is written to the fynesse.profiling logger as json. When it is off an instrumented function costs one extra check per call."""
+
+enabled = bool(config.get("profiling", False))
+logger = logging.getLogger("fynesse.profiling")
+
+local = threading.local()
+
+class Profile:
+    """
+    Stages timed while profiling, in the order they started. Each is a dict of its name, depth of nesting, seconds
+    taken including the stages within it, seconds taken by itself, and the counters recorded during it
+    """
+    def __init__(self):
+        self.stages = []
+
+    def records(self):
+        return [dict(stage) for stage in self.stages]
+
+    def summary(self):
+        """
+        Return a DataFrame of the number of calls, seconds and counters of each stage, slowest first by its own time
+        """
+        if not self.stages:
+            return pd.DataFrame(columns=["calls", "seconds", "self_seconds"])
+        df = pd.DataFrame(self.stages).drop(columns=["depth"])
+        df["calls"] = 1
+        return df.groupby("name").sum(numeric_only=True).sort_values("self_seconds", ascending=False)
+
+    def log(self, log=None):
+        """
+        Write each stage to log, the fynesse.profiling logger by default, as a line of json
+        """
+        log = logger if log is None else log
+        for stage in self.stages:
+            log.info(json.dumps(stage, default=str))
+
+class Stage:
+    def __init__(self, name):
+        self.name = name
+
+    def __enter__(self):
+        stack = getattr(local, "stack", None)
+        if stack is None:
+            stack = local.stack = []
+        if getattr(local, "profile", None) is None:
+            #profiling everywhere, so this is an outermost call and gets its own profile, logged when it finishes
+            local.profile = Profile()
+            self.logged = True
+        else:
+            self.logged = False
+        self.record = {"name": self.name, "depth": len(stack), "seconds": 0.0, "self_seconds": 0.0}
+        local.profile.stages.append(self.record)
+        stack.append(self)
+        self.children = 0.0
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        seconds = time.perf_counter() - self.start
+        local.stack.pop()
+        self.record["seconds"] = seconds
+        self.record["self_seconds"] = seconds - self.children
+        if local.stack:
+            local.stack[-1].children += seconds
+        if self.logged:
+            local.profile.log()
+            local.profile = None
+        return False
+
+class NullStage:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+null_stage = NullStage()
+
+def active():
+    return enabled or getattr(local, "profile", None) is not None
+
+def stage(name):
+    """
+    Return a context manager timing its body as a stage called name, when profiling is on
+    """
+    return Stage(name) if active() else null_stage
+
+def record(**counters):
+    """
+    Add counters, such as rows=10, to the innermost stage being timed. Does nothing when profiling is off
+    """
+    stack = getattr(local, "stack", None)
+    if not stack or not active():
+        return
+    current = stack[-1].record
+    for name, value in counters.items():
+        current[name] = current.get(name, 0) + value
+
+@contextmanager
+def profile():
+    """
+    Profile the calling thread within the body of a with statement, yielding the Profile the stages are recorded in
+    """
+    previous = getattr(local, "profile", None)
+    local.profile = Profile()
+    try:
+        yield local.profile
+    finally:
+        local.profile = previous
+
+def instrument(func):
+    """
+    Time each call of func as a stage named after its module and name
+    """
+    name = func.__module__.split(".")[-1] + "." + func.__name__
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        if not enabled and getattr(local, "profile", None) is None:
+            return func(*args, **kwargs)
+        with Stage(name):
+            return func(*args, **kwargs)
+    return wrapper
+
+def instrument_functions(namespace, exclude=()):
+    """
+    Instrument the public functions defined in a module, given its globals(), other than those named in exclude.
+    Generators are left alone, as only making them would be timed
+    """
+    for name, obj in list(namespace.items()):
+        if (name.startswith("_") or name in exclude or not inspect.isfunction(obj)
+                or obj.__module__ != namespace["__name__"] or inspect.isgeneratorfunction(obj)):
+            continue
+        namespace[name] = instrument(obj)
@@ -0,0 +1,165 @@
+# This file contains an asyncio service making price predictions for many callers at once
+
+from .config import *
+
+from . import address
+from . import models
+from . import pool
+
+import numpy as np
+import pandas as pd
+
+import asyncio
+import collections
+import math
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+"""A web service handling requests concurrently can await PredictionService.predict_price rather than calling address.predict_price, which blocks and prints its progress. Requests in the same tile and month, those which address.predict_prices answers with one model, are held for a short window and then predicted together, so requests arriving close together share one training set, one set of poi fetches and one fit. Fitted models are kept in a models.ModelCache, so later requests for the tile are answered without fitting again. Predictions run on a bounded pool of threads, each with a connection from a pool.ConnectionPool, and pois are fetched by the bounded pool of the default pois.FetchScheduler, so neither the database nor open street map sees more than a fixed number of requests at once."""
+
+def latency_percentiles(latencies, percentiles=(50, 90, 99)):
+    """
+    Return the given percentiles of latencies, in seconds, along with the mean and max
+    """
+    latencies = np.asarray(latencies, dtype=float)
+    if len(latencies) == 0:
+        return {}
+    res = {"p" + str(p) + "_seconds": float(v) for p, v in zip(percentiles, np.percentile(latencies, percentiles))}
+    res.update({"mean_seconds": float(latencies.mean()), "max_seconds": float(latencies.max())})
+    return res
+
+class PredictionService:
+    """
+    Answers price predictions as awaitables, coalescing requests in the same tile and month
+    :param connect: function taking no arguments which returns a new connection, as for pool.ConnectionPool
+    :param window: seconds the first request for a tile and month waits for others to join it
+    :param tile_size: width in degrees of the tiles requests are grouped by, as for address.predict_prices
+    :param workers: predictions run at once, and connections to the database kept
+    :param model_cache: models.ModelCache to keep fitted models in, a new one held in memory by default
+    """
+    def __init__(self, connect, window=0.05, tile_size=0.02, workers=4, model_cache=None, max_latencies=100000):
+        self.window = window
+        self.tile_size = tile_size
+        self.model_cache = models.ModelCache() if model_cache is None else model_cache
+        self.pool = pool.ConnectionPool(connect, size=workers)
+        self.executor = ThreadPoolExecutor(max_workers=workers)
+
+        #requests waiting to be predicted, the timers closing their windows, the keys whose window has closed and the
+        #batch being predicted, by tile and month
+        self.pending = {}
+        self.timers = {}
+        self.ready = set()
+        self.in_flight = {}
+        self.latencies = collections.deque(maxlen=max_latencies)
+        self.requests = 0
+        self.batches = 0
+        self.failures = 0
+
+    def batch_key(self, latitude, longitude, date):
+        return math.floor(latitude / self.tile_size), math.floor(longitude / self.tile_size), date[:7]
+
+    async def predict_price(self, latitude, longitude, date, property_type):
+        """
+        Predict the price of a property, as address.predict_price does, along with any other requests for the
+        same tile and month arriving within window seconds
+        """
+        start = time.perf_counter()
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        key = self.batch_key(latitude, longitude, date)
+        if key not in self.pending:
+            self.pending[key] = []
+            self.timers[key] = loop.call_later(self.window, self.close_window, key)
+        self.pending[key].append(({"latitude": latitude, "longitude": longitude, "date": date,
+                                   "property_type": property_type}, future))
+        self.requests += 1
+        try:
+            return await future
+        finally:
+            self.latencies.append(time.perf_counter() - start)
+
+    def close_window(self, key):
+        timer = self.timers.pop(key, None)
+        if timer is not None:
+            timer.cancel()
+        self.ready.add(key)
+        self.flush(key)
+
+    def flush(self, key):
+        """
+        Start predicting the requests waiting for key once its window has closed. While a batch for the key is being
+        predicted the requests keep waiting, gathering any more which arrive, as that batch fits the model they can
+        then take from the model cache
+        """
+        if key in self.in_flight or key not in self.ready:
+            return
+        self.ready.discard(key)
+        batch = self.pending.pop(key, None)
+        if batch is None:
+            return
+        task = asyncio.ensure_future(self.run_batch(batch))
+        self.in_flight[key] = task
+
+        def done(task):
+            del self.in_flight[key]
+            self.flush(key)
+        task.add_done_callback(done)
+
+    async def run_batch(self, batch):
+        self.batches += 1
+        queries = pd.DataFrame([query for query, _ in batch])
+        try:
+            res = await asyncio.get_running_loop().run_in_executor(self.executor, self.predict_batch, queries)
+        except Exception as e:
+            self.failures += len(batch)
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        for (_, future), prediction in zip(batch, res.prediction.values):
+            #the caller may have stopped waiting
+            if not future.done():
+                future.set_result(float(prediction))
+
+    def predict_batch(self, queries):
+        with self.pool.connection() as conn, address.quiet():
+            return address.predict_prices(conn, queries, self.tile_size, self.model_cache)
+
+    def stats(self):
+        """
+        Return the number of requests and the batches they were predicted in, the percentiles of the latency of
+        recent requests, and the stats of the model cache and connection pool
+        """
+        res = {"requests": self.requests, "batches": self.batches, "failures": self.failures,
+               "mean_batch_size": self.requests / self.batches if self.batches else 0, "pending": len(self.pending)}
+        res.update(latency_percentiles(self.latencies))
+        res["model_cache"] = self.model_cache.stats()
+        res["pool"] = self.pool.stats()
+        return res
+
+    async def close(self):
+        """
+        Predict the requests still waiting, then stop the threads and close the connections
+        """
+        for key in list(self.pending):
+            self.close_window(key)
+        while self.in_flight:
+            await asyncio.wait(list(self.in_flight.values()))
+        self.executor.shutdown()
+        self.pool.close()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.close()
+
+def create_service(connect, **kwargs):
+    """
+    Return a PredictionService set up from the service config values, keeping models in the default model cache.
+    Keyword arguments override the config values
+    """
+    settings = {"window": config.get("service_window", 0.05), "workers": config.get("service_workers", 4),
+                "model_cache": models.get_default_model_cache()}
+    settings.update(kwargs)
+    return PredictionService(connect, **settings)
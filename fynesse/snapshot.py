@@ -0,0 +1,106 @@
+# This file contains columnar snapshots of the database, for working offline
+
+from . import access
+from . import backends
+
+import duckdb
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+import pymysql
+
+import os
+import shutil
+
+"""Write pp_data and postcode_data to partitioned parquet files, and query them in process with DuckDB. A SnapshotConnection can be passed as conn to the query helpers in access, assess and address in place of a connection to the database."""
+
+#compact types of the columns stored in a snapshot, columns not listed are kept as strings
+snapshot_dtypes = {
+    "pp_data": {"price": "uint32", "date_of_transfer": "datetime64[ns]", "property_type": "category",
+                "new_build_flag": "category", "tenure_type": "category", "ppd_category_type": "category",
+                "record_status": "category", "db_id": "uint64"},
+    "postcode_data": {"status": "category", "usertype": "category", "easting": "UInt32", "northing": "UInt32",
+                      "positional_quality_indicator": "uint8", "country": "category", "lattitude": "float64",
+                      "longitude": "float64", "db_id": "uint64"},
+}
+
+#column each table is partitioned on
+snapshot_partitions = {"pp_data": "year", "postcode_data": "postcode_area"}
+
+def compact_frame(df, table):
+    """
+    Convert the columns of a chunk of table to the types they are stored in, adding the partition column
+    """
+    df = df.astype({column: dtype for column, dtype in snapshot_dtypes[table].items() if column in df})
+    if table == "pp_data":
+        df["year"] = df.date_of_transfer.dt.year.astype("int16")
+    return df
+
+def export_table_snapshot(conn, table, path, chunk_size=100000):
+    """
+    Write table to parquet files under path/table, partitioned on its snapshot_partitions column. Rows are
+    streamed from the database with an unbuffered cursor, chunk_size at a time
+    :return: number of rows written
+    """
+    direc = os.path.join(path, table)
+    if os.path.exists(direc):
+        shutil.rmtree(direc)
+
+    cur = conn.cursor(pymysql.cursors.SSCursor)
+    cur.execute("SELECT * FROM `" + table + "`")
+    columns = [column[0] for column in cur.description]
+
+    rows = 0
+    part = 0
+    while True:
+        chunk = cur.fetchmany(chunk_size)
+        if not chunk:
+            break
+        #the location column of the spatial index scheme can be rebuilt from lattitude and longitude
+        df = compact_frame(pd.DataFrame(list(chunk), columns=columns).drop(columns=["location"], errors="ignore"), table)
+        arrow_table = pa.Table.from_pandas(df, preserve_index=False)
+        if table == "pp_data":
+            arrow_table = arrow_table.set_column(arrow_table.schema.get_field_index("date_of_transfer"), "date_of_transfer",
+                                                 arrow_table.column("date_of_transfer").cast(pa.date32()))
+        pq.write_to_dataset(arrow_table, direc, partition_cols=[snapshot_partitions[table]],
+                            basename_template="part-" + str(part) + "-{i}.parquet")
+        rows += len(df)
+        part += 1
+    cur.close()
+    return rows
+
+def export_snapshot(conn, path, chunk_size=100000):
+    """
+    Write pp_data, partitioned by year, and postcode_data, partitioned by postcode area, to parquet files under path
+    :return: dict of the number of rows written from each table
+    """
+    return {table: export_table_snapshot(conn, table, path, chunk_size) for table in snapshot_partitions}
+
+class SnapshotConnection(backends.EmbeddedConnection):
+    """
+    Read only connection to a snapshot written by export_snapshot. pp_data and postcode_data are views over the
+    parquet files, and the summary tables kept by access are views computed from them
+    """
+    def __init__(self, path):
+        backends.EmbeddedConnection.__init__(self, duckdb.connect(), backends.embedded_backends["duckdb"])
+        for table in snapshot_partitions:
+            files = os.path.join(path, table, "**", "*.parquet").replace("'", "''")
+            self.db.execute("CREATE VIEW " + table + " AS SELECT * FROM read_parquet('" + files + "', hive_partitioning = true)")
+
+        self.db.execute("""CREATE VIEW pp_data_summary AS
+                           SELECT year(date_of_transfer) AS year, month(date_of_transfer) AS month,
+                                  split_part(postcode, ' ', 1) AS postcode_district, property_type,
+                                  COUNT(*) AS sales, SUM(price) AS total_price
+                           FROM pp_data GROUP BY ALL""")
+        self.db.execute("""CREATE VIEW pp_data_year_summary AS
+                           SELECT year, SUM(sales) AS sales, SUM(total_price) AS total_price
+                           FROM pp_data_summary GROUP BY year""")
+        quantiles = "[" + ", ".join(str(q) for q in access.price_quantiles) + "]"
+        self.db.execute("""CREATE VIEW pp_data_price_quantiles AS
+                           SELECT year, property_type, unnest(quantiles) AS quantile, unnest(prices) AS price FROM
+                           (SELECT year(date_of_transfer) AS year, property_type, """ + quantiles + """ AS quantiles,
+                                   quantile_cont(price, """ + quantiles + """) AS prices
+                            FROM pp_data GROUP BY year(date_of_transfer), property_type)""")
+
+def open_snapshot(path):
+    return SnapshotConnection(path)
@@ -0,0 +1,155 @@
+# This file contains statistics of the columns of the tables, computed once and kept until the table changes
+
+from .config import *
+
+from . import access
+
+import numpy as np
+
+import threading
+import time
+
+"""Scaling coordinates used to scan the whole of postcode_data for its bounds on every call. Instead the bounds, mean, standard deviation and quantiles of the numeric columns of a table are computed in one pass over it and kept, keyed by database and table. They are recomputed once the table has been changed by this process, as recorded by access.mark_changed, or, to catch changes made elsewhere, when its row count or largest db_id has changed, which is checked at most every check_after seconds. The transforms take arrays of any size and work on them with numpy, without going back to the database."""
+
+#numeric columns whose statistics are kept for each table
+stats_columns = {"postcode_data": ["lattitude", "longitude"], "pp_data": ["price"]}
+
+#quantiles kept for each column
+stats_quantiles = (0.001, 0.01, 0.05, 0.25, 0.5, 0.75, 0.95, 0.99, 0.999)
+
+def table_signature(conn, table):
+    """
+    Return the row count and largest db_id of table, which change whenever rows are added or deleted
+    """
+    cur = conn.cursor()
+    cur.execute("SELECT COUNT(*), MAX(db_id) FROM `" + table + "`")
+    count, max_db_id = cur.fetchall()[0]
+    return int(count), None if max_db_id is None else int(max_db_id)
+
+def compute_table_stats(conn, table, columns, chunk_size=100000):
+    """
+    Read columns of table in chunks and return a dict of the count, min, max, mean, std and quantiles of each,
+    ignoring NULLs
+    """
+    values = {column: [] for column in columns}
+    #read as float64 rather than the float32 of access.typed_columns, so the bounds are exact
+    sql = "SELECT " + ", ".join(columns) + " FROM `" + table + "`"
+    for chunk in access.iter_typed(conn, sql, dtypes={column: "float64" for column in columns}, chunk_size=chunk_size):
+        for column in columns:
+            values[column].append(chunk[column].to_numpy(dtype=float, na_value=np.nan))
+
+    res = {}
+    for column in columns:
+        column_values = np.concatenate(values[column]) if values[column] else np.array([])
+        column_values = column_values[~np.isnan(column_values)]
+        if len(column_values) == 0:
+            res[column] = {"count": 0, "min": np.nan, "max": np.nan, "mean": np.nan, "std": np.nan,
+                           "quantiles": {q: np.nan for q in stats_quantiles}}
+            continue
+        res[column] = {"count": len(column_values), "min": float(column_values.min()), "max": float(column_values.max()),
+                       "mean": float(column_values.mean()), "std": float(column_values.std()),
+                       "quantiles": dict(zip(stats_quantiles, np.quantile(column_values, stats_quantiles).tolist()))}
+    return res
+
+class StatsCache:
+    """
+    Statistics of the stats_columns of each table, by database, computed when first asked for and kept until the
+    table changes
+    :param check_after: seconds after which the row count and largest db_id of a table are checked again, to
+                        catch changes made by other processes
+    """
+    def __init__(self, check_after=60):
+        self.check_after = check_after
+        self.entries = {}
+        self.computes = 0
+        self.lock = threading.Lock()
+
+    def get(self, conn, table):
+        """
+        Return a dict of the statistics of each of the stats_columns of table, as compute_table_stats does
+        """
+        key = (access.database_key(conn), table)
+        version = access.table_version(conn, table)
+        with self.lock:
+            entry = self.entries.get(key)
+        if entry is not None and entry["version"] == version:
+            if time.time() - entry["checked"] <= self.check_after:
+                return entry["stats"]
+            if table_signature(conn, table) == entry["signature"]:
+                entry["checked"] = time.time()
+                return entry["stats"]
+
+        signature = table_signature(conn, table)
+        entry = {"stats": compute_table_stats(conn, table, stats_columns[table]), "signature": signature,
+                 "version": version, "checked": time.time()}
+        with self.lock:
+            self.entries[key] = entry
+            self.computes += 1
+        return entry["stats"]
+
+    def invalidate(self, conn=None, table=None):
+        """
+        Drop the statistics of table in the database of conn, or of every table or database if either is not given
+        """
+        database = None if conn is None else access.database_key(conn)
+        with self.lock:
+            for key in list(self.entries):
+                if (database is None or key[0] == database) and (table is None or key[1] == table):
+                    del self.entries[key]
+
+default_stats_cache = None
+
+def get_default_stats_cache():
+    """
+    Return the StatsCache set up from the stats_check_after config value, the same one each time it is called
+    """
+    global default_stats_cache
+    if default_stats_cache is None:
+        default_stats_cache = StatsCache(config.get("stats_check_after", 60))
+    return default_stats_cache
+
+def column_stats(conn, table, column):
+    """
+    Return the count, min, max, mean, std and quantiles of column of table, from the default stats cache
+    """
+    return get_default_stats_cache().get(conn, table)[column]
+
+def min_max_scale(conn, table, column, values):
+    """
+    Return values scaled to between 0 and 1, where 0 is the least value of column in table and 1 the greatest
+    """
+    stats = column_stats(conn, table, column)
+    return (np.asarray(values, dtype=float) - stats["min"]) / (stats["max"] - stats["min"])
+
+def z_score(conn, table, column, values):
+    """
+    Return the number of standard deviations of column in table each of values is from its mean
+    """
+    stats = column_stats(conn, table, column)
+    return (np.asarray(values, dtype=float) - stats["mean"]) / stats["std"]
+
+#transformers between latitude and longitude and the british national grid, one per thread as they are not
+#safe to share
+transformers = threading.local()
+
+def national_grid_transformers():
+    if not hasattr(transformers, "to_grid"):
+        import pyproj
+        transformers.to_grid = pyproj.Transformer.from_crs("EPSG:4326", "EPSG:27700", always_xy=True)
+        transformers.from_grid = pyproj.Transformer.from_crs("EPSG:27700", "EPSG:4326", always_xy=True)
+    return transformers.to_grid, transformers.from_grid
+
+def to_british_national_grid(lats, lons):
+    """
+    Return the eastings and northings in metres on the british national grid of points given by latitude and longitude
+    """
+    to_grid, _ = national_grid_transformers()
+    return to_grid.transform(np.asarray(lons, dtype=float), np.asarray(lats, dtype=float))
+
+def from_british_national_grid(eastings, northings):
+    """
+    Return the latitudes and longitudes of points given by easting and northing on the british national grid
+    """
+    _, from_grid = national_grid_transformers()
+    lons, lats = from_grid.transform(np.asarray(eastings, dtype=float), np.asarray(northings, dtype=float))
+    return lats, lons
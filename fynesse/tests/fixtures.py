@@ -0,0 +1,35 @@
+# Made up sales and postcodes shared by the tests, written as the land registry and postcode csvs
+
+from fynesse import access
+from fynesse import backends
+from fynesse import benchmark
+
+import os
+
+def write_pp_csvs(direc, rows_by_year, postcodes, seed=0):
+    """
+    Write a csv of made up sales for each year in rows_by_year, returning a dict of their filepaths by year
+    """
+    filepaths = {}
+    for year, rows in rows_by_year.items():
+        filepaths[year] = os.path.join(direc, "pp-" + str(year) + ".csv")
+        benchmark.write_synthetic_pp_csv(filepaths[year], year, rows, seed, postcodes)
+    return filepaths
+
+def sales_database(direc, rows_by_year, num_postcodes=500, backend="sqlite", path=None):
+    """
+    Return a connection to an embedded database holding made up postcodes in postcode_data and sales in pp_data,
+    along with the postcodes and the filepaths of the csvs of each year
+    """
+    postcodes = benchmark.synthetic_postcodes(num_postcodes)
+    conn = backends.connect_embedded(path or ":memory:", backend)
+    access.create_postcode_data_table(conn)
+    postcode_filepath = os.path.join(direc, "postcodes.csv")
+    benchmark.write_synthetic_postcode_csv(postcode_filepath, postcodes)
+    access.upload_csv_file_to_postcode_data_table(conn, postcode_filepath)
+
+    access.create_pp_data_table(conn)
+    filepaths = write_pp_csvs(direc, rows_by_year, postcodes)
+    for filepath in filepaths.values():
+        access.stream_csv_to_pp_data_table(conn, filepath)
+    return conn, postcodes, filepaths
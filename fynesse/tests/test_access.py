@@ -0,0 +1,151 @@
+# Tests that the summaries of pp_data stay in step with it as sales are uploaded, deleted and reloaded, and that
+# loads resume from their manifest
+
+from fynesse import access
+from fynesse import assess
+from fynesse import backends
+from fynesse import benchmark
+from fynesse import profiling
+
+from fynesse.tests import fixtures
+
+import pytest
+
+def recount(conn):
+    """
+    Return the rows each summary table should hold, counted from pp_data
+    """
+    backend = backends.backend_for(conn)
+    year, month = backend.year("date_of_transfer"), backend.month("date_of_transfer")
+    cur = conn.cursor()
+    cur.execute("SELECT " + year + " AS year, " + month + " AS month, " + backend.outcode("postcode") +
+                " AS postcode_district, property_type, COUNT(*), SUM(price) FROM pp_data " +
+                "GROUP BY year, month, postcode_district, property_type")
+    summary = set((int(y), int(m), d, t, int(s), int(p)) for y, m, d, t, s, p in cur.fetchall())
+    cur.execute("SELECT " + year + " AS year, COUNT(*), SUM(price) FROM pp_data GROUP BY year")
+    year_summary = set(tuple(int(v) for v in row) for row in cur.fetchall())
+    cur.execute("SELECT DISTINCT " + year + " AS year, property_type FROM pp_data")
+    quantiles = set((int(y), t) for y, t in cur.fetchall())
+    return summary, year_summary, quantiles
+
+def summaries(conn):
+    cur = conn.cursor()
+    cur.execute("SELECT year, month, postcode_district, property_type, sales, total_price FROM pp_data_summary")
+    summary = set((int(y), int(m), d, t, int(s), int(p)) for y, m, d, t, s, p in cur.fetchall())
+    cur.execute("SELECT year, sales, total_price FROM pp_data_year_summary")
+    year_summary = set(tuple(int(v) for v in row) for row in cur.fetchall())
+    quantiles = access.read_typed(conn, "SELECT year, property_type, quantile FROM pp_data_price_quantiles")
+    assert (quantiles.groupby(["year", "property_type"], observed=True).size() == len(access.price_quantiles)).all()
+    return summary, year_summary, set((int(y), t) for y, t in zip(quantiles["year"], quantiles["property_type"]))
+
+def check_consistent(conn):
+    assert summaries(conn) == recount(conn)
+
+@pytest.fixture(params=["sqlite", "duckdb"])
+def database(request, tmp_path):
+    conn, postcodes, filepaths = fixtures.sales_database(str(tmp_path), {2019: 1000, 2020: 1500},
+                                                         backend=request.param)
+    yield conn, postcodes, filepaths
+    conn.close()
+
+def test_summaries_follow_uploads(database, tmp_path):
+    conn, postcodes, _ = database
+    check_consistent(conn)
+    filepath = fixtures.write_pp_csvs(str(tmp_path), {2021: 800}, postcodes)[2021]
+    access.stream_csv_to_pp_data_table(conn, filepath)
+    check_consistent(conn)
+    assert assess.sales_over_time(conn) == {"2019": 1000, "2020": 1500, "2021": 800}
+
+def test_summaries_follow_deletes(database):
+    conn, _, _ = database
+    access.delete_from_pp_data(conn, "property_type = %s", ("D",))
+    check_consistent(conn)
+    access.delete_pp_data_year(conn, 2019)
+    check_consistent(conn)
+    assert list(assess.sales_over_time(conn)) == ["2020"]
+
+def test_summaries_follow_cleaning(database):
+    conn, _, _ = database
+    assess.remove_price_outliers(conn, 50000, 500000, batch_size=300)
+    check_consistent(conn)
+    assert assess.sales_over_time(conn) == assess.sales_over_time(conn, use_precomputed_result=False)
+
+def test_summaries_follow_reloads(database):
+    conn, _, filepaths = database
+    access.delete_pp_data_year(conn, 2020)
+    access.stream_csv_to_pp_data_table(conn, filepaths[2020])
+    check_consistent(conn)
+
+    access.create_pp_data_table(conn)
+    check_consistent(conn)
+    assert assess.sales_over_time(conn) == {}
+    access.stream_csv_to_pp_data_table(conn, filepaths[2019])
+    check_consistent(conn)
+    assert assess.sales_over_time(conn) == {"2019": 1000}
+
+def test_parallel_load_skips_loaded_years_until_the_table_is_recreated(tmp_path, monkeypatch):
+    path = str(tmp_path / "prices.sqlite")
+    conn = backends.connect_embedded(path)
+    access.create_pp_data_table(conn)
+    conn.close()
+    filepaths = fixtures.write_pp_csvs(str(tmp_path), {2019: 300, 2020: 400}, benchmark.synthetic_postcodes(200))
+    manifest_filepath = str(tmp_path / "manifest.json")
+
+    stream_csv_to_pp_data_table = access.stream_csv_to_pp_data_table
+    streamed = []
+    def recording(conn, source, *args, **kwargs):
+        streamed.append(source)
+        return stream_csv_to_pp_data_table(conn, source, *args, **kwargs)
+    monkeypatch.setattr(access, "stream_csv_to_pp_data_table", recording)
+
+    def load():
+        streamed.clear()
+        access.load_pp_data_parallel(lambda: backends.connect_embedded(path), [2019, 2020],
+                                     manifest_filepath=manifest_filepath, source=filepaths.get)
+        conn = backends.connect_embedded(path)
+        sales = assess.sales_over_time(conn)
+        conn.close()
+        return sorted(streamed), sales
+
+    #a load interrupted after its first year carries on with the rest
+    access.load_pp_data_parallel(lambda: backends.connect_embedded(path), [2019],
+                                 manifest_filepath=manifest_filepath, source=filepaths.get)
+    assert load() == ([filepaths[2020]], {"2019": 300, "2020": 400})
+    assert load() == ([], {"2019": 300, "2020": 400})
+
+    conn = backends.connect_embedded(path)
+    access.create_pp_data_table(conn)
+    conn.close()
+    assert load() == ([filepaths[2019], filepaths[2020]], {"2019": 300, "2020": 400})
+
+def test_bulk_load_is_profiled_around_the_load(tmp_path):
+    conn, _, filepaths = fixtures.sales_database(str(tmp_path), {2019: 300})
+    access.create_pp_data_table(conn, defer_indexes=True)
+    with profiling.profile() as prof:
+        access.bulk_load(conn, "pp_data", lambda: access.stream_csv_to_pp_data_table(conn, filepaths[2019]))
+
+    #relaxed_checks is left as a context manager, timing the load within it rather than just starting it
+    seconds = prof.summary()["seconds"]
+    assert "access.relaxed_checks" not in seconds
+    assert seconds["access.bulk_load"] >= seconds["access.stream_csv_to_pp_data_table"]
+    assert assess.sales_over_time(conn) == {"2019": 300}
+
+def test_box_join_check_follows_the_indexes(tmp_path):
+    conn, postcodes, filepaths = fixtures.sales_database(str(tmp_path), {2019: 500})
+    lat, lon = postcodes.lattitude.iloc[0], postcodes.longitude.iloc[0]
+    access.check_box_join_uses_indexes(conn, lat, lon, 0.02, "2019-01-01", "2019-12-31")
+    assert all(row["key"] is not None for row in access.explain_box_join(conn, lat, lon, 0.02, "2019-01-01", "2019-12-31"))
+
+    #without its indexes pp_data is scanned
+    access.create_pp_data_table(conn, defer_indexes=True)
+    access.stream_csv_to_pp_data_table(conn, filepaths[2019])
+    with pytest.raises(RuntimeError, match="full scan of pp "):
+        access.check_box_join_uses_indexes(conn, lat, lon, 0.02, "2019-01-01", "2019-12-31")
+    access.build_indexes(conn, "pp_data")
+    access.check_box_join_uses_indexes(conn, lat, lon, 0.02, "2019-01-01", "2019-12-31")
+
+def test_box_join_check_fails_on_duckdb(tmp_path):
+    conn, postcodes, _ = fixtures.sales_database(str(tmp_path), {2019: 500}, backend="duckdb")
+    with pytest.raises(RuntimeError, match="full scan"):
+        access.check_box_join_uses_indexes(conn, postcodes.lattitude.iloc[0], postcodes.longitude.iloc[0], 0.02,
+                                           "2019-01-01", "2019-12-31")
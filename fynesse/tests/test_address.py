@@ -0,0 +1,38 @@
+# Tests of the date window used to pick the sales a price is predicted from, and of the version of the sales in it
+
+from fynesse import access
+from fynesse import address
+from fynesse import assess
+from fynesse import benchmark
+
+from fynesse.tests import fixtures
+
+def test_date_range_scales_with_the_sales_in_each_year():
+    sales_data = {"2019": 1000, "2020": 2000, "2021": 4000}
+    assert address.get_date_range(None, "2021-06-01", sales_data) == 3
+    assert address.get_date_range(None, "2019-06-01", sales_data) == 6
+
+def test_date_range_falls_back_without_a_scale():
+    assert address.get_date_range(None, "2019-06-01", {"2019": 1000}) == address.default_date_range
+    assert address.get_date_range(None, "2019-06-01", {"2019": 1000, "2020": 1000}) == address.default_date_range
+    assert address.get_date_range(None, "2018-06-01", {"2019": 1000, "2020": 2000}) == address.default_date_range
+    assert address.date_window(None, "2018-06-01", {"2019": 1000}) == ("2018-03-01", "2018-09-01")
+
+def test_window_version_follows_the_sales_of_its_years(tmp_path):
+    conn, postcodes, _ = fixtures.sales_database(str(tmp_path), {2019: 1000, 2020: 1000})
+    version = address.window_version(assess.sales_totals_by_year(conn), "2020-03-01", "2020-09-30")
+
+    #sales added to another year leave it alone
+    access.stream_csv_to_pp_data_table(conn, fixtures.write_pp_csvs(str(tmp_path), {2018: 500}, postcodes)[2018])
+    assert address.window_version(assess.sales_totals_by_year(conn), "2020-03-01", "2020-09-30") == version
+    assert address.window_version(assess.sales_totals_by_year(conn), "2018-11-01", "2019-02-28") != version
+
+    #replacing sales in the window with as many others changes it, though the number of sales is the same
+    access.delete_from_pp_data(conn, "date_of_transfer >= %s AND date_of_transfer < %s AND price < %s",
+                               ("2020-01-01", "2021-01-01", 100000))
+    replaced = 1000 - assess.sales_over_time(conn)["2020"]
+    filepath = str(tmp_path / "replacements.csv")
+    benchmark.write_synthetic_pp_csv(filepath, 2020, replaced, 1, postcodes)
+    access.stream_csv_to_pp_data_table(conn, filepath)
+    assert assess.sales_over_time(conn)["2020"] == 1000
+    assert address.window_version(assess.sales_totals_by_year(conn), "2020-03-01", "2020-09-30") != version
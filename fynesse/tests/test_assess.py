@@ -0,0 +1,85 @@
+# Tests of the cleaning rules and aggregates, run against embedded databases of made up sales
+
+from fynesse import access
+from fynesse import assess
+
+from fynesse.tests import fixtures
+
+import pytest
+
+def count(conn, sql, params=()):
+    cur = conn.cursor()
+    cur.execute(sql, params)
+    return cur.fetchall()[0][0]
+
+def outliers(conn):
+    return count(conn, "SELECT COUNT(*) FROM pp_data WHERE price < %s OR price > %s", (50000, 500000))
+
+@pytest.mark.parametrize("backend", ["sqlite", "duckdb"])
+def test_rules_run_again_once_the_table_is_rebuilt(tmp_path, backend):
+    conn, _, filepaths = fixtures.sales_database(str(tmp_path), {2019: 1000, 2020: 2000}, backend=backend)
+    expected = outliers(conn)
+    assert expected > 0
+    assert assess.remove_price_outliers(conn, 50000, 500000, batch_size=500) == {"price_outliers": expected}
+    assert outliers(conn) == 0
+
+    access.create_pp_data_table(conn)
+    for filepath in filepaths.values():
+        access.stream_csv_to_pp_data_table(conn, filepath)
+
+    assert assess.remove_price_outliers(conn, 50000, 500000, dry_run=True) == {"price_outliers": expected}
+    assert assess.remove_price_outliers(conn, 50000, 500000, batch_size=500) == {"price_outliers": expected}
+    assert outliers(conn) == 0
+    assert sum(assess.sales_over_time(conn).values()) == 3000 - expected
+
+def test_interrupted_run_carries_on_where_it_stopped(tmp_path, monkeypatch):
+    conn, _, _ = fixtures.sales_database(str(tmp_path), {2019: 1000, 2020: 2000})
+    expected = outliers(conn)
+    delete_from_pp_data = access.delete_from_pp_data
+    batches = []
+
+    def interrupted(*args, **kwargs):
+        if len(batches) == 2:
+            raise KeyboardInterrupt
+        batches.append(args)
+        return delete_from_pp_data(*args, **kwargs)
+
+    monkeypatch.setattr(access, "delete_from_pp_data", interrupted)
+    with pytest.raises(KeyboardInterrupt):
+        assess.remove_price_outliers(conn, 50000, 500000, batch_size=500)
+    deleted = expected - outliers(conn)
+    assert 0 < deleted < expected
+    monkeypatch.setattr(access, "delete_from_pp_data", delete_from_pp_data)
+
+    #the total includes the rows deleted before the interruption, and the finished batches are not checked again
+    checked = []
+    monkeypatch.setattr(access, "delete_from_pp_data",
+                        lambda *args, **kwargs: checked.append(args) or delete_from_pp_data(*args, **kwargs))
+    assert assess.remove_price_outliers(conn, 50000, 500000, batch_size=500) == {"price_outliers": expected}
+    assert len(checked) == 6 - 2
+    assert outliers(conn) == 0
+
+def test_later_runs_only_check_new_rows(tmp_path):
+    conn, postcodes, filepaths = fixtures.sales_database(str(tmp_path), {2019: 1000})
+    first = outliers(conn)
+    assess.remove_price_outliers(conn, 50000, 500000)
+
+    access.stream_csv_to_pp_data_table(conn, fixtures.write_pp_csvs(str(tmp_path), {2020: 1000}, postcodes)[2020])
+    added = outliers(conn)
+    assert assess.remove_price_outliers(conn, 50000, 500000) == {"price_outliers": first + added}
+    assert outliers(conn) == 0
+
+def test_dry_run_changes_nothing(tmp_path):
+    conn, _, _ = fixtures.sales_database(str(tmp_path), {2019: 1000})
+    expected = outliers(conn)
+    assert assess.remove_price_outliers(conn, 50000, 500000, dry_run=True) == {"price_outliers": expected}
+    assert outliers(conn) == expected
+    assert not access.has_table(conn, "cleaning_progress")
+
+@pytest.mark.parametrize("backend", ["sqlite", "duckdb"])
+def test_district_counts_agree_with_recounting(tmp_path, backend):
+    conn, postcodes, _ = fixtures.sales_database(str(tmp_path), {2019: 1000, 2020: 500}, backend=backend)
+    counts = sorted(assess.postcode_district_counts(conn))
+    assert counts == sorted(assess.postcode_district_counts(conn, use_precomputed_values=False))
+    assert sum(frequency for _, frequency in counts) == 1500
+    assert len(counts) == postcodes.postcode.str.split(" ").str[0].nunique()
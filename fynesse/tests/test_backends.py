@@ -0,0 +1,75 @@
+# Tests that embedded databases take the sql written for pymysql, on both of the embedded backends
+
+from fynesse import backends
+
+import pytest
+
+@pytest.fixture(params=["sqlite", "duckdb"])
+def conn(request):
+    conn = backends.connect_embedded(":memory:", request.param)
+    conn.backend.create_table(conn, "pp_data_year_summary")
+    yield conn
+    conn.close()
+
+def year_summary(conn):
+    cur = conn.cursor()
+    cur.execute("SELECT `year`, sales, total_price FROM `pp_data_year_summary` ORDER BY `year`")
+    return [tuple(int(v) for v in row) for row in cur.fetchall()]
+
+def test_pymysql_parameters_and_quoting_are_translated(conn):
+    cur = conn.cursor()
+    assert cur.execute("INSERT INTO `pp_data_year_summary` (`year`, `sales`, `total_price`) VALUES (%s, %s, %s)",
+                       (2019, 2, 300000)) == 1
+    cur.execute("SELECT `sales` FROM `pp_data_year_summary` WHERE `year` = %s AND `sales` > %s", [2019, 1])
+    assert [column[0] for column in cur.description] == ["sales"]
+    assert cur.fetchone()[0] == 2
+
+def test_execute_returns_the_rows_changed(conn):
+    cur = conn.cursor()
+    assert cur.executemany("INSERT INTO pp_data_year_summary VALUES (%s, %s, %s)",
+                           [(year, 10, 1000) for year in range(2015, 2020)]) == 5
+    assert cur.executemany("INSERT INTO pp_data_year_summary VALUES (%s, %s, %s)", []) == 0
+    assert cur.execute("UPDATE pp_data_year_summary SET sales = sales + 1 WHERE year >= %s", (2018,)) == 2
+    assert cur.execute("DELETE FROM pp_data_year_summary WHERE year < %s", (2017,)) == 2
+    conn.commit()
+    assert year_summary(conn) == [(2017, 10, 1000), (2018, 11, 1000), (2019, 11, 1000)]
+
+def test_results_are_fetched_in_chunks(conn):
+    cur = conn.cursor()
+    cur.executemany("INSERT INTO pp_data_year_summary VALUES (%s, %s, %s)", [(year, 1, 1) for year in range(2000, 2025)])
+    cur.execute("SELECT year FROM pp_data_year_summary ORDER BY year")
+    chunks = []
+    while True:
+        chunk = cur.fetchmany(10)
+        if not chunk:
+            break
+        chunks.append(len(chunk))
+    assert chunks == [10, 10, 5]
+
+def test_upsert_rows_adds_onto_existing_rows(conn):
+    conn.backend.upsert_rows(conn, "pp_data_year_summary", ["year"], ["sales", "total_price"],
+                             [(2019, 2, 500000), (2020, 1, 250000)])
+    conn.backend.upsert_rows(conn, "pp_data_year_summary", ["year"], ["sales", "total_price"],
+                             [(2020, 3, 600000), (2021, 1, 100000)])
+    conn.backend.upsert_rows(conn, "pp_data_year_summary", ["year"], ["sales", "total_price"], [])
+    conn.commit()
+    assert year_summary(conn) == [(2019, 2, 500000), (2020, 4, 850000), (2021, 1, 100000)]
+
+def test_insert_rows_converts_csv_strings(conn):
+    conn.backend.create_table(conn, "pp_data")
+    columns = ["id", "transaction_unique_identifier", "price", "date_of_transfer", "postcode", "property_type"]
+    conn.backend.insert_rows(conn, "pp_data", columns, [["0", "{A}", "250000", "2019-06-01 00:00", "CB1 1AA", "D"],
+                                                        ["1", "{B}", "", "2019-07-01 00:00", "CB1 1AB", "F"]])
+    cur = conn.cursor()
+    cur.execute("SELECT db_id, price, " + conn.backend.month("date_of_transfer") + " FROM pp_data ORDER BY db_id")
+    rows = cur.fetchall()
+    #db_id is filled in, empty prices are NULL and the time of day is dropped from the dates
+    assert [(row[1], int(row[2])) for row in rows] == [(250000, 6), (None, 7)]
+    assert rows[0][0] < rows[1][0]
+
+def test_tables_are_found_and_unknown_backends_refused(conn):
+    assert conn.has_table("pp_data_year_summary")
+    assert not conn.has_table("pp_data")
+    assert backends.backend_for(conn) is conn.backend
+    with pytest.raises(ValueError):
+        backends.connect_embedded(":memory:", "postgres")
@@ -0,0 +1,70 @@
+# Tests of the store of pois read from an extract, written as GeoJSON from a fixture of made up pois
+
+from fynesse import extracts
+from fynesse import pois
+
+from fynesse.tests.test_pois import counting_fetcher, expected_count, make_fixture
+
+import geopandas as gpd
+import pandas as pd
+import pytest
+from shapely.geometry import Point
+
+def write_extract(tmp_path, fixture):
+    """
+    Write fixture as GeoJSON along with a poi with none of the extract keys, returning its filepath
+    """
+    untagged = gpd.GeoDataFrame({"amenity": [None], "healthcare": [None], "name": ["a house"]},
+                                geometry=[Point(0.15, 52.25)], crs="EPSG:4326")
+    filepath = str(tmp_path / "extract.geojson")
+    gpd.GeoDataFrame(pd.concat([fixture.assign(name="somewhere"), untagged], ignore_index=True),
+                     crs="EPSG:4326").to_file(filepath, driver="GeoJSON")
+    return filepath
+
+@pytest.fixture
+def store(tmp_path):
+    fixture = make_fixture()
+    store = extracts.ExtractStore(str(tmp_path / "extract.sqlite"))
+    assert store.ingest_geojson(write_extract(tmp_path, fixture), bounds=(52.3, 52.2, 0.2, 0.1)) == len(fixture)
+    return store, fixture
+
+def test_ingest_keeps_the_tagged_pois(store):
+    store, fixture = store
+    assert store.stats() == {"pois": len(fixture), "extracts": 1}
+    assert store.covers(52.29, 52.21, 0.19, 0.11)
+    assert not store.covers(52.35, 52.21, 0.19, 0.11)
+
+@pytest.mark.parametrize("tags", [{"amenity": True}, {"healthcare": True}, {"amenity": ["cafe", "pub"]},
+                                  {"amenity": "school", "healthcare": True}])
+def test_fetch_selects_box_and_tags(store, tags):
+    store, fixture = store
+    for lat, lon, box_size in [(52.25, 0.15, 0.02), (52.22, 0.12, 0.05), (52.25, 0.15, 0.2)]:
+        found = store.get_pois(lat, lon, box_size, tags)
+        assert len(found) == expected_count(fixture, lat, lon, box_size, tags)
+        assert found.crs == "EPSG:4326"
+    #names are kept as tags alongside the poi types
+    assert (store.get_pois(52.25, 0.15, 0.02, tags).name == "somewhere").all()
+    assert len(store.fetch(52.3, 52.2, 0.2, 0.1, {})) == 0
+
+def test_fetch_reads_the_rtree_first(store):
+    store, _ = store
+    store.check_fetch_uses_rtree(52.26, 52.24, 0.16, 0.14, {"amenity": ["cafe", "pub"], "healthcare": True})
+    plan = store.explain_fetch(52.26, 52.24, 0.16, 0.14, {"amenity": True})
+    assert "pois_rtree" in plan[0]
+    assert store.explain_fetch(52.26, 52.24, 0.16, 0.14, {}) == []
+
+def test_boxes_outside_the_extract_fall_back(store):
+    store, fixture = store
+    fallback, calls = counting_fetcher(fixture)
+    fetcher = extracts.extract_fetcher(store, fallback)
+
+    found = fetcher(52.26, 52.24, 0.16, 0.14, {"amenity": True})
+    assert len(found) == expected_count(fixture, 52.25, 0.15, 0.02, {"amenity": True})
+    assert calls == []
+    fetcher(52.31, 52.29, 0.16, 0.14, {"amenity": True})
+    assert len(calls) == 1
+
+    #without a fallback boxes outside the extract are answered from the store, holding only what it has of them
+    cache = pois.POICache(fetcher=extracts.extract_fetcher(store, None))
+    found = cache.get_pois(52.3, 0.15, 0.02, {"amenity": True})
+    assert len(found) == expected_count(fixture, 52.3, 0.15, 0.02, {"amenity": True})
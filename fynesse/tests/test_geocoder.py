@@ -0,0 +1,74 @@
+# Tests of the geocoder, built from postcode_data of made up postcodes in an embedded database
+
+from fynesse import access
+from fynesse import backends
+from fynesse import benchmark
+from fynesse import geocoder
+
+import numpy as np
+
+import os
+import tempfile
+
+state = {}
+
+def setup_module():
+    direc = tempfile.mkdtemp()
+    postcodes = benchmark.synthetic_postcodes(500)
+    conn = backends.connect_embedded()
+    access.create_postcode_data_table(conn)
+    postcode_filepath = os.path.join(direc, "postcodes.csv")
+    benchmark.write_synthetic_postcode_csv(postcode_filepath, postcodes)
+    access.upload_csv_file_to_postcode_data_table(conn, postcode_filepath)
+    gc = geocoder.build_geocoder(conn, os.path.join(direc, "geocoder"), chunk_size=100)
+    conn.close()
+    state.update(postcodes=postcodes, geocoder=gc)
+
+def test_lookup_ignores_case_and_spaces():
+    postcodes, gc = state["postcodes"], state["geocoder"]
+    assert len(gc) == len(postcodes)
+    written = [postcodes.postcode.iloc[0], postcodes.postcode.iloc[1].lower(), postcodes.postcode.iloc[2].replace(" ", "")]
+    lats, lons = gc.lookup(written)
+    np.testing.assert_allclose(lats, postcodes.lattitude.values[:3], atol=1e-5)
+    np.testing.assert_allclose(lons, postcodes.longitude.values[:3], atol=1e-5)
+
+def test_unknown_postcodes_are_nan():
+    gc = state["geocoder"]
+    lats, lons = gc.lookup(["ZZ9 9ZZ", "", "TOOLONGPOSTCODE", state["postcodes"].postcode.iloc[0]])
+    assert np.isnan(lats[:3]).all() and np.isnan(lons[:3]).all()
+    assert not np.isnan(lats[3])
+    assert list(gc.find(["ZZ9 9ZZ"])) == [-1]
+
+def test_non_ascii_postcodes_are_unknown():
+    postcodes, gc = state["postcodes"], state["geocoder"]
+    lats, _ = gc.lookup(["CB1 1AÄ", "Ñ1 1AA", "ＣＢ１ １ＡＡ", postcodes.postcode.iloc[0]])
+    assert np.isnan(lats[:3]).all()
+    assert not np.isnan(lats[3])
+    keys, valid = geocoder.normalise_postcodes(["cb1 1aa", "CB1 1AÄ"])
+    assert list(keys) == [b"CB11AA", b""]
+    assert list(valid) == [True, False]
+
+def test_nearest_finds_the_postcode_at_a_point():
+    postcodes, gc = state["postcodes"], state["geocoder"]
+    chosen = postcodes.iloc[[5, 50, 250]]
+    found, distances = gc.nearest(chosen.lattitude.values, chosen.longitude.values)
+    assert list(found) == list(chosen.postcode)
+    assert (distances < 1e-4).all()
+
+def test_nearest_k_are_sorted_by_distance():
+    postcodes, gc = state["postcodes"], state["geocoder"]
+    point = postcodes.iloc[10]
+    found, distances = gc.nearest([point.lattitude], [point.longitude], k=5)
+    assert found.shape == (1, 5) and distances.shape == (1, 5)
+    assert found[0, 0] == point.postcode
+    assert (np.diff(distances[0]) >= 0).all()
+
+    #the nearest postcodes are those closest by a brute force search
+    all_distances = np.hypot(postcodes.lattitude.values - point.lattitude, postcodes.longitude.values - point.longitude)
+    assert set(found[0]) == set(postcodes.postcode.values[np.argsort(all_distances)[:5]])
+
+def test_reverse_lookup_round_trips():
+    postcodes, gc = state["postcodes"], state["geocoder"]
+    lats, lons = gc.lookup(postcodes.postcode.values[:100])
+    found, _ = gc.nearest(lats, lons)
+    assert list(found) == list(postcodes.postcode.values[:100])
@@ -0,0 +1,223 @@
+# Tests of the poi cache and fetch scheduler, answered offline from a fixture of made up pois
+
+from fynesse import pois
+
+import geopandas as gpd
+import numpy as np
+
+def make_fixture(num_pois=400, seed=0):
+    """
+    Return made up pois spread over the box from 52.2 to 52.3 north and 0.1 to 0.2 east, each an amenity or a
+    healthcare, in the columns osmnx would use
+    """
+    rng = np.random.default_rng(seed)
+    lats = rng.uniform(52.2, 52.3, num_pois)
+    lons = rng.uniform(0.1, 0.2, num_pois)
+    amenity = rng.random(num_pois) < 0.7
+    return gpd.GeoDataFrame({"amenity": np.where(amenity, rng.choice(["cafe", "pub", "school"], num_pois), None),
+                             "healthcare": np.where(amenity, None, "pharmacy")},
+                            geometry=gpd.points_from_xy(lons, lats), crs="EPSG:4326")
+
+def counting_fetcher(fixture):
+    """
+    Return a fetcher answering from fixture, along with the list of the boxes and tags it is called with
+    """
+    fetch = pois.fixture_fetcher(fixture)
+    calls = []
+    def fetcher(north, south, east, west, tags):
+        calls.append((north, south, east, west, tags))
+        return fetch(north, south, east, west, tags)
+    return fetcher, calls
+
+def expected_count(fixture, lat, lon, box_size, tags):
+    return len(pois.fixture_fetcher(fixture)(lat + box_size/2, lat - box_size/2, lon + box_size/2, lon - box_size/2, tags))
+
+def make_scheduler(fixture, block_tiles=10):
+    fetcher, calls = counting_fetcher(fixture)
+    scheduler = pois.FetchScheduler(pois.POICache(fetcher=fetcher), requests_per_second=None, block_tiles=block_tiles)
+    return scheduler, calls
+
+def tiles_of(cache, requests):
+    tiles = set()
+    for lat, lon, box_size, _ in requests:
+        tiles |= set(cache.tiles_covering(lat + box_size/2, lat - box_size/2, lon + box_size/2, lon - box_size/2))
+    return tiles
+
+def test_overlapping_boxes_are_fetched_once():
+    fixture = make_fixture()
+    scheduler, calls = make_scheduler(fixture)
+    requests = [(52.255, 0.135, 0.02, {"amenity": True}), (52.26, 0.14, 0.02, {"amenity": True}),
+                (52.258, 0.138, 0.01, {"amenity": True})]
+
+    res = scheduler.get_pois(requests)
+
+    assert scheduler.requests == 1
+    assert len(calls) == 1
+    #the tiles shared by the boxes are only fetched once
+    assert scheduler.tiles_fetched == len(tiles_of(scheduler.cache, requests))
+    assert scheduler.stats()["boxes_requested"] == 3
+    for (lat, lon, box_size, tags), found in zip(requests, res):
+        assert len(found) == expected_count(fixture, lat, lon, box_size, tags)
+
+def test_tags_of_a_box_are_fetched_in_one_request():
+    fixture = make_fixture()
+    scheduler, calls = make_scheduler(fixture)
+    requests = [(52.255, 0.135, 0.02, {"amenity": True}), (52.255, 0.135, 0.02, {"healthcare": True}),
+                (52.255, 0.135, 0.02, {"amenity": ["cafe", "pub"]})]
+
+    res = scheduler.get_pois(requests)
+
+    assert scheduler.requests == 1
+    assert calls[0][4] == {"amenity": True, "healthcare": True}
+    for (lat, lon, box_size, tags), found in zip(requests, res):
+        assert len(found) == expected_count(fixture, lat, lon, box_size, tags)
+    assert len(res[2]) < len(res[0])
+
+def test_cached_tiles_are_not_fetched_again():
+    fixture = make_fixture()
+    scheduler, calls = make_scheduler(fixture)
+    requests = [(52.255, 0.135, 0.02, {"amenity": True})]
+
+    first = scheduler.get_pois(requests)
+    second = scheduler.get_pois(requests)
+
+    assert scheduler.requests == 1
+    assert len(calls) == 1
+    assert len(first[0]) == len(second[0])
+
+def test_only_missing_tiles_are_fetched():
+    fixture = make_fixture()
+    scheduler, calls = make_scheduler(fixture)
+    scheduler.get_pois([(52.255, 0.135, 0.02, {"amenity": True})])
+    fetched = scheduler.tiles_fetched
+
+    requests = [(52.255, 0.135, 0.02, {"amenity": True}), (52.265, 0.135, 0.02, {"amenity": True})]
+    scheduler.get_pois(requests)
+
+    assert scheduler.requests == 2
+    assert scheduler.tiles_fetched == len(tiles_of(scheduler.cache, requests))
+    assert scheduler.tiles_fetched - fetched < len(tiles_of(scheduler.cache, requests[1:]))
+
+def test_each_block_is_fetched_with_its_own_request():
+    fixture = make_fixture()
+    scheduler, calls = make_scheduler(fixture, block_tiles=2)
+    requests = [(52.215, 0.115, 0.005, {"amenity": True}), (52.285, 0.185, 0.005, {"amenity": True})]
+    assert len(scheduler.missing_blocks(requests)) == 2
+
+    res = scheduler.get_pois(requests)
+
+    assert len(scheduler.missing_blocks(requests)) == 0
+    assert scheduler.requests == 2
+    assert len(calls) == 2
+    for (lat, lon, box_size, tags), found in zip(requests, res):
+        assert len(found) == expected_count(fixture, lat, lon, box_size, tags)
+
+def test_batch_larger_than_the_cache_is_read_before_eviction():
+    fixture = make_fixture()
+    fetcher, calls = counting_fetcher(fixture)
+    scheduler = pois.FetchScheduler(pois.POICache(fetcher=fetcher, max_tiles=12), requests_per_second=None)
+    requests = [(52.215, 0.115, 0.02, {"amenity": True}), (52.285, 0.185, 0.02, {"amenity": True})]
+
+    res = scheduler.get_pois(requests)
+
+    #every tile comes from the prefetch, none being evicted and fetched again part way through the batch
+    assert len(calls) == scheduler.requests
+    assert scheduler.cache.stats()["misses"] == 0
+    assert scheduler.cache.stats()["tiles"] == 12
+    for (lat, lon, box_size, tags), found in zip(requests, res):
+        assert len(found) == expected_count(fixture, lat, lon, box_size, tags)
+
+def test_fixture_fetcher_selects_box_and_tags():
+    fixture = make_fixture()
+    found = pois.fixture_fetcher(fixture)(52.25, 52.22, 0.15, 0.12, {"amenity": ["cafe"]})
+
+    points = found.geometry.representative_point()
+    assert len(found) > 0
+    assert ((points.y >= 52.22) & (points.y <= 52.25) & (points.x >= 0.12) & (points.x <= 0.15)).all()
+    assert (found.amenity == "cafe").all()
+
+def test_cache_answers_from_fixture_and_counts_tiles():
+    fixture = make_fixture()
+    fetcher, calls = counting_fetcher(fixture)
+    cache = pois.POICache(fetcher=fetcher)
+    tiles = len(cache.tiles_covering(52.265, 52.245, 0.145, 0.125))
+
+    first = cache.get_pois(52.255, 0.135, 0.02, {"amenity": True})
+    second = cache.get_pois(52.255, 0.135, 0.02, {"amenity": True})
+
+    assert len(first) == len(second) == expected_count(fixture, 52.255, 0.135, 0.02, {"amenity": True})
+    assert len(calls) == 1
+    assert cache.stats()["misses"] == tiles
+    assert cache.stats()["hits"] == tiles
+
+def test_cache_keeps_tag_sets_apart():
+    fixture = make_fixture()
+    fetcher, calls = counting_fetcher(fixture)
+    cache = pois.POICache(fetcher=fetcher)
+
+    amenities = cache.get_pois(52.255, 0.135, 0.02, {"amenity": True})
+    healthcares = cache.get_pois(52.255, 0.135, 0.02, {"healthcare": True})
+
+    assert len(calls) == 2
+    assert amenities.amenity.notna().all()
+    assert len(healthcares) == expected_count(fixture, 52.255, 0.135, 0.02, {"healthcare": True})
+
+def test_cache_evicts_least_recently_used_tiles():
+    fixture = make_fixture()
+    fetcher, calls = counting_fetcher(fixture)
+    cache = pois.POICache(fetcher=fetcher, max_tiles=12)
+    tiles = len(cache.tiles_covering(52.225, 52.205, 0.125, 0.105))
+
+    cache.get_pois(52.215, 0.115, 0.02, {"amenity": True})
+    cache.get_pois(52.285, 0.185, 0.02, {"amenity": True})
+
+    assert cache.stats()["tiles"] == 12
+    assert cache.stats()["evictions"] == 2 * tiles - 12
+    #the first box was evicted, so is fetched again
+    cache.get_pois(52.215, 0.115, 0.005, {"amenity": True})
+    assert len(calls) == 3
+
+def test_tiles_being_read_are_not_evicted():
+    fixture = make_fixture()
+    cache = pois.POICache(fetcher=pois.fixture_fetcher(fixture), max_tiles=12)
+    store_tiles = cache.store_tiles
+
+    #another box is read, and the cache evicted, between the first box's tiles being stored and read back
+    def store_then_read_another_box(tags, tiles, found):
+        store_tiles(tags, tiles, found)
+        if tiles[0] == cache.tile_of(52.205, 0.105):
+            cache.get_pois(52.285, 0.185, 0.02, {"amenity": True})
+
+    cache.store_tiles = store_then_read_another_box
+    found = cache.get_pois(52.215, 0.115, 0.02, {"amenity": True})
+
+    assert len(found) == expected_count(fixture, 52.215, 0.115, 0.02, {"amenity": True})
+    assert cache.pinned == {}
+    assert cache.stats()["tiles"] == 12
+
+def test_cleared_cache_fetches_again():
+    fixture = make_fixture()
+    fetcher, calls = counting_fetcher(fixture)
+    cache = pois.POICache(fetcher=fetcher)
+    expected = cache.get_pois(52.255, 0.135, 0.02, {"amenity": True})
+
+    cache.clear()
+
+    assert cache.stats()["tiles"] == 0
+    assert len(cache.get_pois(52.255, 0.135, 0.02, {"amenity": True})) == len(expected)
+    assert len(calls) == 2
+
+def test_cache_file_is_used_offline(tmp_path):
+    fixture = make_fixture()
+    path = str(tmp_path / "pois.sqlite")
+    cache = pois.POICache(path, fetcher=pois.fixture_fetcher(fixture))
+    expected = cache.get_pois(52.255, 0.135, 0.02, {"amenity": True})
+    cache.db.close()
+
+    def offline(north, south, east, west, tags):
+        raise AssertionError("fetched from " + str((north, south, east, west)))
+
+    reopened = pois.POICache(path, fetcher=offline)
+    found = reopened.get_pois(52.255, 0.135, 0.02, {"amenity": True})
+    assert len(found) == len(expected)
+    assert sorted(found.amenity) == sorted(expected.amenity)
@@ -0,0 +1,117 @@
+# Tests of the connection pool, with connections standing in for pymysql's which can be told to fail
+
+from fynesse import pool
+
+import pytest
+
+import threading
+import time
+
+class FakeConnection:
+    def __init__(self, number):
+        self.number = number
+        self.alive = True
+        self.closed = False
+
+    def ping(self, reconnect=False):
+        if not self.alive:
+            raise ConnectionError("server has gone away")
+
+    def close(self):
+        self.closed = True
+
+def connector(failures=0):
+    """
+    Return a connect function, failing its first failures calls, along with the list of connections it made
+    """
+    made = []
+    calls = []
+    def connect():
+        calls.append(1)
+        if len(calls) <= failures:
+            raise ConnectionError("connection refused")
+        made.append(FakeConnection(len(made)))
+        return made[-1]
+    return connect, made
+
+def test_connections_are_reused():
+    connect, made = connector()
+    connections = pool.ConnectionPool(connect, size=2)
+    with connections.connection() as conn:
+        assert conn.number == 0
+    with connections.connection() as conn:
+        assert conn.number == 0
+    assert len(made) == 1
+    assert connections.stats()["acquisitions"] == 2
+    assert connections.stats()["idle"] == 1
+
+def test_exhausted_pool_times_out():
+    connect, made = connector()
+    connections = pool.ConnectionPool(connect, size=2, timeout=0.05)
+    held = [connections.acquire(), connections.acquire()]
+    with pytest.raises(TimeoutError):
+        connections.acquire()
+    assert len(made) == 2
+    assert connections.stats()["in_use"] == 2
+
+    held[0].close()
+    assert connections.acquire().number == 0
+
+def test_waiting_caller_gets_the_connection_given_back():
+    connect, _ = connector()
+    connections = pool.ConnectionPool(connect, size=1, timeout=5)
+    conn = connections.acquire()
+    threading.Timer(0.05, conn.close).start()
+
+    start = time.perf_counter()
+    with connections.connection() as conn:
+        assert conn.number == 0
+    assert time.perf_counter() - start >= 0.04
+    assert connections.stats()["max_wait_seconds"] >= 0.04
+
+def test_connecting_is_retried():
+    connect, made = connector(failures=2)
+    connections = pool.ConnectionPool(connect, size=1, max_retries=3, retry_delay=0)
+    with connections.connection() as conn:
+        assert conn is not None
+    assert len(made) == 1
+    assert connections.stats()["connects"] == 1
+
+def test_failed_connect_frees_its_place():
+    connect, made = connector(failures=3)
+    connections = pool.ConnectionPool(connect, size=1, timeout=0.05, max_retries=2, retry_delay=0)
+    with pytest.raises(ConnectionError):
+        connections.acquire()
+    assert connections.stats()["open"] == 0
+    #the place is free for the next caller, whose second attempt gets through
+    assert connections.acquire().number == 0
+    assert connections.stats()["open"] == 1
+
+def test_dead_and_old_connections_are_remade():
+    connect, made = connector()
+    connections = pool.ConnectionPool(connect, size=1, check_after=0, recycle=3600)
+    with connections.connection() as conn:
+        pass
+    made[0].alive = False
+    time.sleep(0.01)
+    with connections.connection() as conn:
+        assert conn.number == 1
+    assert made[0].closed
+    assert connections.stats()["failed_checks"] == 1
+
+    connections.recycle = 0
+    with connections.connection() as conn:
+        assert conn.number == 2
+    assert connections.stats()["reconnects"] == 2
+
+def test_closed_pool_closes_its_connections():
+    connect, made = connector()
+    connections = pool.ConnectionPool(connect, size=2)
+    held = connections.acquire()
+    connections.acquire().close()
+    connections.close()
+    assert [conn.closed for conn in made] == [False, True]
+    held.close()
+    assert made[0].closed
+    with pytest.raises(RuntimeError):
+        connections.acquire()
@@ -0,0 +1,128 @@
+# Tests of the prediction service, against an embedded sqlite database of made up sales with fixture pois
+
+from fynesse import access
+from fynesse import address
+from fynesse import backends
+from fynesse import benchmark
+from fynesse import models
+from fynesse import service
+
+import numpy as np
+import pandas as pd
+
+import asyncio
+import math
+import os
+import shutil
+import tempfile
+
+state = {}
+
+def setup_module():
+    direc = tempfile.mkdtemp()
+    postcodes = benchmark.synthetic_postcodes(2000)
+    path = os.path.join(direc, "prices.sqlite")
+    conn = backends.connect_embedded(path)
+    access.create_pp_data_table(conn)
+    access.create_postcode_data_table(conn)
+    postcode_filepath = os.path.join(direc, "postcodes.csv")
+    benchmark.write_synthetic_postcode_csv(postcode_filepath, postcodes)
+    access.upload_csv_file_to_postcode_data_table(conn, postcode_filepath)
+    for year, rows in [(2019, 6000), (2020, 9000)]:
+        filepath = os.path.join(direc, "pp-" + str(year) + ".csv")
+        benchmark.write_synthetic_pp_csv(filepath, year, rows, postcodes=postcodes)
+        access.stream_csv_to_pp_data_table(conn, filepath)
+    conn.close()
+
+    pois_context = benchmark.fixture_pois(benchmark.synthetic_poi_fixture(postcodes, 5000))
+    pois_context.__enter__()
+    state.update(direc=direc, path=path, postcodes=postcodes, pois_context=pois_context)
+
+def teardown_module():
+    state["pois_context"].__exit__(None, None, None)
+    shutil.rmtree(state["direc"])
+
+def connect():
+    return backends.connect_embedded(state["path"])
+
+def tile_queries(num_queries, postcode=0, tile_size=0.02, date="2020-06-15", property_type="T"):
+    """
+    Return num_queries spread within the tile holding the given postcode
+    """
+    row = state["postcodes"].iloc[postcode]
+    lat = (math.floor(row.lattitude / tile_size) + 0.5) * tile_size
+    lon = (math.floor(row.longitude / tile_size) + 0.5) * tile_size
+    offsets = np.linspace(-0.4, 0.4, num_queries) * tile_size
+    return pd.DataFrame({"latitude": lat + offsets, "longitude": lon - offsets, "date": date,
+                         "property_type": property_type})
+
+async def predict_all(svc, queries):
+    return await asyncio.gather(*[svc.predict_price(row.latitude, row.longitude, row.date, row.property_type)
+                                  for row in queries.itertuples()])
+
+def test_requests_in_a_tile_are_coalesced():
+    queries = tile_queries(4)
+
+    async def run():
+        async with service.PredictionService(connect, window=0.2, workers=2) as svc:
+            predictions = await predict_all(svc, queries)
+            return predictions, svc.stats()
+    predictions, stats = asyncio.run(run())
+
+    assert stats["requests"] == 4
+    assert stats["batches"] == 1
+    assert stats["failures"] == 0
+    conn = connect()
+    expected = address.predict_prices(conn, queries, model_cache=models.ModelCache())
+    conn.close()
+    assert np.allclose(predictions, expected.prediction.values)
+
+def test_requests_in_other_tiles_or_months_are_batched_apart():
+    queries = pd.concat([tile_queries(2), tile_queries(2, date="2020-09-15"), tile_queries(2, postcode=1)])
+
+    async def run():
+        async with service.PredictionService(connect, window=0.2, workers=2) as svc:
+            keys = set(svc.batch_key(row.latitude, row.longitude, row.date) for row in queries.itertuples())
+            await predict_all(svc, queries)
+            return keys, svc.stats()
+    keys, stats = asyncio.run(run())
+
+    assert len(keys) >= 2
+    assert stats["batches"] == len(keys)
+    assert stats["requests"] == len(queries)
+
+def test_later_requests_are_answered_from_the_model_cache():
+    queries = tile_queries(3)
+
+    async def run():
+        async with service.PredictionService(connect, window=0.05, workers=2) as svc:
+            first = await predict_all(svc, queries.iloc[:2])
+            later = await predict_all(svc, queries.iloc[2:])
+            return first, later, svc.stats()
+    first, later, stats = asyncio.run(run())
+
+    assert stats["batches"] == 2
+    assert stats["model_cache"]["hits"] >= 1
+    assert np.isfinite(first + later).all()
+
+def test_close_predicts_waiting_requests_and_cancels_their_timers():
+    queries = tile_queries(2)
+    errors = []
+
+    async def run():
+        asyncio.get_running_loop().set_exception_handler(lambda loop, context: errors.append(context))
+        svc = service.PredictionService(connect, window=0.5, workers=1)
+        waiting = asyncio.gather(*[svc.predict_price(row.latitude, row.longitude, row.date, row.property_type)
+                                   for row in queries.itertuples()])
+        await asyncio.sleep(0)
+        await svc.close()
+        predictions = await waiting
+        #past the end of the window, when a timer left running would try to flush the key again
+        await asyncio.sleep(0.6)
+        return predictions, svc
+    predictions, svc = asyncio.run(run())
+
+    assert len(predictions) == 2
+    assert not svc.pending
+    assert not svc.timers
+    assert errors == []
@@ -33,6 +33,8 @@ REQUIRED = [
 # What packages are optional?
 EXTRAS = {
     "interactive html plots": ["bokeh",],
+    "snapshots": ["pyarrow", "duckdb",],
+    "osm extracts": ["osmium",],
 }
 
 PACKAGE_DATA = {"fynesse": ["defaults.yml"]}